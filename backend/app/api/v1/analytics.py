@@ -0,0 +1,134 @@
+from datetime import date, datetime, timedelta, timezone
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.session import get_db
+from app.db.repositories import analytics as analytics_repo
+from app.schemas.analytics import RestaurantStats, TopDish
+from app.services.auth import get_admin_user
+from typing import List, Literal, Optional
+
+router = APIRouter(
+    prefix="/admin/analytics",
+    tags=["Analytics"],
+    responses={
+        status.HTTP_401_UNAUTHORIZED: {
+            "description": "Не авторизован",
+            "content": {"application/json": {"example": {"detail": "Not authenticated"}}}
+        },
+        status.HTTP_403_FORBIDDEN: {
+            "description": "Доступ запрещен",
+            "content": {"application/json": {"example": {"detail": "Forbidden"}}}
+        },
+        status.HTTP_400_BAD_REQUEST: {
+            "description": "Некорректный период",
+            "content": {"application/json": {"example": {"detail": "since must be earlier than until"}}}
+        }
+    }
+)
+
+
+def as_utc(value: datetime) -> datetime:
+    """Время без часового пояса считается UTC"""
+    return value.astimezone(timezone.utc) if value.tzinfo is not None else value.replace(tzinfo=timezone.utc)
+
+
+def check_period(since, until):
+    if since >= until:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="since must be earlier than until"
+        )
+
+
+@router.get(
+    "/restaurants",
+    response_model=List[RestaurantStats],
+    summary="Заказы и выручка ресторанов",
+    description="Агрегаты по часам или дням из предрасчитанной статистики (только для администраторов)",
+    responses={
+        status.HTTP_200_OK: {
+            "description": "Агрегаты по ресторанам",
+            "content": {
+                "application/json": {
+                    "example": [
+                        {
+                            "restaurant_id": 1,
+                            "bucket": "2023-06-01T12:00:00+00:00",
+                            "orders_count": 42,
+                            "revenue": 1093.58,
+                            "canceled_count": 2,
+                            "delivered_count": 37,
+                            "avg_delivery_minutes": 34.5
+                        }
+                    ]
+                }
+            }
+        }
+    }
+)
+async def restaurant_stats(
+        since: Optional[datetime] = Query(None, description="Начало периода (по умолчанию сутки назад)"),
+        until: Optional[datetime] = Query(None, description="Конец периода, не включая (по умолчанию сейчас)"),
+        granularity: Literal["hour", "day"] = Query("hour", description="Шаг агрегации"),
+        restaurant_id: Optional[int] = Query(None, gt=0, description="Только этот ресторан"),
+        db: AsyncSession = Depends(get_db),
+        admin: dict = Depends(get_admin_user)
+):
+    """
+    Число заказов, выручка (без отмен), отмены, доставки и среднее время
+    доставки. Время относится к часу создания заказа, в UTC; границы
+    периода без часового пояса тоже считаются UTC. Запрос читает только
+    таблицу агрегатов и не нагружает orders.
+    """
+    until = as_utc(until) if until else datetime.now(timezone.utc)
+    since = as_utc(since) if since else until - timedelta(days=1)
+    check_period(since, until)
+    rows = await analytics_repo.get_restaurant_stats(db, since, until, granularity, restaurant_id)
+    return [
+        {
+            "restaurant_id": rid,
+            "bucket": bucket,
+            "orders_count": orders_count,
+            "revenue": round(revenue, 2),
+            "canceled_count": canceled_count,
+            "delivered_count": delivered_count,
+            "avg_delivery_minutes": round(delivery_seconds / delivered_count / 60, 1) if delivered_count else None,
+        }
+        for rid, bucket, orders_count, revenue, canceled_count, delivered_count, delivery_seconds in rows
+    ]
+
+
+@router.get(
+    "/dishes/top",
+    response_model=List[TopDish],
+    summary="Самые продаваемые блюда",
+    description="Блюда с наибольшим числом проданных порций за период (только для администраторов)",
+    responses={
+        status.HTTP_200_OK: {
+            "description": "Рейтинг блюд",
+            "content": {
+                "application/json": {
+                    "example": [
+                        {"dish_id": 1, "restaurant_id": 1, "name": "Пицца Маргарита", "quantity": 120, "revenue": 1558.8}
+                    ]
+                }
+            }
+        }
+    }
+)
+async def top_dishes(
+        since: Optional[date] = Query(None, description="Первый день периода (по умолчанию неделя назад)"),
+        until: Optional[date] = Query(None, description="День после конца периода (по умолчанию завтра)"),
+        restaurant_id: Optional[int] = Query(None, gt=0, description="Только этот ресторан"),
+        limit: int = Query(10, ge=1, le=100, description="Размер рейтинга"),
+        db: AsyncSession = Depends(get_db),
+        admin: dict = Depends(get_admin_user)
+):
+    until = until or datetime.now(timezone.utc).date() + timedelta(days=1)
+    since = since or until - timedelta(days=7)
+    check_period(since, until)
+    rows = await analytics_repo.get_top_dishes(db, since, until, limit, restaurant_id)
+    return [
+        {"dish_id": dish_id, "restaurant_id": rid, "name": name, "quantity": quantity, "revenue": round(revenue, 2)}
+        for dish_id, rid, name, quantity, revenue in rows
+    ]
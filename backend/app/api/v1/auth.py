@@ -1,11 +1,11 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
 from fastapi.responses import JSONResponse
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.db.session import get_db
 from app.schemas.user import Token, UserCreate, UserLogin
-from app.db.repositories.users import get_user_by_email, create_user
-from app.core.security import create_access_token, verify_password
+from app.db.repositories.users import get_user_by_email, create_user, authenticate
+from app.core.security import create_access_token
 
 router = APIRouter(
     prefix="/auth",
@@ -36,21 +36,29 @@ router = APIRouter(
                     "example": {"detail": "Email already registered"}
                 }
             }
+        },
+        status.HTTP_429_TOO_MANY_REQUESTS: {
+            "description": "Сервис аутентификации перегружен",
+            "content": {
+                "application/json": {
+                    "example": {"detail": "Too many authentication requests"}
+                }
+            }
         }
     }
 )
-def register(user_data: UserCreate, db: Session = Depends(get_db)):
+async def register(user_data: UserCreate, db: AsyncSession = Depends(get_db)):
     """
     Регистрация пользователя с обязательными полями:
     - email: valid email address
     - password: пароль длиной не менее 6 символов
     """
-    if get_user_by_email(db, user_data.email):
+    if await get_user_by_email(db, user_data.email):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Email already registered"
         )
-    user = create_user(db, user_data.email, user_data.password)
+    user = await create_user(db, user_data.email, user_data.password)
     access_token = create_access_token(data={"sub": user.email})
     return {"access_token": access_token, "token_type": "bearer"}
 
@@ -79,6 +87,14 @@ def register(user_data: UserCreate, db: Session = Depends(get_db)):
                 }
             }
         },
+        status.HTTP_429_TOO_MANY_REQUESTS: {
+            "description": "Сервис аутентификации перегружен",
+            "content": {
+                "application/json": {
+                    "example": {"detail": "Too many authentication requests"}
+                }
+            }
+        },
         status.HTTP_422_UNPROCESSABLE_ENTITY: {
             "description": "Ошибка валидации данных",
             "content": {
@@ -97,16 +113,16 @@ def register(user_data: UserCreate, db: Session = Depends(get_db)):
         }
     }
 )
-def login(
+async def login(
     form_data: OAuth2PasswordRequestForm = Depends(),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Аутентификация пользователя по email и паролю.
     Возвращает JWT-токен для доступа к защищенным эндпоинтам.
     """
-    user = get_user_by_email(db, form_data.username)
-    if not user or not verify_password(form_data.password, user.password):
+    user = await authenticate(db, form_data.username, form_data.password)
+    if not user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Incorrect email or password"
@@ -1,8 +1,14 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Path
 from fastapi.responses import JSONResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.db_metrics import query_budget
+from app.db.session import get_db
+from app.schemas.cart import CartItemsUpdate, CartView
 from app.services.cart import CartService
-from app.core.security import get_current_user
-from typing import Dict, Any
+from app.services.dishes import get_dishes, get_priced_cart
+from app.services.auth import get_current_user
+from app.services.idempotency import IdempotentRequest, idempotent_request
+from typing import Dict, Any, Iterable
 
 router = APIRouter(
     prefix="/cart",
@@ -16,8 +22,21 @@ router = APIRouter(
 )
 
 
+async def ensure_dishes_exist(db: AsyncSession, dish_ids: Iterable[int]):
+    """Проверка блюд через кэш каталога; 404, если какого-то нет"""
+    dish_ids = list(dish_ids)
+    dishes = await get_dishes(db, dish_ids)
+    missing = [dish_id for dish_id in dish_ids if dish_id not in dishes]
+    if missing:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Dish not found: {', '.join(map(str, missing))}"
+        )
+
+
 @router.post(
     "/add/{dish_id}/{quantity}",
+    dependencies=[Depends(query_budget(3))],
     summary="Добавить блюдо в корзину",
     description="Добавляет указанное количество блюда в корзину пользователя",
     responses={
@@ -32,13 +51,23 @@ router = APIRouter(
         status.HTTP_404_NOT_FOUND: {
             "description": "Блюдо не найдено",
             "content": {"application/json": {"example": {"detail": "Dish not found"}}}
+        },
+        status.HTTP_409_CONFLICT: {
+            "description": "Запрос с этим Idempotency-Key еще выполняется",
+            "content": {"application/json": {"example": {"detail": "Request with this Idempotency-Key is in progress"}}}
+        },
+        status.HTTP_422_UNPROCESSABLE_ENTITY: {
+            "description": "Idempotency-Key использован с другим запросом",
+            "content": {"application/json": {"example": {"detail": "Idempotency-Key was used with a different request"}}}
         }
     }
 )
-def add_to_cart(
+async def add_to_cart(
         dish_id: int = Path(..., title="ID блюда", example=1, gt=0),
         quantity: int = Path(..., title="Количество", example=2, gt=0),
-        user: Dict[str, Any] = Depends(get_current_user)
+        db: AsyncSession = Depends(get_db),
+        user: Dict[str, Any] = Depends(get_current_user),
+        idempotency: IdempotentRequest = Depends(idempotent_request)
 ):
     """
     Добавляет блюдо в корзину пользователя.
@@ -47,21 +76,27 @@ def add_to_cart(
     - dish_id: ID блюда из меню (должен быть > 0)
     - quantity: Количество порций (должно быть > 0)
 
+    Существование блюда проверяется по кэшу каталога. С заголовком
+    Idempotency-Key повтор запроса не увеличивает количество повторно.
     Требуется авторизация.
     """
-    try:
-        CartService.add_to_cart(user["id"], dish_id, quantity)
-        return {"message": "Dish added to cart"}
-    except ValueError as e:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=str(e)
-        )
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=str(e)
-        )
+    async def add():
+        await ensure_dishes_exist(db, [dish_id])
+        try:
+            await CartService.add_to_cart(user["id"], dish_id, quantity)
+            return {"message": "Dish added to cart"}
+        except ValueError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(e)
+            )
+        except Exception as e:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=str(e)
+            )
+
+    return await idempotency.run(add)
 
 
 @router.get(
@@ -76,7 +111,7 @@ def add_to_cart(
         }
     }
 )
-def view_cart(
+async def view_cart(
         user: Dict[str, Any] = Depends(get_current_user)
 ):
     """
@@ -88,4 +123,188 @@ def view_cart(
 
     Требуется авторизация.
     """
-    return CartService.get_cart(user["id"])
\ No newline at end of file
+    return await CartService.get_cart(user["id"])
+
+
+@router.get(
+    "/details",
+    dependencies=[Depends(query_budget(2))],
+    summary="Корзина с ценами",
+    description="Возвращает позиции корзины с названиями, ценами и итоговой суммой",
+    response_model=CartView,
+    responses={
+        status.HTTP_200_OK: {
+            "description": "Корзина с ценами",
+            "content": {
+                "application/json": {
+                    "example": {
+                        "items": [
+                            {
+                                "dish_id": 1,
+                                "restaurant_id": 1,
+                                "name": "Whopper",
+                                "price": 5.99,
+                                "quantity": 2,
+                                "line_total": 11.98
+                            }
+                        ],
+                        "unavailable": [],
+                        "total": 11.98
+                    }
+                }
+            }
+        }
+    }
+)
+async def view_cart_details(
+        db: AsyncSession = Depends(get_db),
+        user: Dict[str, Any] = Depends(get_current_user)
+):
+    """
+    Корзина с данными блюд, рассчитанная на сервере.
+
+    Блюда читаются из кэша каталога одним MGET, промахи дозагружаются
+    одним запросом к БД. Блюда, которых больше нет, перечислены в unavailable.
+
+    Требуется авторизация.
+    """
+    cart = await CartService.get_cart(user["id"])
+    return await get_priced_cart(db, cart)
+
+
+@router.put(
+    "/items",
+    summary="Задать количество нескольких блюд",
+    description="Устанавливает количество для нескольких блюд за один запрос",
+    response_model=Dict[int, int],
+    responses={
+        status.HTTP_200_OK: {
+            "description": "Содержимое корзины после изменения",
+            "content": {"application/json": {"example": {1: 2}}}
+        },
+        status.HTTP_404_NOT_FOUND: {
+            "description": "Блюдо не найдено",
+            "content": {"application/json": {"example": {"detail": "Dish not found: 1"}}}
+        }
+    }
+)
+async def set_cart_items(
+        update: CartItemsUpdate,
+        db: AsyncSession = Depends(get_db),
+        user: Dict[str, Any] = Depends(get_current_user)
+):
+    """
+    Пакетное изменение корзины.
+
+    Принимает {"items": {dish_id: quantity}}; количество 0 удаляет блюдо.
+    Все изменения применяются атомарно одним скриптом в Redis.
+
+    Требуется авторизация.
+    """
+    await ensure_dishes_exist(db, [dish_id for dish_id, quantity in update.items.items() if quantity > 0])
+    await CartService.set_items(user["id"], update.items)
+    return await CartService.get_cart(user["id"])
+
+
+@router.put(
+    "/set/{dish_id}/{quantity}",
+    summary="Задать количество блюда",
+    description="Устанавливает количество блюда в корзине; 0 удаляет блюдо",
+    responses={
+        status.HTTP_200_OK: {
+            "description": "Количество обновлено",
+            "content": {"application/json": {"example": {"message": "Cart updated"}}}
+        },
+        status.HTTP_404_NOT_FOUND: {
+            "description": "Блюдо не найдено",
+            "content": {"application/json": {"example": {"detail": "Dish not found: 1"}}}
+        }
+    }
+)
+async def set_quantity(
+        dish_id: int = Path(..., title="ID блюда", example=1, gt=0),
+        quantity: int = Path(..., title="Количество", example=2, ge=0),
+        db: AsyncSession = Depends(get_db),
+        user: Dict[str, Any] = Depends(get_current_user)
+):
+    """
+    Установка количества порций блюда в корзине.
+
+    Требуется авторизация.
+    """
+    if quantity > 0:
+        await ensure_dishes_exist(db, [dish_id])
+    await CartService.set_items(user["id"], {dish_id: quantity})
+    return {"message": "Cart updated"}
+
+
+@router.post(
+    "/decrement/{dish_id}/{quantity}",
+    summary="Уменьшить количество блюда",
+    description="Уменьшает количество блюда; при нуле блюдо удаляется из корзины",
+    responses={
+        status.HTTP_200_OK: {
+            "description": "Количество обновлено",
+            "content": {"application/json": {"example": {"message": "Cart updated"}}}
+        }
+    }
+)
+async def decrement_item(
+        dish_id: int = Path(..., title="ID блюда", example=1, gt=0),
+        quantity: int = Path(..., title="Количество", example=1, gt=0),
+        user: Dict[str, Any] = Depends(get_current_user)
+):
+    """
+    Уменьшение количества порций блюда.
+
+    Требуется авторизация.
+    """
+    await CartService.add_items(user["id"], {dish_id: -quantity})
+    return {"message": "Cart updated"}
+
+
+@router.delete(
+    "/remove/{dish_id}",
+    summary="Удалить блюдо из корзины",
+    description="Удаляет блюдо из корзины пользователя",
+    responses={
+        status.HTTP_200_OK: {
+            "description": "Блюдо удалено",
+            "content": {"application/json": {"example": {"message": "Dish removed from cart"}}}
+        }
+    }
+)
+async def remove_item(
+        dish_id: int = Path(..., title="ID блюда", example=1, gt=0),
+        user: Dict[str, Any] = Depends(get_current_user)
+):
+    """
+    Удаление блюда из корзины.
+
+    Требуется авторизация.
+    """
+    await CartService.remove_item(user["id"], dish_id)
+    return {"message": "Dish removed from cart"}
+
+
+@router.delete(
+    "",
+    summary="Очистить корзину",
+    description="Удаляет все блюда из корзины пользователя",
+    responses={
+        status.HTTP_200_OK: {
+            "description": "Корзина очищена",
+            "content": {"application/json": {"example": {"message": "Cart cleared"}}}
+        }
+    }
+)
+async def clear_cart(
+        user: Dict[str, Any] = Depends(get_current_user)
+):
+    """
+    Очистка корзины.
+
+    Требуется авторизация.
+    """
+    await CartService.clear_cart(user["id"])
+    return {"message": "Cart cleared"}
\ No newline at end of file
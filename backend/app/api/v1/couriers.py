@@ -1,9 +1,17 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Path
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, status, Path, Query
+from fastapi.responses import ORJSONResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.db_metrics import query_budget
 from app.db.session import get_db
-from app.db.models.order import Order
-from app.core.security import get_current_user
-from typing import List, Dict, Any
+from app.db.repositories.orders import assign_courier, order_exists
+from app.core.config import settings
+from app.core.pagination import PageParams
+from app.schemas.courier import CourierLocation, CourierOrder
+from app.schemas.pagination import Page
+from app.services.auth import get_current_user
+from app.services.couriers import CourierLocationService, get_courier_feed
+from app.services.idempotency import IdempotentRequest, idempotent_request
+from typing import Optional
 
 router = APIRouter(
     prefix="/couriers",
@@ -19,23 +27,37 @@ router = APIRouter(
 
 @router.get(
     "/orders",
+    dependencies=[Depends(query_budget(4))],
     summary="Получить доступные заказы",
-    description="Возвращает список заказов со статусом 'paid', доступных для доставки",
-    response_model=List[Dict[str, Any]],
+    description="Возвращает страницу заказов со статусом 'paid' или 'cooking', ближайшие к курьеру первыми",
+    response_model=Page[CourierOrder],
     responses={
         status.HTTP_200_OK: {
             "description": "Список доступных заказов",
             "content": {
                 "application/json": {
-                    "example": [
-                        {
-                            "id": 1,
-                            "user_id": 5,
-                            "status": "paid",
-                            "total": 25.99,
-                            "created_at": "2023-01-01T12:00:00"
-                        }
-                    ]
+                    "example": {
+                        "items": [
+                            {
+                                "id": 1,
+                                "user_id": 5,
+                                "restaurant_id": 2,
+                                "status": "paid",
+                                "total": 25.99,
+                                "created_at": "2023-01-01T12:00:00",
+                                "distance_km": 1.25
+                            }
+                        ],
+                        "next_cursor": "eyJkIjoxLjI1LCJyaWQiOjIsImlkIjoxfQ"
+                    }
+                }
+            }
+        },
+        status.HTTP_400_BAD_REQUEST: {
+            "description": "Некорректный курсор",
+            "content": {
+                "application/json": {
+                    "example": {"detail": "Invalid cursor"}
                 }
             }
         },
@@ -49,15 +71,86 @@ router = APIRouter(
         }
     }
 )
-def get_available_orders(
-        db: Session = Depends(get_db),
+async def get_available_orders(
+        page: PageParams = Depends(),
+        lat: Optional[float] = Query(None, ge=-90, le=90, description="Широта курьера"),
+        lon: Optional[float] = Query(None, ge=-180, le=180, description="Долгота курьера"),
+        radius: float = Query(
+            settings.COURIER_FEED_RADIUS_KM, gt=0, le=settings.GEO_MAX_RADIUS_KM,
+            description="Радиус поиска ресторанов, км"
+        ),
+        db: AsyncSession = Depends(get_db),
         user: dict = Depends(get_current_user)
 ):
     """
     Получение списка заказов, готовых к доставке.
 
     Доступно только для пользователей с ролью 'courier'.
-    Возвращает заказы со статусом 'paid'.
+    Возвращает заказы со статусом 'paid' или 'cooking', отсортированные по расстоянию
+    от курьера до ресторана. Позиция берется из lat/lon или из последнего
+    значения, переданного в POST /couriers/location; без позиции заказы
+    отдаются в порядке создания.
+    """
+    if user["role"] != "courier":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only for couriers"
+        )
+
+    if lat is not None and lon is not None:
+        position = (lat, lon)
+    else:
+        position = await CourierLocationService.get_location(user["id"])
+
+    try:
+        return ORJSONResponse(await get_courier_feed(db, page, position, radius))
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+
+@router.post(
+    "/location",
+    summary="Обновить местоположение курьера",
+    description="Сохраняет текущие координаты курьера для сортировки ленты заказов",
+    responses={
+        status.HTTP_200_OK: {
+            "description": "Местоположение обновлено",
+            "content": {
+                "application/json": {
+                    "example": {"message": "Location updated"}
+                }
+            }
+        },
+        status.HTTP_403_FORBIDDEN: {
+            "description": "Доступ запрещен",
+            "content": {
+                "application/json": {
+                    "example": {"detail": "Only for couriers"}
+                }
+            }
+        },
+        status.HTTP_503_SERVICE_UNAVAILABLE: {
+            "description": "Хранилище местоположений недоступно",
+            "content": {
+                "application/json": {
+                    "example": {"detail": "Location storage is unavailable"}
+                }
+            }
+        }
+    }
+)
+async def update_location(
+        location: CourierLocation,
+        user: dict = Depends(get_current_user)
+):
+    """
+    Обновление местоположения курьера.
+
+    Координаты хранятся в Redis с ограниченным сроком жизни.
+    Доступно только для пользователей с ролью 'courier'.
     """
     if user["role"] != "courier":
         raise HTTPException(
@@ -65,12 +158,18 @@ def get_available_orders(
             detail="Only for couriers"
         )
 
-    orders = db.query(Order).filter(Order.status == "paid").all()
-    return orders
+    if not await CourierLocationService.set_location(user["id"], location.lat, location.lon):
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Location storage is unavailable",
+            headers={"Retry-After": "1"},
+        )
+    return {"message": "Location updated"}
 
 
 @router.post(
     "/orders/{order_id}/accept",
+    dependencies=[Depends(query_budget(4))],
     summary="Принять заказ на доставку",
     description="Позволяет курьеру принять заказ на доставку",
     responses={
@@ -97,13 +196,30 @@ def get_available_orders(
                     "example": {"detail": "Order not found"}
                 }
             }
+        },
+        status.HTTP_409_CONFLICT: {
+            "description": "Заказ уже принят или недоступен, либо запрос с этим Idempotency-Key еще выполняется",
+            "content": {
+                "application/json": {
+                    "example": {"detail": "Order is not available"}
+                }
+            }
+        },
+        status.HTTP_422_UNPROCESSABLE_ENTITY: {
+            "description": "Idempotency-Key использован с другим запросом",
+            "content": {
+                "application/json": {
+                    "example": {"detail": "Idempotency-Key was used with a different request"}
+                }
+            }
         }
     }
 )
-def accept_order(
+async def accept_order(
         order_id: int = Path(..., title="ID заказа", example=1, gt=0),
-        db: Session = Depends(get_db),
-        user: dict = Depends(get_current_user)
+        db: AsyncSession = Depends(get_db),
+        user: dict = Depends(get_current_user),
+        idempotency: IdempotentRequest = Depends(idempotent_request)
 ):
     """
     Принятие заказа на доставку курьером.
@@ -112,7 +228,12 @@ def accept_order(
     - order_id: ID заказа (должен быть > 0)
 
     Доступно только для пользователей с ролью 'courier'.
-    Меняет статус заказа на 'delivering' и устанавливает courier_id.
+    Меняет статус заказа на 'delivering' и устанавливает courier_id одним
+    условным UPDATE: принять можно только заказ в статусе 'paid' или
+    'cooking', из нескольких курьеров заказ получает один, остальные
+    получают 409.
+    Повтор с тем же Idempotency-Key возвращает ответ первого запроса,
+    а не 409.
     """
     if user["role"] != "courier":
         raise HTTPException(
@@ -120,14 +241,17 @@ def accept_order(
             detail="Only for couriers"
         )
 
-    order = db.query(Order).get(order_id)
-    if not order:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Order not found"
-        )
+    async def accept():
+        if await assign_courier(db, order_id, user["id"]) is None:
+            if not await order_exists(db, order_id):
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="Order not found"
+                )
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Order is not available"
+            )
+        return {"message": "Order accepted"}
 
-    order.status = "delivering"
-    order.courier_id = user["id"]
-    db.commit()
-    return {"message": "Order accepted"}
\ No newline at end of file
+    return await idempotency.run(accept)
\ No newline at end of file
@@ -1,10 +1,25 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+import asyncio
+from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, Path, Query, WebSocket, WebSocketDisconnect, status
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.db_metrics import query_budget
+from app.core.config import settings
+from app.core.pagination import PageParams, make_page
 from app.db.session import get_db
-from app.db.models.order import Order, OrderItem
+from app.db.repositories.orders import (
+    create_order_from_cart, get_order, get_order_details, get_order_with_last_change, get_status_history,
+    get_user_orders
+)
+from app.schemas.order import (
+    OrderInDB, OrderPage, OrderStatusBulkResult, OrderStatusBulkUpdate, OrderStatusHistoryEntry, OrderStatusUpdate
+)
 from app.services.cart import CartService
-from app.core.security import get_current_user
-from typing import Dict
+from app.services.auth import get_current_user
+from app.services.idempotency import IdempotentRequest, idempotent_request
+from app.services.order_events import encode_event, order_event_broker, order_event_stream
+from app.services.orders import OrderLifecycle
+from typing import Dict, List
 
 router = APIRouter(
     prefix="/orders",
@@ -20,6 +35,7 @@ router = APIRouter(
 
 @router.post(
     "/create",
+    dependencies=[Depends(query_budget(6))],
     status_code=status.HTTP_201_CREATED,
     summary="Создать новый заказ",
     description="Создает заказ из товаров в корзине пользователя и очищает корзину",
@@ -28,7 +44,7 @@ router = APIRouter(
             "description": "Заказ успешно создан",
             "content": {
                 "application/json": {
-                    "example": {"order_id": 5, "message": "Order created successfully"}
+                    "example": {"order_id": 5, "total": 25.99, "message": "Order created successfully"}
                 }
             }
         },
@@ -47,58 +63,398 @@ router = APIRouter(
                     "example": {"detail": "Dish not found"}
                 }
             }
+        },
+        status.HTTP_409_CONFLICT: {
+            "description": "Запрос с этим Idempotency-Key еще выполняется",
+            "content": {
+                "application/json": {
+                    "example": {"detail": "Request with this Idempotency-Key is in progress"}
+                }
+            }
+        },
+        status.HTTP_422_UNPROCESSABLE_ENTITY: {
+            "description": "Idempotency-Key использован с другим запросом",
+            "content": {
+                "application/json": {
+                    "example": {"detail": "Idempotency-Key was used with a different request"}
+                }
+            }
         }
     }
 )
-def create_order(
-        db: Session = Depends(get_db),
-        user: Dict = Depends(get_current_user)
+async def create_order(
+        db: AsyncSession = Depends(get_db),
+        user: Dict = Depends(get_current_user),
+        idempotency: IdempotentRequest = Depends(idempotent_request)
 ):
     """
     Создание заказа из текущего содержимого корзины.
 
     Процесс:
-    1. Проверяет наличие товаров в корзине
-    2. Создает новый заказ со статусом 'created'
-    3. Переносит все позиции из корзины в заказ
-    4. Очищает корзину
-    5. Возвращает ID созданного заказа
+    1. Атомарно забирает содержимое корзины (чтение и удаление)
+    2. Загружает цены всех блюд корзины одним запросом
+    3. В одной транзакции создает заказ со статусом 'created' и суммой,
+       переносит позиции с ценой на момент заказа
+    4. При ошибке возвращает позиции в корзину
+    5. Возвращает ID и сумму созданного заказа
+
+    С заголовком Idempotency-Key повтор запроса не создает новый заказ,
+    а возвращает ответ первого (заголовок Idempotent-Replayed: true).
 
     Требуется авторизация.
     """
-    cart = CartService.get_cart(user["id"])
-    if not cart:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Cart is empty"
-        )
-
-    try:
-        # Создаем заказ
-        order = Order(user_id=user["id"], status="created")
-        db.add(order)
-        db.commit()
-
-        # Добавляем позиции
-        for dish_id, quantity in cart.items():
-            item = OrderItem(
-                order_id=order.id,
-                dish_id=int(dish_id),
-                quantity=int(quantity)
+    async def create():
+        cart = await CartService.checkout_snapshot(user["id"])
+        if not cart:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Cart is empty"
             )
-            db.add(item)
 
-        db.commit()
-        CartService.clear_cart(user["id"])
+        try:
+            order = await create_order_from_cart(db, user["id"], cart)
+        except ValueError as e:
+            await CartService.add_items(user["id"], cart)
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=str(e)
+            )
+        except Exception:
+            await CartService.add_items(user["id"], cart)
+            raise
 
         return {
             "order_id": order.id,
+            "total": order.total,
             "message": "Order created successfully"
         }
 
-    except Exception as e:
-        db.rollback()
+    return await idempotency.run(create)
+
+
+def check_order_access(order, user: Dict):
+    """Заказ виден владельцу, назначенному курьеру и администратору"""
+    if order is None or (
+        user["role"] != "admin" and user["id"] not in (order.user_id, order.courier_id)
+    ):
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
-            detail=str(e)
-        )
\ No newline at end of file
+            detail="Order not found"
+        )
+
+
+async def subscribe_order_events(db: AsyncSession, order_id: int, user: Dict):
+    """
+    Подписка на события заказа и его текущее состояние.
+
+    Подписка оформляется до чтения статуса, чтобы не потерять смену
+    статуса между ними. "at" состояния - время последней смены статуса:
+    события, успевшие прийти в очередь, но не новее него, поток
+    отбрасывает. Соединение с БД освобождается сразу после чтения: поток
+    может жить долго.
+    """
+    queue = await order_event_broker.subscribe(order_id)
+    try:
+        found = await get_order_with_last_change(db, order_id)
+        await db.close()
+        order, last_change = found if found is not None else (None, None)
+        check_order_access(order, user)
+    except BaseException:
+        await order_event_broker.unsubscribe(order_id, queue)
+        raise
+    return queue, {"order_id": order.id, "status": order.status, "at": last_change or order.created_at}
+
+
+@router.get(
+    "/{order_id}/events",
+    summary="Поток статусов заказа (SSE)",
+    description="Server-Sent Events: текущий статус заказа, затем каждое его изменение",
+    responses={
+        status.HTTP_200_OK: {
+            "description": "Поток событий",
+            "content": {
+                "text/event-stream": {
+                    "example": 'event: status\ndata: {"order_id": 5, "status": "delivering", "at": "2023-06-01T12:00:00+00:00"}\n\n'
+                }
+            }
+        },
+        status.HTTP_404_NOT_FOUND: {
+            "description": "Заказ не найден",
+            "content": {"application/json": {"example": {"detail": "Order not found"}}}
+        }
+    }
+)
+async def order_events(
+        order_id: int,
+        db: AsyncSession = Depends(get_db),
+        user: Dict = Depends(get_current_user)
+):
+    """
+    Подписка на изменения статуса заказа вместо периодического опроса.
+
+    - Первое событие - текущий статус заказа
+    - При отсутствии событий каждые ORDER_EVENTS_HEARTBEAT секунд
+      отправляется комментарий-пинг
+    - Поток закрывается после статуса delivered или canceled
+
+    Требуется авторизация.
+    """
+    queue, snapshot = await subscribe_order_events(db, order_id, user)
+
+    async def stream():
+        try:
+            async for event in order_event_stream(queue, snapshot, settings.ORDER_EVENTS_HEARTBEAT):
+                if event is None:
+                    yield ": ping\n\n"
+                else:
+                    yield f"event: status\ndata: {encode_event(event)}\n\n"
+        finally:
+            await order_event_broker.unsubscribe(order_id, queue)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.websocket("/{order_id}/events")
+async def order_events_ws(
+        websocket: WebSocket,
+        order_id: int,
+        token: str = Query(..., description="JWT-токен доступа"),
+        db: AsyncSession = Depends(get_db)
+):
+    """
+    Поток статусов заказа через WebSocket.
+
+    Токен передается параметром запроса (браузерный WebSocket не
+    позволяет задать заголовок Authorization). Сообщения - JSON:
+    {"type": "status", ...} и {"type": "ping"}.
+    """
+    try:
+        user = await get_current_user(token, db)
+        queue, snapshot = await subscribe_order_events(db, order_id, user)
+    except HTTPException as e:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason=str(e.detail))
+        return
+    await websocket.accept()
+
+    async def send_events():
+        async for event in order_event_stream(queue, snapshot, settings.ORDER_EVENTS_HEARTBEAT):
+            if event is None:
+                await websocket.send_json({"type": "ping"})
+            else:
+                await websocket.send_text(encode_event({"type": "status", **event}))
+        await websocket.close()
+
+    async def wait_disconnect():
+        try:
+            while True:
+                await websocket.receive_text()
+        except WebSocketDisconnect:
+            pass
+
+    tasks = [asyncio.create_task(send_events()), asyncio.create_task(wait_disconnect())]
+    try:
+        await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await order_event_broker.unsubscribe(order_id, queue)
+
+
+@router.patch(
+    "/{order_id}/status",
+    dependencies=[Depends(query_budget(5))],
+    summary="Изменить статус заказа",
+    description="Переводит заказ в новый статус, если переход допустим",
+    responses={
+        status.HTTP_200_OK: {
+            "description": "Статус изменен",
+            "content": {
+                "application/json": {
+                    "example": {"order_id": 5, "from_status": "paid", "status": "cooking"}
+                }
+            }
+        },
+        status.HTTP_403_FORBIDDEN: {
+            "description": "Роль не может выставить этот статус",
+            "content": {"application/json": {"example": {"detail": "Not allowed to set status 'cooking'"}}}
+        },
+        status.HTTP_404_NOT_FOUND: {
+            "description": "Заказ не найден или недоступен пользователю",
+            "content": {"application/json": {"example": {"detail": "Order not found"}}}
+        },
+        status.HTTP_409_CONFLICT: {
+            "description": "Переход недопустим из текущего статуса",
+            "content": {"application/json": {"example": {"detail": "Cannot change order status to 'cooking'"}}}
+        }
+    }
+)
+async def change_order_status(
+        data: OrderStatusUpdate,
+        order_id: int = Path(..., title="ID заказа", example=1, gt=0),
+        db: AsyncSession = Depends(get_db),
+        user: Dict = Depends(get_current_user)
+):
+    """
+    Смена статуса заказа.
+
+    Допустимые переходы:
+    - created -> paid, canceled
+    - paid -> cooking, canceled (в delivering - принятием курьером)
+    - cooking -> canceled (в delivering - принятием курьером)
+    - delivering -> delivered (фиксируется delivered_at)
+
+    Покупатель может отменить свой заказ до оплаты, курьер - завершить
+    свою доставку, администратор - выполнить любой допустимый переход.
+    """
+    from_status = await OrderLifecycle.change_status(db, order_id, data.status, user)
+    return {"order_id": order_id, "from_status": from_status, "status": data.status}
+
+
+@router.post(
+    "/status/bulk",
+    dependencies=[Depends(query_budget(6))],
+    response_model=OrderStatusBulkResult,
+    summary="Изменить статус пачки заказов",
+    description="Переводит до 1000 заказов в новый статус одним запросом (только для администраторов)",
+    responses={
+        status.HTTP_403_FORBIDDEN: {
+            "description": "Доступ запрещен",
+            "content": {"application/json": {"example": {"detail": "Only for admins"}}}
+        }
+    }
+)
+async def change_orders_status(
+        data: OrderStatusBulkUpdate,
+        db: AsyncSession = Depends(get_db),
+        user: Dict = Depends(get_current_user)
+):
+    """
+    Массовая смена статуса.
+
+    Заказы, для которых переход недопустим, пропускаются и возвращаются
+    в skipped.
+    """
+    if user["role"] != "admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only for admins"
+        )
+    updated = await OrderLifecycle.change_status_many(db, data.order_ids, data.status, user)
+    skipped = sorted(set(data.order_ids) - set(updated))
+    return {"updated": updated, "skipped": skipped}
+
+
+@router.get(
+    "/{order_id}/history",
+    dependencies=[Depends(query_budget(3))],
+    response_model=List[OrderStatusHistoryEntry],
+    summary="История статусов заказа",
+    description="Возвращает все переходы статуса заказа в порядке их выполнения",
+    responses={
+        status.HTTP_404_NOT_FOUND: {
+            "description": "Заказ не найден",
+            "content": {"application/json": {"example": {"detail": "Order not found"}}}
+        }
+    }
+)
+async def order_history(
+        order_id: int = Path(..., title="ID заказа", example=1, gt=0),
+        db: AsyncSession = Depends(get_db),
+        user: Dict = Depends(get_current_user)
+):
+    check_order_access(await get_order(db, order_id), user)
+    return await get_status_history(db, order_id)
+
+
+ORDER_EXAMPLE = {
+    "id": 5,
+    "status": "delivered",
+    "total": 25.99,
+    "restaurant_id": 1,
+    "courier_id": 3,
+    "created_at": "2023-06-01T12:00:00+00:00",
+    "delivered_at": "2023-06-01T12:40:00+00:00",
+    "items": [
+        {"dish_id": 1, "dish_name": "Пицца Маргарита", "quantity": 2, "price_at_order": 12.99}
+    ]
+}
+
+
+@router.get(
+    "",
+    dependencies=[Depends(query_budget(4))],
+    response_model=OrderPage,
+    summary="История заказов",
+    description="Возвращает заказы текущего пользователя, новые первыми, с позициями",
+    responses={
+        status.HTTP_200_OK: {
+            "description": "Страница заказов",
+            "content": {
+                "application/json": {
+                    "example": {"items": [ORDER_EXAMPLE], "next_cursor": "eyJ0IjoiMjAyMy0wNi0wMVQxMjowMDowMCswMDowMCIsImlkIjo1fQ"}
+                }
+            }
+        },
+        status.HTTP_400_BAD_REQUEST: {
+            "description": "Некорректный курсор",
+            "content": {"application/json": {"example": {"detail": "Invalid cursor"}}}
+        }
+    }
+)
+async def list_orders(
+        page: PageParams = Depends(),
+        db: AsyncSession = Depends(get_db),
+        user: Dict = Depends(get_current_user)
+):
+    """
+    Список заказов пользователя с keyset-пагинацией по (created_at, id).
+
+    Заказы, позиции и названия блюд загружаются тремя запросами на
+    страницу. Для следующей страницы передайте next_cursor в cursor.
+    """
+    before = None
+    if page.after:
+        try:
+            before = (datetime.fromisoformat(page.after["t"]), int(page.after["id"]))
+        except (KeyError, TypeError, ValueError):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid cursor"
+            )
+    orders = await get_user_orders(db, user["id"], before, page.limit + 1)
+    result = make_page(orders, page.limit, key=lambda order: {"t": order.created_at.isoformat(), "id": order.id})
+    result["items"] = OrderInDB.rows(result["items"])
+    return ORJSONResponse(result)
+
+
+@router.get(
+    "/{order_id}",
+    dependencies=[Depends(query_budget(4))],
+    response_model=OrderInDB,
+    summary="Детали заказа",
+    description="Возвращает заказ с позициями и названиями блюд",
+    responses={
+        status.HTTP_200_OK: {
+            "description": "Заказ",
+            "content": {"application/json": {"example": ORDER_EXAMPLE}}
+        },
+        status.HTTP_404_NOT_FOUND: {
+            "description": "Заказ не найден",
+            "content": {"application/json": {"example": {"detail": "Order not found"}}}
+        }
+    }
+)
+async def order_details(
+        order_id: int = Path(..., title="ID заказа", example=1, gt=0),
+        db: AsyncSession = Depends(get_db),
+        user: Dict = Depends(get_current_user)
+):
+    """Заказ доступен владельцу, назначенному курьеру и администратору"""
+    order = await get_order_details(db, order_id)
+    check_order_access(order, user)
+    return ORJSONResponse(OrderInDB.row(order))
@@ -0,0 +1,115 @@
+from fastapi import APIRouter, Depends, Query, Response, status
+from fastapi.responses import PlainTextResponse
+from app.core.profiling import profiler
+from app.schemas.profiling import ProfilingStatus, ProfilingUpdate
+from app.services.auth import get_admin_user
+from typing import Optional
+
+router = APIRouter(
+    prefix="/admin/profiling",
+    tags=["Profiling"],
+    responses={
+        status.HTTP_401_UNAUTHORIZED: {
+            "description": "Не авторизован",
+            "content": {"application/json": {"example": {"detail": "Not authenticated"}}}
+        },
+        status.HTTP_403_FORBIDDEN: {
+            "description": "Доступ запрещен",
+            "content": {"application/json": {"example": {"detail": "Forbidden"}}}
+        }
+    }
+)
+
+STATUS_EXAMPLE = {
+    "enabled": True,
+    "sample_rate": 0.05,
+    "interval": 0.005,
+    "routes": [{"route": "/api/v1/orders/create", "requests": 12, "samples": 187}]
+}
+
+
+@router.get(
+    "",
+    response_model=ProfilingStatus,
+    summary="Состояние профилировщика",
+    description="Режим и число профилированных запросов и стеков по маршрутам (только для администраторов)",
+    responses={
+        status.HTTP_200_OK: {
+            "description": "Состояние профилировщика",
+            "content": {"application/json": {"example": STATUS_EXAMPLE}}
+        }
+    }
+)
+async def profiling_status(admin: dict = Depends(get_admin_user)):
+    return profiler.status()
+
+
+@router.put(
+    "",
+    response_model=ProfilingStatus,
+    summary="Включить или выключить профилирование",
+    description="Изменение режима без перезапуска; действует на обработавший запрос процесс (только для администраторов)",
+    responses={
+        status.HTTP_200_OK: {
+            "description": "Новое состояние профилировщика",
+            "content": {"application/json": {"example": STATUS_EXAMPLE}}
+        },
+        status.HTTP_422_UNPROCESSABLE_ENTITY: {
+            "description": "Ошибка валидации данных",
+            "content": {
+                "application/json": {
+                    "example": {
+                        "detail": [
+                            {
+                                "loc": ["body", "sample_rate"],
+                                "msg": "ensure this value is less than or equal to 1",
+                                "type": "value_error.number.not_le"
+                            }
+                        ]
+                    }
+                }
+            }
+        }
+    }
+)
+async def update_profiling(update: ProfilingUpdate, admin: dict = Depends(get_admin_user)):
+    """
+    Собранные стеки при выключении сохраняются до сброса, поэтому
+    типичный сценарий: включить, дождаться всплеска, выключить, выгрузить.
+    """
+    profiler.configure(**update.dict(exclude_none=True))
+    return profiler.status()
+
+
+@router.get(
+    "/stacks",
+    response_class=PlainTextResponse,
+    summary="Выгрузить стеки",
+    description="Стеки в формате folded для flamegraph.pl и speedscope (только для администраторов)",
+    responses={
+        status.HTTP_200_OK: {
+            "description": "Строки 'кадр;кадр;кадр число_выборок'",
+            "content": {
+                "text/plain": {
+                    "example": "create_order (orders.py:82);run (idempotency.py:95);<await> 41\n"
+                }
+            }
+        }
+    }
+)
+async def profiling_stacks(
+        route: Optional[str] = Query(None, description="Шаблон маршрута; без него - все маршруты, маршрут в корне стека"),
+        admin: dict = Depends(get_admin_user)
+):
+    return profiler.folded(route)
+
+
+@router.delete(
+    "/stacks",
+    status_code=status.HTTP_204_NO_CONTENT,
+    summary="Сбросить стеки",
+    description="Удаляет собранные стеки и счетчики запросов (только для администраторов)"
+)
+async def reset_profiling_stacks(admin: dict = Depends(get_admin_user)):
+    profiler.reset()
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
@@ -1,10 +1,20 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Path
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status, Path, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.db_metrics import query_budget
 from app.db.session import get_db
-from app.db.models.restaurant import Restaurant, Dish
-from app.schemas.restaurant import RestaurantCreate, DishCreate
-from app.core.security import get_current_user
-from typing import List
+from app.db.repositories import restaurants as restaurants_repo
+from app.schemas.restaurant import (
+    RestaurantCreate, RestaurantInDB, RestaurantNearby, DishCreate, DishInDB, DishImportResult
+)
+from app.schemas.pagination import Page
+from app.core.pagination import PageParams, make_page
+from app.services.auth import get_current_user
+from app.services.catalogue import CatalogueCache
+from app.services.geo import restaurant_locator
+from app.services.menu_import import export_dishes, import_dishes, parse_csv, parse_ndjson
+from app.core.config import settings
+from typing import List, Literal, Optional
 
 router = APIRouter(
     prefix="/restaurants",
@@ -58,9 +68,9 @@ router = APIRouter(
         }
     }
 )
-def create_restaurant(
+async def create_restaurant(
         restaurant: RestaurantCreate,
-        db: Session = Depends(get_db),
+        db: AsyncSession = Depends(get_db),
         current_user: dict = Depends(get_current_user)
 ):
     """
@@ -77,9 +87,12 @@ def create_restaurant(
             detail="Only admin can create restaurants"
         )
 
-    db_restaurant = Restaurant(name=restaurant.name, location=restaurant.location)
-    db.add(db_restaurant)
-    db.commit()
+    lat, lon = restaurant.coordinates
+    db_restaurant = await restaurants_repo.create_restaurant(
+        db, restaurant.name, lat, lon, restaurant.description
+    )
+    await restaurant_locator.changed(db_restaurant)
+    await CatalogueCache.bump_version()
     return {
         "message": "Restaurant created",
         "restaurant_id": db_restaurant.id
@@ -88,19 +101,87 @@ def create_restaurant(
 
 @router.get(
     "/",
+    dependencies=[Depends(query_budget(2))],
     summary="Получить список ресторанов",
-    description="Возвращает список всех ресторанов с их основными данными",
-    response_model=List[RestaurantCreate],
+    description="Возвращает страницу ресторанов с их основными данными",
+    response_model=Page[RestaurantInDB],
     responses={
         status.HTTP_200_OK: {
             "description": "Список ресторанов",
+            "content": {
+                "application/json": {
+                    "example": {
+                        "items": [
+                            {
+                                "id": 1,
+                                "name": "Burger King",
+                                "description": None,
+                                "location_lat": 55.751244,
+                                "location_lon": 37.618423,
+                                "is_active": True
+                            }
+                        ],
+                        "next_cursor": "eyJpZCI6MX0"
+                    }
+                }
+            }
+        },
+        status.HTTP_400_BAD_REQUEST: {
+            "description": "Некорректный курсор",
+            "content": {"application/json": {"example": {"detail": "Invalid cursor"}}}
+        }
+    }
+)
+async def get_restaurants(
+        page: PageParams = Depends(),
+        is_active: Optional[bool] = Query(None, description="Фильтр по активности"),
+        name: Optional[str] = Query(None, description="Префикс названия"),
+        db: AsyncSession = Depends(get_db)
+):
+    """
+    Получение списка ресторанов с keyset-пагинацией по id.
+
+    Возвращает:
+    - ID ресторана
+    - Название
+    - Локацию (широта,долгота)
+
+    Для следующей страницы передайте next_cursor в параметре cursor.
+    Ответ отдается из кэша каталога в Redis, БД читается только при промахе.
+    """
+    async def load():
+        rows = await restaurants_repo.get_restaurants(
+            db, page.after_id, page.limit + 1, is_active, name
+        )
+        result = make_page(rows, page.limit)
+        result["items"] = RestaurantInDB.rows(result["items"])
+        return result
+
+    payload = await CatalogueCache.get_or_load(
+        f"restaurants:{page.cursor or ''}:{page.limit}:{is_active}:{name or ''}", load
+    )
+    return Response(content=payload, media_type="application/json")
+
+
+@router.get(
+    "/nearby",
+    summary="Рестораны рядом",
+    description="Возвращает активные рестораны в заданном радиусе, ближайшие первыми",
+    response_model=List[RestaurantNearby],
+    responses={
+        status.HTTP_200_OK: {
+            "description": "Рестораны, отсортированные по расстоянию",
             "content": {
                 "application/json": {
                     "example": [
                         {
                             "id": 1,
                             "name": "Burger King",
-                            "location": "55.751244,37.618423"
+                            "description": None,
+                            "location_lat": 55.751244,
+                            "location_lon": 37.618423,
+                            "is_active": True,
+                            "distance_km": 0.42
                         }
                     ]
                 }
@@ -108,16 +189,145 @@ def create_restaurant(
         }
     }
 )
-def get_restaurants(db: Session = Depends(get_db)):
+async def get_nearby_restaurants(
+        lat: float = Query(..., ge=-90, le=90, description="Широта"),
+        lon: float = Query(..., ge=-180, le=180, description="Долгота"),
+        radius: float = Query(3.0, gt=0, le=settings.GEO_MAX_RADIUS_KM, description="Радиус, км"),
+        limit: int = Query(20, ge=1, le=100),
+        db: AsyncSession = Depends(get_db)
+):
     """
-    Получение списка всех доступных ресторанов.
+    Поиск ресторанов рядом с точкой.
 
-    Возвращает:
-    - ID ресторана
-    - Название
-    - Локацию (широта,долгота)
+    Запрос обслуживается из пространственного индекса в памяти процесса,
+    БД читается только для дозагрузки новых ресторанов.
     """
-    return db.query(Restaurant).all()
+    return await restaurant_locator.nearby(db, lat, lon, radius, limit)
+
+
+@router.get(
+    "/{restaurant_id}/menu",
+    dependencies=[Depends(query_budget(3))],
+    summary="Получить меню ресторана",
+    description="Возвращает все блюда ресторана",
+    response_model=List[DishInDB],
+    responses={
+        status.HTTP_200_OK: {
+            "description": "Меню ресторана",
+            "content": {
+                "application/json": {
+                    "example": [
+                        {
+                            "id": 5,
+                            "restaurant_id": 1,
+                            "name": "Whopper",
+                            "description": "Фирменный бургер",
+                            "price": 5.99
+                        }
+                    ]
+                }
+            }
+        },
+        status.HTTP_404_NOT_FOUND: {
+            "description": "Ресторан не найден",
+            "content": {
+                "application/json": {
+                    "example": {"detail": "Restaurant not found"}
+                }
+            }
+        }
+    }
+)
+async def get_menu(
+        restaurant_id: int = Path(..., title="ID ресторана", example=1, gt=0),
+        db: AsyncSession = Depends(get_db)
+):
+    """
+    Получение меню ресторана.
+
+    Ответ отдается из кэша каталога в Redis, БД читается только при промахе.
+    """
+    async def load():
+        if not await restaurants_repo.get_restaurant(db, restaurant_id):
+            return None
+        return DishInDB.rows(await restaurants_repo.get_dishes(db, restaurant_id))
+
+    payload = await CatalogueCache.get_or_load(f"menu:{restaurant_id}", load)
+    if payload is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Restaurant not found"
+        )
+    return Response(content=payload, media_type="application/json")
+
+
+@router.get(
+    "/{restaurant_id}/dishes",
+    dependencies=[Depends(query_budget(3))],
+    summary="Получить блюда ресторана",
+    description="Возвращает страницу блюд ресторана",
+    response_model=Page[DishInDB],
+    responses={
+        status.HTTP_200_OK: {
+            "description": "Страница блюд",
+            "content": {
+                "application/json": {
+                    "example": {
+                        "items": [
+                            {
+                                "id": 5,
+                                "restaurant_id": 1,
+                                "name": "Whopper",
+                                "description": "Фирменный бургер",
+                                "price": 5.99
+                            }
+                        ],
+                        "next_cursor": "eyJpZCI6NX0"
+                    }
+                }
+            }
+        },
+        status.HTTP_400_BAD_REQUEST: {
+            "description": "Некорректный курсор",
+            "content": {"application/json": {"example": {"detail": "Invalid cursor"}}}
+        },
+        status.HTTP_404_NOT_FOUND: {
+            "description": "Ресторан не найден",
+            "content": {"application/json": {"example": {"detail": "Restaurant not found"}}}
+        }
+    }
+)
+async def get_dishes(
+        restaurant_id: int = Path(..., title="ID ресторана", example=1, gt=0),
+        page: PageParams = Depends(),
+        name: Optional[str] = Query(None, description="Префикс названия"),
+        db: AsyncSession = Depends(get_db)
+):
+    """
+    Получение блюд ресторана с keyset-пагинацией по id.
+
+    Для следующей страницы передайте next_cursor в параметре cursor.
+    Ответ отдается из кэша каталога в Redis, БД читается только при промахе.
+    """
+    async def load():
+        if not await restaurants_repo.get_restaurant(db, restaurant_id):
+            return None
+        rows = await restaurants_repo.get_dishes(
+            db, restaurant_id, page.after_id, page.limit + 1, name
+        )
+        result = make_page(rows, page.limit)
+        result["items"] = DishInDB.rows(result["items"])
+        return result
+
+    payload = await CatalogueCache.get_or_load(
+        f"dishes:{restaurant_id}:{page.cursor or ''}:{page.limit}:{name or ''}", load
+    )
+    if payload is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Restaurant not found"
+        )
+    return Response(content=payload, media_type="application/json")
 
 
 @router.post(
@@ -153,9 +363,9 @@ def get_restaurants(db: Session = Depends(get_db)):
         }
     }
 )
-def add_dish(
+async def add_dish(
         dish: DishCreate,
-        db: Session = Depends(get_db)
+        db: AsyncSession = Depends(get_db)
 ):
     """
     Добавление нового блюда в меню ресторана.
@@ -166,10 +376,118 @@ def add_dish(
     - description: Описание (опционально)
     - price: Цена (должна быть > 0)
     """
-    db_dish = Dish(**dish.dict())
-    db.add(db_dish)
-    db.commit()
+    db_dish = await restaurants_repo.create_dish(db, dish.dict())
+    await CatalogueCache.bump_version()
     return {
         "message": "Dish added",
         "dish_id": db_dish.id
-    }
\ No newline at end of file
+    }
+
+
+IMPORT_CONTENT_TYPES = {"text/csv": parse_csv, "application/x-ndjson": parse_ndjson}
+EXPORT_MEDIA_TYPES = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+
+
+@router.post(
+    "/{restaurant_id}/dishes/import",
+    response_model=DishImportResult,
+    summary="Импорт меню",
+    description="Потоковый импорт блюд из CSV или NDJSON с обновлением существующих по названию (только для администраторов)",
+    responses={
+        status.HTTP_200_OK: {
+            "description": "Результат импорта",
+            "content": {
+                "application/json": {
+                    "example": {
+                        "inserted": 398,
+                        "updated": 1,
+                        "errors": [{"line": 17, "error": "price: ensure this value is greater than 0"}]
+                    }
+                }
+            }
+        },
+        status.HTTP_403_FORBIDDEN: {
+            "description": "Доступ запрещен",
+            "content": {"application/json": {"example": {"detail": "Forbidden"}}}
+        },
+        status.HTTP_404_NOT_FOUND: {
+            "description": "Ресторан не найден",
+            "content": {"application/json": {"example": {"detail": "Restaurant not found"}}}
+        },
+        status.HTTP_415_UNSUPPORTED_MEDIA_TYPE: {
+            "description": "Неподдерживаемый формат",
+            "content": {"application/json": {"example": {"detail": "Use text/csv or application/x-ndjson"}}}
+        }
+    }
+)
+async def import_menu(
+        request: Request,
+        restaurant_id: int = Path(..., title="ID ресторана", example=1, gt=0),
+        db: AsyncSession = Depends(get_db),
+        current_user: dict = Depends(get_current_user)
+):
+    """
+    Импорт меню ресторана.
+
+    Тело запроса - CSV с заголовком (name, price, description) при
+    Content-Type: text/csv или по JSON-объекту на строку при
+    Content-Type: application/x-ndjson. Тело разбирается по мере
+    получения, строки записываются пачками одним upsert по
+    (restaurant_id, name): новые блюда добавляются, у существующих
+    обновляются цена и описание. Некорректные строки пропускаются и
+    перечисляются в errors с номерами строк.
+    """
+    if current_user["role"] != "admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Forbidden"
+        )
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    parser = IMPORT_CONTENT_TYPES.get(content_type)
+    if parser is None:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="Use text/csv or application/x-ndjson"
+        )
+    if await restaurants_repo.get_restaurant(db, restaurant_id) is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Restaurant not found"
+        )
+    return await import_dishes(db, restaurant_id, parser(request.stream()))
+
+
+@router.get(
+    "/{restaurant_id}/dishes/export",
+    summary="Экспорт меню",
+    description="Потоковая выгрузка меню ресторана в формате импорта",
+    responses={
+        status.HTTP_200_OK: {
+            "description": "Меню ресторана",
+            "content": {
+                "text/csv": {"example": "name,price,description\r\nПицца Маргарита,12.99,Классическая пицца\r\n"},
+                "application/x-ndjson": {"example": '{"name": "Пицца Маргарита", "price": 12.99, "description": "Классическая пицца"}\n'}
+            }
+        },
+        status.HTTP_404_NOT_FOUND: {
+            "description": "Ресторан не найден",
+            "content": {"application/json": {"example": {"detail": "Restaurant not found"}}}
+        }
+    }
+)
+async def export_menu(
+        restaurant_id: int = Path(..., title="ID ресторана", example=1, gt=0),
+        format: Literal["csv", "ndjson"] = Query("csv", description="Формат выгрузки"),
+        db: AsyncSession = Depends(get_db)
+):
+    """Меню читается страницами по id и отдается клиенту по мере чтения"""
+    if await restaurants_repo.get_restaurant(db, restaurant_id) is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Restaurant not found"
+        )
+    return StreamingResponse(
+        export_dishes(db, restaurant_id, format),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="menu-{restaurant_id}.{format}"'}
+    )
@@ -1,5 +1,6 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi.responses import ORJSONResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.db.session import get_db
 from app.db.repositories.users import (
     get_user_by_id,
@@ -12,8 +13,9 @@ from app.schemas.user import (
     UserUpdate,
     UserChangePassword
 )
-from app.core.security import get_current_user
-from typing import List
+from app.schemas.pagination import Page
+from app.services.auth import get_current_user
+from app.core.pagination import PageParams, make_page
 
 router = APIRouter(
     prefix="/users",
@@ -55,15 +57,15 @@ router = APIRouter(
         }
     }
 )
-def get_me(
+async def get_me(
     user: dict = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Получение информации о текущем авторизованном пользователе.
     Возвращает полные данные пользователя, включая email, роль и адрес.
     """
-    db_user = get_user_by_id(db, user["id"])
+    db_user = await get_user_by_id(db, user["id"])
     if not db_user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -100,17 +102,17 @@ def get_me(
         }
     }
 )
-def update_me(
+async def update_me(
     update_data: UserUpdate,
     user: dict = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Обновление данных пользователя.
     Принимает только изменяемые поля (email, адрес).
     Пароль изменяется через отдельный метод.
     """
-    updated_user = update_user(db, user["id"], update_data.dict(exclude_unset=True))
+    updated_user = await update_user(db, user["id"], update_data.dict(exclude_unset=True))
     if not updated_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -141,20 +143,28 @@ def update_me(
                     }
                 }
             }
+        },
+        status.HTTP_429_TOO_MANY_REQUESTS: {
+            "description": "Сервис аутентификации перегружен",
+            "content": {
+                "application/json": {
+                    "example": {"detail": "Too many authentication requests"}
+                }
+            }
         }
     }
 )
-def change_my_password(
+async def change_my_password(
     passwords: UserChangePassword,
     user: dict = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Смена пароля пользователя.
     Требуется указать текущий пароль и новый пароль.
     Новый пароль должен соответствовать требованиям безопасности.
     """
-    if not change_password(
+    if not await change_password(
         db, user["id"],
         passwords.old_password,
         passwords.new_password
@@ -167,7 +177,7 @@ def change_my_password(
 
 @router.get(
     "/",
-    response_model=List[UserInDB],
+    response_model=Page[UserInDB],
     summary="Получить список пользователей (admin)",
     description="Возвращает список всех пользователей (только для администраторов)",
     responses={
@@ -175,18 +185,29 @@ def change_my_password(
             "description": "Список пользователей",
             "content": {
                 "application/json": {
-                    "example": [
-                        {
-                            "id": 1,
-                            "email": "user1@example.com",
-                            "role": "customer"
-                        },
-                        {
-                            "id": 2,
-                            "email": "admin@example.com",
-                            "role": "admin"
-                        }
-                    ]
+                    "example": {
+                        "items": [
+                            {
+                                "id": 1,
+                                "email": "user1@example.com",
+                                "role": "customer"
+                            },
+                            {
+                                "id": 2,
+                                "email": "admin@example.com",
+                                "role": "admin"
+                            }
+                        ],
+                        "next_cursor": "eyJpZCI6Mn0"
+                    }
+                }
+            }
+        },
+        status.HTTP_400_BAD_REQUEST: {
+            "description": "Некорректный курсор",
+            "content": {
+                "application/json": {
+                    "example": {"detail": "Invalid cursor"}
                 }
             }
         },
@@ -200,14 +221,14 @@ def change_my_password(
         }
     }
 )
-def admin_get_users(
-    skip: int = 0,
-    limit: int = 100,
-    db: Session = Depends(get_db),
+async def admin_get_users(
+    page: PageParams = Depends(),
+    db: AsyncSession = Depends(get_db),
     current_user: dict = Depends(get_current_user)
 ):
     """
-    Получение списка пользователей с пагинацией.
+    Получение списка пользователей с keyset-пагинацией по id.
+    Для следующей страницы передайте next_cursor в параметре cursor.
     Доступно только для пользователей с ролью 'admin'.
     """
     if current_user["role"] != "admin":
@@ -215,4 +236,7 @@ def admin_get_users(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Forbidden"
         )
-    return get_users(db, skip, limit)
\ No newline at end of file
+    users = await get_users(db, page.after_id, page.limit + 1)
+    result = make_page(users, page.limit)
+    result["items"] = UserInDB.rows(result["items"])
+    return ORJSONResponse(result)
\ No newline at end of file
@@ -0,0 +1,193 @@
+"""
+Учет SQL-запросов в рамках HTTP-запроса.
+
+Обработчики событий движка считают запросы и их суммарное время в
+QueryStats текущего HTTP-запроса (contextvar), а DBMetricsMiddleware:
+
+- отдает счетчики клиенту в заголовке Server-Timing;
+- пишет их в гистограммы Prometheus по шаблону маршрута;
+- проверяет бюджет запросов, объявленный зависимостью query_budget.
+
+Запросы дольше DB_SLOW_QUERY_MS пишутся в лог без значений параметров
+(в них бывают email, хеши паролей и т.п.) - только их число.
+"""
+import json
+import logging
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Optional
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from app.core import metrics
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class QueryStats:
+    route: str = metrics.UNMATCHED_ROUTE
+    count: int = 0
+    duration: float = 0.0  # Секунды
+    budget: Optional[int] = None
+
+
+_stats: ContextVar[Optional[QueryStats]] = ContextVar("db_query_stats", default=None)
+
+
+def current_stats() -> Optional[QueryStats]:
+    return _stats.get()
+
+
+def redact(parameters) -> str:
+    """Параметры запроса без значений: '[3 params]' или '[100 rows x 3 params]'"""
+    if not parameters:
+        return "[]"
+    if isinstance(parameters, (list, tuple)) and isinstance(parameters[0], (list, tuple, dict)):
+        return f"[{len(parameters)} rows x {len(parameters[0])} params]"
+    return f"[{len(parameters)} params]"
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_started"].pop()
+    stats = _stats.get()
+    if stats is not None:
+        stats.count += 1
+        stats.duration += elapsed
+    if elapsed * 1000 >= settings.DB_SLOW_QUERY_MS:
+        route = stats.route if stats is not None else None
+        metrics.DB_SLOW_QUERIES.labels(route or "-").inc()
+        logger.warning(
+            "Slow query %.1f ms%s: %s %s",
+            elapsed * 1000, f" in {route}" if route else "", " ".join(statement.split()), redact(parameters)
+        )
+
+
+def _handle_error(context):
+    # Для упавшего запроса after_cursor_execute не вызывается
+    started = context.connection.info.get("query_started") if context.connection is not None else None
+    if started:
+        started.pop()
+
+
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    """Пул соединений, измеряющий ожидание свободного соединения"""
+
+    def connect(self):
+        started = time.perf_counter()
+        try:
+            return super().connect()
+        finally:
+            metrics.DB_POOL_CHECKOUT_WAIT.observe(time.perf_counter() - started)
+
+
+def instrument_engine(engine: AsyncEngine):
+    """Подключение счетчиков запросов и датчиков пула к движку; повторный вызов ничего не меняет"""
+    target = engine.sync_engine
+    if not event.contains(target, "before_cursor_execute", _before_cursor_execute):
+        event.listen(target, "before_cursor_execute", _before_cursor_execute)
+        event.listen(target, "after_cursor_execute", _after_cursor_execute)
+        event.listen(target, "handle_error", _handle_error)
+    if isinstance(target.pool, AsyncAdaptedQueuePool):  # У NullPool (SQLite) размера нет
+        # engine.dispose() заменяет пул, поэтому он читается при каждом опросе
+        metrics.DB_POOL_SIZE.set_function(lambda: target.pool.size())
+        metrics.DB_POOL_CHECKED_OUT.set_function(lambda: target.pool.checkedout())
+        metrics.DB_POOL_OVERFLOW.set_function(lambda: target.pool.overflow())
+
+
+def query_budget(limit: int):
+    """
+    Зависимость маршрута: не больше limit SQL-запросов на вызов.
+
+        @router.get("/...", dependencies=[Depends(query_budget(3))])
+
+    Превышение пишется в лог и метрику; при DB_QUERY_BUDGET_STRICT=True
+    ответ заменяется ошибкой 500, чтобы тесты и бенчмарк ловили N+1.
+    """
+    async def declare_budget():
+        stats = _stats.get()
+        if stats is not None:
+            stats.budget = limit
+    declare_budget.limit = limit  # Для проверки бюджетов в тестах
+    return declare_budget
+
+
+def _server_timing(stats: QueryStats, started: float) -> bytes:
+    app_ms = (time.perf_counter() - started) * 1000
+    return (
+        f'db;dur={stats.duration * 1000:.1f};desc="{stats.count} queries", app;dur={app_ms:.1f}'
+    ).encode("latin-1")
+
+
+class DBMetricsMiddleware:
+    """
+    ASGI-middleware учета SQL-запросов.
+
+    Server-Timing выставляется в начале ответа, поэтому в заголовок не
+    попадают запросы, выполненные во время отдачи потокового тела; в
+    метрики Prometheus они попадают.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats(route=metrics.route_template(scope))
+        token = _stats.set(stats)
+        started = time.perf_counter()
+        replaced = False
+
+        async def send_with_timing(message):
+            nonlocal replaced
+            if replaced:
+                return
+            if message["type"] == "http.response.start":
+                if self._over_budget(scope, stats) and settings.DB_QUERY_BUDGET_STRICT:
+                    replaced = True
+                    body = json.dumps({
+                        "detail": f"Query budget exceeded: {stats.count} > {stats.budget}"
+                    }).encode()
+                    await send({
+                        "type": "http.response.start",
+                        "status": 500,
+                        "headers": [
+                            (b"content-type", b"application/json"),
+                            (b"content-length", str(len(body)).encode()),
+                            (b"server-timing", _server_timing(stats, started)),
+                        ],
+                    })
+                    await send({"type": "http.response.body", "body": body})
+                    return
+                message = {**message, "headers": list(message.get("headers", [])) + [
+                    (b"server-timing", _server_timing(stats, started))
+                ]}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _stats.reset(token)
+            labels = (scope["method"], stats.route)
+            metrics.DB_QUERIES.labels(*labels).observe(stats.count)
+            metrics.DB_TIME.labels(*labels).observe(stats.duration)
+
+    @staticmethod
+    def _over_budget(scope, stats: QueryStats) -> bool:
+        if stats.budget is None or stats.count <= stats.budget:
+            return False
+        metrics.DB_QUERY_BUDGET_EXCEEDED.labels(scope["method"], stats.route).inc()
+        logger.warning(
+            "Query budget exceeded in %s %s: %d queries, budget %d",
+            scope["method"], stats.route, stats.count, stats.budget
+        )
+        return True
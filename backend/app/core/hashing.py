@@ -0,0 +1,94 @@
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from typing import Optional, Tuple
+from fastapi import HTTPException, status
+from passlib.context import CryptContext
+from app.core import metrics
+from app.core.config import settings
+
+
+@lru_cache()
+def _crypt_context(rounds: int) -> CryptContext:
+    # min/max = rounds: хеши с другой стоимостью помечаются как устаревшие
+    return CryptContext(
+        schemes=["bcrypt"],
+        deprecated="auto",
+        bcrypt__default_rounds=rounds,
+        bcrypt__min_rounds=rounds,
+        bcrypt__max_rounds=rounds,
+    )
+
+
+def _hash(password: str, rounds: int) -> str:
+    return _crypt_context(rounds).hash(password)
+
+
+def _verify_and_update(password: str, hashed: str, rounds: int) -> Tuple[bool, Optional[str]]:
+    return _crypt_context(rounds).verify_and_update(password, hashed)
+
+
+class PasswordHasher:
+    """
+    Выполнение bcrypt в отдельном пуле процессов.
+
+    Хеширование не блокирует event loop и не конкурирует за GIL.
+    Очередь ограничена: при переполнении запрос отклоняется с 429.
+    """
+
+    def __init__(self, rounds: int, max_workers: int, queue_size: int):
+        self.rounds = rounds
+        self.max_workers = max_workers
+        self.queue_size = queue_size
+        self.pending = 0
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    @property
+    def capacity(self) -> int:
+        return self.max_workers + self.queue_size
+
+    @property
+    def queued(self) -> int:
+        """Задачи, ожидающие свободного процесса"""
+        return max(0, self.pending - self.max_workers)
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._executor
+
+    async def _run(self, fn, *args):
+        if self.pending >= self.capacity:
+            metrics.AUTH_HASH_REJECTED.inc()
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many authentication requests",
+                headers={"Retry-After": "1"},
+            )
+        self.pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), fn, *args)
+        finally:
+            self.pending -= 1
+
+    async def hash(self, password: str) -> str:
+        return await self._run(_hash, password, self.rounds)
+
+    async def verify_and_update(self, password: str, hashed: str) -> Tuple[bool, Optional[str]]:
+        """Проверка пароля; второй элемент - новый хеш, если изменилась стоимость"""
+        return await self._run(_verify_and_update, password, hashed, self.rounds)
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+password_hasher = PasswordHasher(
+    rounds=settings.BCRYPT_ROUNDS,
+    max_workers=settings.AUTH_HASH_WORKERS,
+    queue_size=settings.AUTH_HASH_QUEUE_SIZE,
+)
+metrics.AUTH_HASH_PENDING.set_function(lambda: password_hasher.pending)
+metrics.AUTH_HASH_QUEUED.set_function(lambda: password_hasher.queued)
@@ -0,0 +1,131 @@
+"""
+Метрики Prometheus процесса.
+
+Метрики регистрируются в общем реестре prometheus_client и отдаются
+эндпоинтом /metrics. Значения датчиков, которые удобнее читать в момент
+опроса (размер пула, длина буферов), подключают модули-владельцы через
+Gauge.set_function. Модуль не импортирует код приложения.
+"""
+import functools
+import time
+from prometheus_client import Counter, Gauge, Histogram
+from starlette.routing import Match
+
+UNMATCHED_ROUTE = "<unmatched>"  # Все 404 в одной метке, чтобы не раздувать метрики
+
+DB_QUERIES = Histogram(
+    "http_request_db_queries",
+    "SQL-запросы на один HTTP-запрос",
+    ["method", "route"],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100),
+)
+DB_TIME = Histogram(
+    "http_request_db_seconds",
+    "Суммарное время SQL-запросов на один HTTP-запрос",
+    ["method", "route"],
+)
+DB_SLOW_QUERIES = Counter(
+    "db_slow_queries_total",
+    "SQL-запросы дольше DB_SLOW_QUERY_MS",
+    ["route"],
+)
+DB_QUERY_BUDGET_EXCEEDED = Counter(
+    "http_request_db_query_budget_exceeded_total",
+    "Запросы, превысившие объявленный бюджет SQL-запросов",
+    ["method", "route"],
+)
+
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "Время обработки HTTP-запроса",
+    ["method", "route", "status"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+HTTP_REQUESTS_IN_PROGRESS = Gauge(
+    "http_requests_in_progress",
+    "HTTP-запросы в обработке",
+    ["method", "route"],
+)
+
+DB_POOL_CHECKOUT_WAIT = Histogram(
+    "db_pool_checkout_wait_seconds",
+    "Ожидание соединения из пула БД",
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 30),
+)
+DB_POOL_SIZE = Gauge("db_pool_size", "Постоянные соединения пула БД")
+DB_POOL_CHECKED_OUT = Gauge("db_pool_checked_out", "Выданные соединения пула БД")
+DB_POOL_OVERFLOW = Gauge("db_pool_overflow", "Соединения сверх DB_POOL_SIZE (отрицательное - еще не открытые)")
+
+REDIS_COMMAND_DURATION = Histogram(
+    "redis_command_duration_seconds",
+    "Время операций с Redis",
+    ["operation"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1),
+)
+
+AUTH_HASH_PENDING = Gauge("auth_hash_pending", "Задачи bcrypt в пуле процессов: выполняются и в очереди")
+AUTH_HASH_QUEUED = Gauge("auth_hash_queued", "Задачи bcrypt, ожидающие свободного процесса")
+AUTH_HASH_REJECTED = Counter("auth_hash_rejected_total", "Отказы 429 из-за переполненной очереди bcrypt")
+
+PROFILER_SAMPLES = Counter("profiler_samples_total", "Стеки, снятые профилировщиком запросов")
+
+
+def timed(histogram: Histogram):
+    """Декоратор корутины: длительность вызова в histogram"""
+    def decorator(fn):
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return await fn(*args, **kwargs)
+            finally:
+                histogram.observe(time.perf_counter() - started)
+        return wrapper
+    return decorator
+
+
+def route_template(scope) -> str:
+    """
+    Шаблон маршрута запроса (/api/v1/orders/{order_id}) для меток метрик.
+
+    Вычисляется один раз на запрос и сохраняется в scope.
+    """
+    if "route_template" not in scope:
+        scope["route_template"] = UNMATCHED_ROUTE
+        app = scope.get("app")
+        for route in getattr(getattr(app, "router", None), "routes", ()):
+            match, _ = route.matches(scope)
+            if match == Match.FULL:
+                scope["route_template"] = route.path
+                break
+    return scope["route_template"]
+
+
+class RequestMetricsMiddleware:
+    """ASGI-middleware: время ответа по маршруту и статусу, запросы в обработке"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method, route = scope["method"], route_template(scope)
+        status_code = 500  # Если приложение упало до начала ответа
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        in_progress = HTTP_REQUESTS_IN_PROGRESS.labels(method, route)
+        in_progress.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            in_progress.dec()
+            HTTP_REQUEST_DURATION.labels(method, route, str(status_code)).observe(time.perf_counter() - started)
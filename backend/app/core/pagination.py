@@ -0,0 +1,68 @@
+import base64
+import binascii
+import json
+from typing import Callable, List, Optional, Sequence
+from fastapi import HTTPException, Query, status
+
+
+def encode_cursor(data: dict) -> str:
+    """Непрозрачный курсор: JSON в urlsafe base64 без padding"""
+    raw = json.dumps(data, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+def decode_cursor(cursor: str) -> dict:
+    """Разбор курсора; ValueError при невалидном значении"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        data = json.loads(raw)
+    except (ValueError, binascii.Error):
+        raise ValueError("Invalid cursor")
+    if not isinstance(data, dict):
+        raise ValueError("Invalid cursor")
+    return data
+
+
+class PageParams:
+    """Параметры keyset-пагинации из query string"""
+
+    def __init__(
+        self,
+        cursor: Optional[str] = Query(None, description="Курсор следующей страницы"),
+        limit: int = Query(20, ge=1, le=100, description="Размер страницы")
+    ):
+        self.cursor = cursor
+        self.limit = limit
+        try:
+            self.after = decode_cursor(cursor) if cursor else {}
+        except ValueError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(e)
+            )
+
+    @property
+    def after_id(self) -> Optional[int]:
+        value = self.after.get("id")
+        if value is not None and not isinstance(value, int):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid cursor"
+            )
+        return value
+
+
+def make_page(
+    rows: Sequence,
+    limit: int,
+    key: Callable[[object], dict] = lambda row: {"id": row.id}
+) -> dict:
+    """
+    Сборка страницы из limit + 1 строк.
+
+    Лишняя строка только сигнализирует о наличии следующей страницы,
+    курсор строится по последней отданной строке.
+    """
+    items: List = list(rows[:limit])
+    next_cursor = encode_cursor(key(items[-1])) if len(rows) > limit and items else None
+    return {"items": items, "next_cursor": next_cursor}
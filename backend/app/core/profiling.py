@@ -0,0 +1,195 @@
+"""
+Выборочное профилирование HTTP-запросов.
+
+Профилировщик сэмплирующий: фоновый поток раз в PROFILING_INTERVAL
+секунд снимает стеки профилируемых запросов и считает их по маршрутам.
+Код запросов не трассируется, поэтому накладные расходы не зависят от
+числа вызовов функций.
+
+Профилируется доля PROFILING_SAMPLE_RATE запросов. Запрос - это задача
+asyncio, поэтому для него снимается:
+
+- стек потока event loop, если задача выполняется в момент выборки;
+- цепочка корутин до точки ожидания (<await>), если задача ждет
+  БД, Redis и т.п. - так видно и время ожидания ввода-вывода.
+
+Стеки хранятся в памяти в формате folded (a;b;c N), который принимают
+flamegraph.pl и speedscope. Число разных стеков на маршрут ограничено,
+остальные учитываются в стеке <other>. Профилировщик включается и
+выключается на лету через /api/v1/admin/profiling; состояние у каждого
+процесса свое.
+"""
+import asyncio
+import os
+import random
+import sys
+import threading
+from collections import Counter
+from types import FrameType
+from typing import Dict, List, Optional, Tuple
+from app.core import metrics
+from app.core.config import settings
+
+OTHER_STACK = "<other>"
+AWAIT_FRAME = "<await>"
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def _coroutine_stack(task: asyncio.Task, root) -> List[str]:
+    """Цепочка корутин ожидающей задачи ниже кадра root до точки ожидания"""
+    stack = []
+    coro = task.get_coro()
+    while coro is not None:
+        frame = getattr(coro, "cr_frame", None) or getattr(coro, "gi_frame", None)
+        if frame is None:
+            break
+        if stack or frame is root:
+            stack.append(_frame_label(frame))
+        coro = getattr(coro, "cr_await", None) or getattr(coro, "gi_yieldfrom", None)
+    stack.append(AWAIT_FRAME)
+    return stack
+
+
+def _thread_stack(frame, root) -> List[str]:
+    """Стек потока от кадра root до текущей функции"""
+    stack = []
+    while frame is not None:
+        stack.append(_frame_label(frame))
+        if frame is root:
+            break
+        frame = frame.f_back
+    stack.reverse()
+    return stack
+
+
+class SamplingProfiler:
+    def __init__(self, sample_rate: float, interval: float, max_stacks: int):
+        self.sample_rate = sample_rate
+        self.interval = interval
+        self.max_stacks = max_stacks
+        self.enabled = False
+        self._active: Dict[asyncio.Task, Tuple[str, FrameType]] = {}
+        self._stacks: Dict[str, Counter] = {}
+        self._requests: Counter = Counter()
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread: Optional[int] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def configure(self, enabled: Optional[bool] = None, sample_rate: Optional[float] = None,
+                  interval: Optional[float] = None):
+        """Изменение режима без перезапуска; вызывается из event loop"""
+        if sample_rate is not None:
+            self.sample_rate = sample_rate
+        if interval is not None:
+            self.interval = interval
+        if enabled is not None and enabled != self.enabled:
+            self.enabled = enabled
+            if enabled:
+                self._start()
+            else:
+                self._stop.set()
+                self._thread = None
+
+    def _start(self):
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread = threading.get_ident()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, args=(self._stop,), name="profiler", daemon=True)
+        self._thread.start()
+
+    def should_sample(self) -> bool:
+        return self.enabled and random.random() < self.sample_rate
+
+    def begin(self, route: str, root: FrameType):
+        """Профилирование текущей задачи; стеки отсчитываются от кадра root"""
+        task = asyncio.current_task()
+        if task is not None:
+            self._active[task] = (route, root)
+            self._requests[route] += 1
+
+    def end(self):
+        self._active.pop(asyncio.current_task(), None)
+
+    def _run(self, stop: threading.Event):
+        while not stop.wait(self.interval):
+            if self._active:
+                self._sample()
+
+    def _sample(self):
+        running = asyncio.current_task(self._loop)
+        loop_frame = sys._current_frames().get(self._loop_thread)
+        samples = []
+        for task, (route, root) in list(self._active.items()):
+            if task is running and loop_frame is not None:
+                stack = _thread_stack(loop_frame, root)
+            else:
+                stack = _coroutine_stack(task, root)
+            samples.append((route, ";".join(stack)))
+        with self._lock:
+            for route, stack in samples:
+                stacks = self._stacks.setdefault(route, Counter())
+                if stack not in stacks and len(stacks) >= self.max_stacks:
+                    stack = OTHER_STACK
+                stacks[stack] += 1
+        metrics.PROFILER_SAMPLES.inc(len(samples))
+
+    def status(self) -> dict:
+        with self._lock:
+            samples = {route: sum(stacks.values()) for route, stacks in self._stacks.items()}
+        return {
+            "enabled": self.enabled,
+            "sample_rate": self.sample_rate,
+            "interval": self.interval,
+            "routes": [
+                {"route": route, "requests": self._requests[route], "samples": samples.get(route, 0)}
+                for route in sorted(self._requests)
+            ],
+        }
+
+    def folded(self, route: Optional[str] = None) -> str:
+        """Стеки в формате folded; без route - все маршруты с маршрутом в корне"""
+        with self._lock:
+            items = [
+                (name, stack, count)
+                for name, stacks in self._stacks.items() if route is None or name == route
+                for stack, count in stacks.items()
+            ]
+        return "".join(
+            f"{stack if route is not None else f'{name};{stack}'} {count}\n"
+            for name, stack, count in sorted(items, key=lambda item: -item[2])
+        )
+
+    def reset(self):
+        with self._lock:
+            self._stacks.clear()
+            self._requests.clear()
+
+
+profiler = SamplingProfiler(
+    sample_rate=settings.PROFILING_SAMPLE_RATE,
+    interval=settings.PROFILING_INTERVAL,
+    max_stacks=settings.PROFILING_MAX_STACKS,
+)
+
+
+class ProfilingMiddleware:
+    """ASGI-middleware: отбор запросов для профилировщика"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not profiler.should_sample():
+            await self.app(scope, receive, send)
+            return
+        profiler.begin(metrics.route_template(scope), sys._getframe())
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            profiler.end()
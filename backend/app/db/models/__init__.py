@@ -0,0 +1,4 @@
+# Модели ссылаются друг на друга по имени (relationship("User")), поэтому
+# все они регистрируются здесь: импорт любой модели загружает остальные,
+# и мапперы настраиваются и в процессах без app.main (воркеры).
+from app.db.models import analytics, order, outbox, restaurant, user  # noqa: F401
@@ -0,0 +1,37 @@
+from sqlalchemy import Column, Integer, Float, ForeignKey, DateTime, Date, Index
+from app.db.session import Base
+
+class RestaurantStatsHourly(Base):
+    """
+    Почасовые агрегаты заказов ресторана.
+
+    Час - час создания заказа (UTC); отмены и доставки учитываются в том же
+    часе, что и сам заказ. Обновляется ретранслятором outbox.
+    """
+    __tablename__ = "restaurant_stats_hourly"
+
+    restaurant_id = Column(Integer, ForeignKey("restaurants.id"), primary_key=True)
+    bucket = Column(DateTime(timezone=True), primary_key=True)  # Начало часа
+    orders_count = Column(Integer, nullable=False, default=0)
+    revenue = Column(Float, nullable=False, default=0)  # Без отмененных заказов
+    canceled_count = Column(Integer, nullable=False, default=0)
+    delivered_count = Column(Integer, nullable=False, default=0)
+    delivery_seconds = Column(Float, nullable=False, default=0)  # Сумма created_at -> delivered_at
+
+    __table_args__ = (
+        Index("ix_restaurant_stats_hourly_bucket", "bucket"),
+    )
+
+class DishStatsDaily(Base):
+    """Продажи блюда за день создания заказов (UTC)"""
+    __tablename__ = "dish_stats_daily"
+
+    dish_id = Column(Integer, ForeignKey("dishes.id"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    restaurant_id = Column(Integer, ForeignKey("restaurants.id"), nullable=False)
+    quantity = Column(Integer, nullable=False, default=0)
+    revenue = Column(Float, nullable=False, default=0)
+
+    __table_args__ = (
+        Index("ix_dish_stats_daily_day", "day"),
+    )
@@ -1,6 +1,7 @@
-from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime, Enum
+from typing import Optional
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime, Enum, Index
 from sqlalchemy.orm import relationship
-from sqlalchemy.sql import func
+from sqlalchemy.sql import func, text
 from app.db.session import Base
 
 class Order(Base):
@@ -8,6 +9,8 @@ class Order(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"))
+    restaurant_id = Column(Integer, ForeignKey("restaurants.id"), nullable=True)  # Точка забора
+    courier_id = Column(Integer, ForeignKey("users.id"), nullable=True, index=True)
     status = Column(Enum(
         "created", "paid", "cooking", "delivering", "delivered", "canceled",
         name="order_status"
@@ -17,9 +20,22 @@ class Order(Base):
     delivered_at = Column(DateTime(timezone=True), nullable=True)
 
     # Связи
-    user = relationship("User", back_populates="orders")
+    user = relationship("User", back_populates="orders", foreign_keys=[user_id])
+    courier = relationship("User", foreign_keys=[courier_id])
+    restaurant = relationship("Restaurant")
     items = relationship("OrderItem", back_populates="order")
 
+    __table_args__ = (
+        # Частичные индексы по заказам, ожидающим курьера (оплачен или готовится)
+        Index("ix_orders_open_id", "id", postgresql_where=text("status IN ('paid', 'cooking')")),
+        Index(
+            "ix_orders_open_restaurant_id", "restaurant_id", "id",
+            postgresql_where=text("status IN ('paid', 'cooking')")
+        ),
+        # История заказов пользователя: keyset по (created_at, id)
+        Index("ix_orders_user_id_created_at_id", "user_id", "created_at", "id"),
+    )
+
 class OrderItem(Base):
     __tablename__ = "order_items"
 
@@ -31,4 +47,25 @@ class OrderItem(Base):
 
     # Связи
     order = relationship("Order", back_populates="items")
-    dish = relationship("Dish", back_populates="order_items")
\ No newline at end of file
+    dish = relationship("Dish", back_populates="order_items")
+
+    @property
+    def dish_name(self) -> Optional[str]:
+        """Название блюда; dish должен быть загружен заранее (selectinload)"""
+        return self.dish.name if self.dish is not None else None
+
+
+class OrderStatusHistory(Base):
+    """Журнал смены статусов заказа; строки только добавляются"""
+    __tablename__ = "order_status_history"
+
+    id = Column(Integer, primary_key=True)
+    order_id = Column(Integer, ForeignKey("orders.id"), nullable=False)
+    from_status = Column(String, nullable=True)  # NULL - заказ создан
+    to_status = Column(String, nullable=False)
+    changed_by = Column(Integer, ForeignKey("users.id"), nullable=True)
+    changed_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        Index("ix_order_status_history_order_id_id", "order_id", "id"),
+    )
@@ -0,0 +1,30 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, Index
+from sqlalchemy.sql import func, text
+from app.db.session import Base
+
+class OutboxEvent(Base):
+    """
+    Событие, ожидающее публикации в брокер.
+
+    Пишется в той же транзакции, что и изменение заказа. У outbox два
+    независимых потребителя: ретранслятор в брокер (app.workers.outbox,
+    published_at) и агрегаты аналитики (app.workers.analytics, rolled_up_at).
+    """
+    __tablename__ = "outbox_events"
+
+    id = Column(Integer, primary_key=True)
+    event_type = Column(String, nullable=False)  # order.created, order.accepted, ...
+    aggregate_id = Column(Integer, nullable=False)  # id заказа
+    idempotency_key = Column(String, unique=True, nullable=False)  # message_id в брокере
+    routing_key = Column(String, nullable=False)  # Очередь назначения
+    payload = Column(Text, nullable=False)  # Готовое тело сообщения (JSON)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    published_at = Column(DateTime(timezone=True), nullable=True)
+    rolled_up_at = Column(DateTime(timezone=True), nullable=True)  # Учтено в агрегатах аналитики
+
+    __table_args__ = (
+        # Частичный индекс по неопубликованным событиям для выборки ретранслятора
+        Index("ix_outbox_events_pending_id", "id", postgresql_where=text("published_at IS NULL")),
+        # То же для событий, еще не учтенных в аналитике
+        Index("ix_outbox_events_rollup_pending_id", "id", postgresql_where=text("rolled_up_at IS NULL")),
+    )
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, ForeignKey
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, Boolean, Index, UniqueConstraint
 from sqlalchemy.orm import relationship
 from app.db.session import Base
 
@@ -17,6 +17,12 @@ class Restaurant(Base):
 
 class Dish(Base):
     __tablename__ = "dishes"
+    __table_args__ = (
+        # Keyset-пагинация меню: WHERE restaurant_id = ? AND id > ? ORDER BY id
+        Index("ix_dishes_restaurant_id_id", "restaurant_id", "id"),
+        # Ключ импорта меню: INSERT ... ON CONFLICT (restaurant_id, name)
+        UniqueConstraint("restaurant_id", "name", name="uq_dishes_restaurant_id_name"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, index=True)
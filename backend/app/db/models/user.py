@@ -11,4 +11,4 @@ class User(Base):
     role = Column(Enum("customer", "courier", "admin", name="user_roles"))
     address = Column(String, nullable=True)
 
-    orders = relationship("Order", back_populates="user")
\ No newline at end of file
+    orders = relationship("Order", back_populates="user", foreign_keys="Order.user_id")
\ No newline at end of file
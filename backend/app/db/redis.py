@@ -0,0 +1,15 @@
+import redis.asyncio as redis
+from app.core.config import settings
+
+# Общий пул соединений на процесс
+pool = redis.ConnectionPool.from_url(
+    settings.REDIS_URL,
+    max_connections=settings.REDIS_MAX_CONNECTIONS,
+)
+
+redis_client = redis.Redis(connection_pool=pool)
+
+
+def get_redis() -> redis.Redis:
+    """DI для асинхронного клиента Redis"""
+    return redis_client
@@ -0,0 +1,122 @@
+from datetime import date, datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import desc, func, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.models.analytics import DishStatsDaily, RestaurantStatsHourly
+from app.db.models.order import Order, OrderItem
+from app.db.models.restaurant import Dish
+
+# Счетчики почасовых агрегатов ресторанов: приращения и их суммы
+RESTAURANT_COUNTERS = ("orders_count", "revenue", "canceled_count", "delivered_count", "delivery_seconds")
+
+
+async def get_order_facts(db: AsyncSession, order_ids: Iterable[int]) -> Tuple[Dict[int, tuple], List[tuple]]:
+    """
+    Данные заказов для агрегатов двумя запросами на пачку событий.
+
+    Возвращает {order_id: (created_at, delivered_at)} и строки позиций
+    (order_id, dish_id, restaurant_id, quantity, price_at_order).
+    """
+    order_ids = list(order_ids)
+    orders = await db.execute(
+        select(Order.id, Order.created_at, Order.delivered_at).where(Order.id.in_(order_ids))
+    )
+    items = await db.execute(
+        select(OrderItem.order_id, OrderItem.dish_id, Dish.restaurant_id, OrderItem.quantity, OrderItem.price_at_order)
+        .join(Dish, Dish.id == OrderItem.dish_id)
+        .where(OrderItem.order_id.in_(order_ids))
+    )
+    return {order_id: (created_at, delivered_at) for order_id, created_at, delivered_at in orders.all()}, items.all()
+
+
+async def add_restaurant_stats(db: AsyncSession, rows: List[dict]):
+    """Прибавление приращений к почасовым агрегатам (INSERT ... ON CONFLICT DO UPDATE)"""
+    if not rows:
+        return
+    stmt = insert(RestaurantStatsHourly)
+    await db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[RestaurantStatsHourly.restaurant_id, RestaurantStatsHourly.bucket],
+            set_={
+                name: getattr(RestaurantStatsHourly, name) + getattr(stmt.excluded, name)
+                for name in RESTAURANT_COUNTERS
+            }
+        ),
+        rows
+    )
+
+
+async def add_dish_stats(db: AsyncSession, rows: List[dict]):
+    if not rows:
+        return
+    stmt = insert(DishStatsDaily)
+    await db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[DishStatsDaily.dish_id, DishStatsDaily.day],
+            set_={
+                "quantity": DishStatsDaily.quantity + stmt.excluded.quantity,
+                "revenue": DishStatsDaily.revenue + stmt.excluded.revenue,
+            }
+        ),
+        rows
+    )
+
+
+async def get_restaurant_stats(
+    db: AsyncSession,
+    since: datetime,
+    until: datetime,
+    granularity: str = "hour",
+    restaurant_id: Optional[int] = None
+) -> List[tuple]:
+    """
+    Агрегаты ресторанов по часам или дням за [since, until).
+
+    Строки: (restaurant_id, bucket, *RESTAURANT_COUNTERS).
+    Дневные значения суммируются из почасовых строк; сутки считаются по
+    UTC, а не по часовому поясу сессии БД.
+    """
+    bucket = RestaurantStatsHourly.bucket
+    if granularity == "day":
+        # date_trunc('day', bucket AT TIME ZONE 'UTC') AT TIME ZONE 'UTC':
+        # начало суток UTC обратно как timestamptz
+        bucket = func.timezone("UTC", func.date_trunc("day", func.timezone("UTC", RestaurantStatsHourly.bucket)))
+    bucket = bucket.label("bucket")
+    query = (
+        select(
+            RestaurantStatsHourly.restaurant_id,
+            bucket,
+            *(func.sum(getattr(RestaurantStatsHourly, name)) for name in RESTAURANT_COUNTERS),
+        )
+        .where(RestaurantStatsHourly.bucket >= since, RestaurantStatsHourly.bucket < until)
+        .group_by(RestaurantStatsHourly.restaurant_id, bucket)
+        .order_by(bucket, RestaurantStatsHourly.restaurant_id)
+    )
+    if restaurant_id is not None:
+        query = query.where(RestaurantStatsHourly.restaurant_id == restaurant_id)
+    result = await db.execute(query)
+    return result.all()
+
+
+async def get_top_dishes(
+    db: AsyncSession,
+    since: date,
+    until: date,
+    limit: int,
+    restaurant_id: Optional[int] = None
+) -> List[tuple]:
+    """Самые продаваемые блюда за дни [since, until): (dish_id, restaurant_id, name, quantity, revenue)"""
+    quantity = func.sum(DishStatsDaily.quantity).label("quantity")
+    query = (
+        select(DishStatsDaily.dish_id, DishStatsDaily.restaurant_id, Dish.name, quantity, func.sum(DishStatsDaily.revenue))
+        .join(Dish, Dish.id == DishStatsDaily.dish_id)
+        .where(DishStatsDaily.day >= since, DishStatsDaily.day < until)
+        .group_by(DishStatsDaily.dish_id, DishStatsDaily.restaurant_id, Dish.name)
+        .order_by(desc(quantity), DishStatsDaily.dish_id)
+        .limit(limit)
+    )
+    if restaurant_id is not None:
+        query = query.where(DishStatsDaily.restaurant_id == restaurant_id)
+    result = await db.execute(query)
+    return result.all()
@@ -0,0 +1,293 @@
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import and_, case, insert, or_, select, tuple_, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from sqlalchemy.sql import func
+from app.core.config import settings
+from app.db.models.order import Order, OrderItem, OrderStatusHistory
+from app.db.models.restaurant import Dish
+from app.db.repositories.outbox import add_event
+from app.schemas.notification import NotificationMessage
+
+
+STATUS_MESSAGES = {
+    "created": "Order #{} created",
+    "paid": "Order #{} paid",
+    "cooking": "Order #{} is being prepared",
+    "delivering": "Courier is on the way with order #{}",
+    "delivered": "Order #{} delivered",
+    "canceled": "Order #{} canceled",
+}
+
+# Заказы, которые курьер может принять: оплаченные и готовящиеся
+AWAITING_COURIER = ("paid", "cooking")
+
+
+def add_order_event(db: AsyncSession, order_id: int, user_id: int, status: str):
+    """
+    Запись события смены статуса заказа в outbox текущей транзакции.
+
+    Событие доставляется пользователю как push-уведомление; ключ
+    идемпотентности одновременно служит id уведомления, поэтому повторная
+    публикация ретранслятором распознается получателем.
+    """
+    key = f"order:{order_id}:{status}"
+    message = STATUS_MESSAGES[status].format(order_id)
+    notification = NotificationMessage(id=key, channel="push", user_id=user_id, message=message)
+    add_event(db, f"order.{status}", order_id, key, settings.NOTIFICATIONS_QUEUE, notification.json())
+
+
+async def get_dish_prices(db: AsyncSession, dish_ids) -> Dict[int, Tuple[float, int]]:
+    """Цены и рестораны блюд одним запросом WHERE id IN (...)"""
+    result = await db.execute(
+        select(Dish.id, Dish.price, Dish.restaurant_id).where(Dish.id.in_(dish_ids))
+    )
+    return {dish_id: (price, restaurant_id) for dish_id, price, restaurant_id in result.all()}
+
+
+async def create_order_from_cart(db: AsyncSession, user_id: int, cart: Dict[int, int]) -> Order:
+    """
+    Создание заказа из корзины в одной транзакции.
+
+    Цены фиксируются на сервере (price_at_order), сумма заказа считается
+    в том же проходе, позиции вставляются одним executemany. Если все
+    блюда из одного ресторана, он сохраняется как точка забора заказа.
+    Событие order.created и первая запись журнала статусов пишутся в той
+    же транзакции.
+    При отсутствии блюда выбрасывает ValueError, транзакция откатывается.
+    """
+    try:
+        prices = await get_dish_prices(db, list(cart))
+        missing = [dish_id for dish_id in cart if dish_id not in prices]
+        if missing:
+            raise ValueError(f"Dish not found: {', '.join(map(str, missing))}")
+
+        rows = []
+        total = 0.0
+        restaurant_ids = set()
+        for dish_id, quantity in cart.items():
+            price, restaurant_id = prices[dish_id]
+            total += price * quantity
+            restaurant_ids.add(restaurant_id)
+            rows.append({"dish_id": dish_id, "quantity": quantity, "price_at_order": price})
+
+        order = Order(
+            user_id=user_id,
+            restaurant_id=restaurant_ids.pop() if len(restaurant_ids) == 1 else None,
+            status="created",
+            total=round(total, 2)
+        )
+        db.add(order)
+        await db.flush()  # INSERT ... RETURNING id
+
+        for row in rows:
+            row["order_id"] = order.id
+        await db.execute(insert(OrderItem), rows)
+        await db.execute(insert(OrderStatusHistory), [{"order_id": order.id, "to_status": "created", "changed_by": user_id}])
+        add_order_event(db, order.id, user_id, "created")
+
+        await db.commit()
+    except Exception:
+        await db.rollback()
+        raise
+    return order
+
+
+async def get_open_orders(
+    db: AsyncSession,
+    restaurant_ids: Optional[List[int]] = None,
+    after_id: Optional[int] = None,
+    limit: Optional[int] = None,
+    without_pickup: bool = False
+) -> List[Order]:
+    """
+    Заказы, ожидающие курьера (status IN AWAITING_COURIER).
+
+    without_pickup - только заказы без точки забора (restaurant_id IS NULL).
+    Запросы обслуживаются частичными индексами по открытым заказам.
+    """
+    query = select(Order).where(Order.status.in_(AWAITING_COURIER))
+    if restaurant_ids is not None:
+        query = query.where(Order.restaurant_id.in_(restaurant_ids))
+    if without_pickup:
+        query = query.where(Order.restaurant_id.is_(None))
+    if after_id is not None:
+        query = query.where(Order.id > after_id)
+    result = await db.execute(query.order_by(Order.id).limit(limit))
+    return list(result.scalars().all())
+
+
+async def get_open_orders_ranked(
+    db: AsyncSession,
+    restaurant_ids: List[int],
+    after: Optional[Tuple[int, int]] = None,
+    limit: Optional[int] = None
+) -> List[Order]:
+    """
+    Открытые заказы ресторанов в заданном порядке приоритета.
+
+    Заказы упорядочены по позиции ресторана в restaurant_ids, затем по id.
+    after = (restaurant_id, order_id) - keyset-курсор: из этого ресторана
+    берутся заказы с id > order_id, затем заказы ресторанов из списка.
+    """
+    ranks = {restaurant_id: rank for rank, restaurant_id in enumerate(restaurant_ids)}
+    condition = Order.restaurant_id.in_(restaurant_ids)
+    if after is not None:
+        ranks[after[0]] = -1
+        condition = or_(condition, and_(Order.restaurant_id == after[0], Order.id > after[1]))
+    if not ranks:
+        return []
+    query = (
+        select(Order)
+        .where(Order.status.in_(AWAITING_COURIER), condition)
+        .order_by(case(ranks, value=Order.restaurant_id), Order.id)
+        .limit(limit)
+    )
+    result = await db.execute(query)
+    return list(result.scalars().all())
+
+
+async def apply_transition(
+    db: AsyncSession,
+    order_ids: Iterable[int],
+    to_status: str,
+    from_statuses: Iterable[str],
+    changed_by: Optional[int] = None,
+    conditions: Iterable = (),
+    values: Optional[Dict[str, Any]] = None
+) -> List[Tuple[int, str]]:
+    """
+    Смена статуса заказов одним условным UPDATE ... FROM ... RETURNING.
+
+    Обновляются только заказы в одном из from_statuses, удовлетворяющие
+    conditions (например, владелец заказа). Прежний статус берется из
+    самосоединения orders: при конкурентной смене статуса строка не
+    проходит повторную проверку условия и пропускается, поэтому журнал
+    всегда содержит фактический переход. Журнал статусов и события outbox
+    пишутся пачками в той же транзакции.
+
+    Возвращает [(order_id, from_status)] для измененных заказов.
+    """
+    order_ids = list(order_ids)
+    if not order_ids:
+        return []
+    values = dict(values or {})
+    if to_status == "delivered":
+        values["delivered_at"] = func.now()
+    orders = Order.__table__
+    previous = orders.alias("previous")
+    try:
+        result = await db.execute(
+            update(orders)
+            .where(
+                orders.c.id.in_(order_ids),
+                previous.c.id == orders.c.id,
+                previous.c.status == orders.c.status,
+                orders.c.status.in_(list(from_statuses)),
+                *conditions
+            )
+            .values(status=to_status, **values)
+            .returning(orders.c.id, orders.c.user_id, previous.c.status)
+        )
+        rows = result.all()
+        if rows:
+            await db.execute(insert(OrderStatusHistory), [
+                {"order_id": order_id, "from_status": from_status, "to_status": to_status, "changed_by": changed_by}
+                for order_id, _, from_status in rows
+            ])
+            for order_id, user_id, _ in rows:
+                add_order_event(db, order_id, user_id, to_status)
+        await db.commit()
+    except Exception:
+        await db.rollback()
+        raise
+    return [(order_id, from_status) for order_id, _, from_status in rows]
+
+
+async def assign_courier(db: AsyncSession, order_id: int, courier_id: int) -> Optional[int]:
+    """
+    Назначение курьера: переход paid/cooking -> delivering одним условным UPDATE.
+
+    Возвращает id заказа, если курьер его получил, иначе None: заказ не
+    существует или уже принят другим курьером.
+    """
+    rows = await apply_transition(
+        db, [order_id], "delivering", AWAITING_COURIER, changed_by=courier_id, values={"courier_id": courier_id}
+    )
+    return rows[0][0] if rows else None
+
+
+async def order_exists(db: AsyncSession, order_id: int, visible_to: Optional[int] = None) -> bool:
+    """visible_to - учитывать только заказ, где пользователь покупатель или курьер"""
+    query = select(Order.id).where(Order.id == order_id)
+    if visible_to is not None:
+        query = query.where(or_(Order.user_id == visible_to, Order.courier_id == visible_to))
+    result = await db.execute(query)
+    return result.scalar_one_or_none() is not None
+
+
+async def get_order(db: AsyncSession, order_id: int) -> Optional[Order]:
+    result = await db.execute(select(Order).where(Order.id == order_id))
+    return result.scalar_one_or_none()
+
+
+async def get_order_with_last_change(db: AsyncSession, order_id: int) -> Optional[Tuple[Order, Optional[datetime]]]:
+    """
+    Заказ и время последней смены его статуса по журналу.
+
+    Читается одним запросом, поэтому статус и время согласованы даже при
+    конкурентной смене статуса. Время совпадает с created_at события
+    outbox этого перехода: оба пишутся в одной транзакции.
+    """
+    last_change = (
+        select(func.max(OrderStatusHistory.changed_at))
+        .where(OrderStatusHistory.order_id == Order.id)
+        .correlate(Order)
+        .scalar_subquery()
+    )
+    result = await db.execute(select(Order, last_change).where(Order.id == order_id))
+    row = result.first()
+    return (row[0], row[1]) if row is not None else None
+
+
+def _with_items(query):
+    """Позиции и названия блюд двумя запросами IN (...) на всю выборку"""
+    return query.options(
+        selectinload(Order.items).selectinload(OrderItem.dish).load_only(Dish.id, Dish.name)
+    )
+
+
+async def get_order_details(db: AsyncSession, order_id: int) -> Optional[Order]:
+    result = await db.execute(_with_items(select(Order).where(Order.id == order_id)))
+    return result.scalar_one_or_none()
+
+
+async def get_user_orders(
+    db: AsyncSession,
+    user_id: int,
+    before: Optional[Tuple[datetime, int]] = None,
+    limit: Optional[int] = None
+) -> List[Order]:
+    """
+    Заказы пользователя, новые первыми, с позициями и названиями блюд.
+
+    Три запроса независимо от размера страницы. before = (created_at, id)
+    последнего заказа предыдущей страницы; выборка идет по индексу
+    (user_id, created_at, id).
+    """
+    query = select(Order).where(Order.user_id == user_id)
+    if before is not None:
+        query = query.where(tuple_(Order.created_at, Order.id) < tuple_(*before))
+    query = query.order_by(Order.created_at.desc(), Order.id.desc()).limit(limit)
+    result = await db.execute(_with_items(query))
+    return list(result.scalars().all())
+
+
+async def get_status_history(db: AsyncSession, order_id: int) -> List[OrderStatusHistory]:
+    result = await db.execute(
+        select(OrderStatusHistory)
+        .where(OrderStatusHistory.order_id == order_id)
+        .order_by(OrderStatusHistory.id)
+    )
+    return list(result.scalars().all())
@@ -0,0 +1,89 @@
+from datetime import datetime
+from typing import List
+from sqlalchemy import delete, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import func
+from app.db.models.outbox import OutboxEvent
+
+
+def add_event(
+    db: AsyncSession,
+    event_type: str,
+    aggregate_id: int,
+    idempotency_key: str,
+    routing_key: str,
+    payload: str
+) -> OutboxEvent:
+    """Добавление события в текущую транзакцию (commit делает вызывающий)"""
+    event = OutboxEvent(
+        event_type=event_type,
+        aggregate_id=aggregate_id,
+        idempotency_key=idempotency_key,
+        routing_key=routing_key,
+        payload=payload
+    )
+    db.add(event)
+    return event
+
+
+async def lock_pending_events(db: AsyncSession, limit: int) -> List[OutboxEvent]:
+    """
+    Неопубликованные события в порядке записи.
+
+    Строки блокируются FOR UPDATE SKIP LOCKED, поэтому несколько
+    ретрансляторов разбирают разные пачки.
+    """
+    result = await db.execute(
+        select(OutboxEvent)
+        .where(OutboxEvent.published_at.is_(None))
+        .order_by(OutboxEvent.id)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
+    return list(result.scalars().all())
+
+
+async def lock_rollup_pending_events(db: AsyncSession, limit: int) -> List[OutboxEvent]:
+    """
+    События, еще не учтенные в аналитике, в порядке записи.
+
+    Строки, заблокированные ретранслятором, пропускаются и берутся
+    следующими пачками, поэтому задержка публикации не останавливает
+    агрегаты.
+    """
+    result = await db.execute(
+        select(OutboxEvent)
+        .where(OutboxEvent.rolled_up_at.is_(None))
+        .order_by(OutboxEvent.id)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
+    return list(result.scalars().all())
+
+
+async def mark_published(db: AsyncSession, event_ids: List[int]):
+    await db.execute(
+        update(OutboxEvent)
+        .where(OutboxEvent.id.in_(event_ids))
+        .values(published_at=func.now())
+        .execution_options(synchronize_session=False)
+    )
+
+
+async def mark_rolled_up(db: AsyncSession, event_ids: List[int]):
+    await db.execute(
+        update(OutboxEvent)
+        .where(OutboxEvent.id.in_(event_ids))
+        .values(rolled_up_at=func.now())
+        .execution_options(synchronize_session=False)
+    )
+
+
+async def purge_published(db: AsyncSession, before: datetime) -> int:
+    """Удаление событий старше before, опубликованных и учтенных в аналитике"""
+    result = await db.execute(
+        delete(OutboxEvent)
+        .where(OutboxEvent.published_at < before, OutboxEvent.rolled_up_at.is_not(None))
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount
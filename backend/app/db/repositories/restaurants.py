@@ -0,0 +1,93 @@
+from typing import List, Optional, Tuple
+from sqlalchemy import literal_column, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.models.restaurant import Restaurant, Dish
+
+async def get_restaurants(
+    db: AsyncSession,
+    after_id: Optional[int] = None,
+    limit: Optional[int] = None,
+    is_active: Optional[bool] = None,
+    name_prefix: Optional[str] = None
+) -> List[Restaurant]:
+    """Keyset-выборка по id: WHERE id > after_id ORDER BY id LIMIT limit"""
+    query = select(Restaurant)
+    if after_id is not None:
+        query = query.where(Restaurant.id > after_id)
+    if is_active is not None:
+        query = query.where(Restaurant.is_active == is_active)
+    if name_prefix:
+        query = query.where(Restaurant.name.startswith(name_prefix, autoescape=True))
+    result = await db.execute(query.order_by(Restaurant.id).limit(limit))
+    return list(result.scalars().all())
+
+async def get_restaurant(db: AsyncSession, restaurant_id: int) -> Optional[Restaurant]:
+    return await db.get(Restaurant, restaurant_id)
+
+async def get_restaurants_by_ids(db: AsyncSession, restaurant_ids: List[int]) -> List[Restaurant]:
+    result = await db.execute(select(Restaurant).where(Restaurant.id.in_(restaurant_ids)))
+    return list(result.scalars().all())
+
+async def get_dishes(
+    db: AsyncSession,
+    restaurant_id: int,
+    after_id: Optional[int] = None,
+    limit: Optional[int] = None,
+    name_prefix: Optional[str] = None
+) -> List[Dish]:
+    """Keyset-выборка блюд ресторана по id"""
+    query = select(Dish).where(Dish.restaurant_id == restaurant_id)
+    if after_id is not None:
+        query = query.where(Dish.id > after_id)
+    if name_prefix:
+        query = query.where(Dish.name.startswith(name_prefix, autoescape=True))
+    result = await db.execute(query.order_by(Dish.id).limit(limit))
+    return list(result.scalars().all())
+
+async def get_dishes_by_ids(db: AsyncSession, dish_ids: List[int]) -> List[Dish]:
+    result = await db.execute(select(Dish).where(Dish.id.in_(dish_ids)))
+    return list(result.scalars().all())
+
+async def create_restaurant(
+    db: AsyncSession,
+    name: str,
+    location_lat: float,
+    location_lon: float,
+    description: Optional[str] = None
+) -> Restaurant:
+    restaurant = Restaurant(
+        name=name,
+        description=description,
+        location_lat=location_lat,
+        location_lon=location_lon,
+    )
+    db.add(restaurant)
+    await db.commit()
+    return restaurant
+
+async def create_dish(db: AsyncSession, data: dict) -> Dish:
+    dish = Dish(**data)
+    db.add(dish)
+    await db.commit()
+    return dish
+
+async def upsert_dishes(db: AsyncSession, restaurant_id: int, rows: List[dict]) -> Tuple[int, int]:
+    """
+    Пакетная вставка или обновление блюд ресторана по названию.
+
+    Один INSERT ... ON CONFLICT (restaurant_id, name) DO UPDATE на пачку;
+    названия в пачке должны быть уникальны. Возвращает (добавлено, обновлено).
+    """
+    if not rows:
+        return 0, 0
+    dishes = Dish.__table__
+    stmt = insert(dishes).values([{**row, "restaurant_id": restaurant_id} for row in rows])
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[dishes.c.restaurant_id, dishes.c.name],
+        set_={"price": stmt.excluded.price, "description": stmt.excluded.description}
+    ).returning(literal_column("xmax = 0"))  # Строка вставлена, а не обновлена
+    result = await db.execute(stmt)
+    inserted = sum(1 for (is_new,) in result.all() if is_new)
+    await db.commit()
+    return inserted, len(rows) - inserted
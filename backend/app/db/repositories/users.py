@@ -1,43 +1,70 @@
-from sqlalchemy.orm import Session
+from typing import List, Optional
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.db.models.user import User
-from app.core.security import get_password_hash, verify_password
+from app.core.security import get_password_hash, verify_password, verify_and_update_password
+from app.services.principals import invalidate_principal
 
-def get_user_by_email(db: Session, email: str) -> User | None:
-    return db.query(User).filter(User.email == email).first()
+async def get_user_by_email(db: AsyncSession, email: str) -> Optional[User]:
+    result = await db.execute(select(User).where(User.email == email))
+    return result.scalars().first()
 
-def create_user(db: Session, email: str, password: str, role: str = "customer") -> User:
-    hashed_password = get_password_hash(password)
+async def get_user_by_id(db: AsyncSession, user_id: int) -> Optional[User]:
+    return await db.get(User, user_id)
+
+async def create_user(db: AsyncSession, email: str, password: str, role: str = "customer") -> User:
+    hashed_password = await get_password_hash(password)
     user = User(email=email, password=hashed_password, role=role)
     db.add(user)
-    db.commit()
-    db.refresh(user)
+    await db.commit()
+    await db.refresh(user)
+    return user
+
+async def authenticate(db: AsyncSession, email: str, password: str) -> Optional[User]:
+    """Проверка пароля; хеш пересчитывается, если изменилась стоимость bcrypt"""
+    user = await get_user_by_email(db, email)
+    if not user:
+        return None
+    valid, new_hash = await verify_and_update_password(password, user.password)
+    if not valid:
+        return None
+    if new_hash:
+        user.password = new_hash
+        await db.commit()
     return user
 
-def update_user(
-    db: Session,
+async def update_user(
+    db: AsyncSession,
     user_id: int,
     data: dict
-) -> User:
-    user = db.query(User).filter(User.id == user_id).first()
+) -> Optional[User]:
+    user = await db.get(User, user_id)
     if not user:
         return None
+    old_email = user.email
     for key, value in data.items():
         setattr(user, key, value)
-    db.commit()
+    await db.commit()
+    await invalidate_principal(old_email, user.email)
     return user
 
-def change_password(
-    db: Session,
+async def change_password(
+    db: AsyncSession,
     user_id: int,
     old_password: str,
     new_password: str
 ) -> bool:
-    user = db.query(User).filter(User.id == user_id).first()
-    if not user or not verify_password(old_password, user.password):
+    user = await db.get(User, user_id)
+    if not user or not await verify_password(old_password, user.password):
         return False
-    user.password = get_password_hash(new_password)
-    db.commit()
+    user.password = await get_password_hash(new_password)
+    await db.commit()
+    await invalidate_principal(user.email)
     return True
 
-def get_users(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(User).offset(skip).limit(limit).all()
\ No newline at end of file
+async def get_users(db: AsyncSession, after_id: Optional[int] = None, limit: int = 100) -> List[User]:
+    query = select(User)
+    if after_id is not None:
+        query = query.where(User.id > after_id)
+    result = await db.execute(query.order_by(User.id).limit(limit))
+    return list(result.scalars().all())
@@ -0,0 +1,47 @@
+from typing import AsyncIterator
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import declarative_base
+from app.core.config import settings
+from app.core.db_metrics import TimedQueuePool, instrument_engine
+
+
+def _async_database_url(url: str) -> str:
+    """Приводит DATABASE_URL к асинхронному драйверу asyncpg"""
+    for prefix in ("postgresql+psycopg2://", "postgresql://", "postgres://"):
+        if url.startswith(prefix):
+            return "postgresql+asyncpg://" + url[len(prefix):]
+    return url
+
+
+def _pool_options(url: str) -> dict:
+    """Настройки пула; SQLite (бенчмарки) использует собственный пул драйвера"""
+    if url.startswith("sqlite"):
+        return {}
+    return {
+        "poolclass": TimedQueuePool,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+
+
+engine = create_async_engine(
+    _async_database_url(settings.DATABASE_URL),
+    echo=settings.DB_ECHO,
+    **_pool_options(settings.DATABASE_URL)
+)
+instrument_engine(engine)
+
+# expire_on_commit=False: объекты остаются доступными после commit
+# без повторного SELECT (ленивые загрузки в async-режиме запрещены)
+SessionLocal = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+Base = declarative_base()
+
+
+async def get_db() -> AsyncIterator[AsyncSession]:
+    """DI для асинхронной сессии БД"""
+    async with SessionLocal() as session:
+        yield session
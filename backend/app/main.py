@@ -1,10 +1,49 @@
-from fastapi import FastAPI
-from app.api.v1 import auth, restaurants, cart, orders, couriers, users
+from fastapi import FastAPI, Response
+from fastapi.responses import ORJSONResponse
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+from app.api.v1 import auth, restaurants, cart, orders, couriers, users, analytics, profiling
+from app.core.config import settings
+from app.core.db_metrics import DBMetricsMiddleware
+from app.core.hashing import password_hasher
+from app.core.metrics import RequestMetricsMiddleware
+from app.core.profiling import ProfilingMiddleware, profiler
+from app.services.order_events import order_event_broker
 
-app = FastAPI()
+app = FastAPI(default_response_class=ORJSONResponse)
+app.add_middleware(ProfilingMiddleware)
+app.add_middleware(DBMetricsMiddleware)
+app.add_middleware(RequestMetricsMiddleware)
 app.include_router(auth.router, prefix="/api/v1/auth")
 app.include_router(restaurants.router, prefix="/api/v1")
 app.include_router(cart.router, prefix="/api/v1")
 app.include_router(orders.router, prefix="/api/v1")
 app.include_router(couriers.router, prefix="/api/v1")
-app.include_router(users.router, prefix="/api/v1/users")
\ No newline at end of file
+app.include_router(users.router, prefix="/api/v1/users")
+app.include_router(analytics.router, prefix="/api/v1")
+app.include_router(profiling.router, prefix="/api/v1")
+
+
+@app.get("/metrics", include_in_schema=False)
+def prometheus_metrics():
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+
+@app.on_event("startup")
+async def start_profiler():
+    if settings.PROFILING_ENABLED:
+        profiler.configure(enabled=True)
+
+
+@app.on_event("shutdown")
+async def stop_profiler():
+    profiler.configure(enabled=False)
+
+
+@app.on_event("shutdown")
+async def stop_order_event_broker():
+    await order_event_broker.close()
+
+
+@app.on_event("shutdown")
+def shutdown_password_hasher():
+    password_hasher.shutdown()
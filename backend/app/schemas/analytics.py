@@ -0,0 +1,19 @@
+from datetime import datetime
+from pydantic import BaseModel
+from typing import Optional
+
+class RestaurantStats(BaseModel):
+    restaurant_id: int
+    bucket: datetime  # Начало часа или дня (UTC)
+    orders_count: int
+    revenue: float
+    canceled_count: int
+    delivered_count: int
+    avg_delivery_minutes: Optional[float]  # None, если доставок не было
+
+class TopDish(BaseModel):
+    dish_id: int
+    restaurant_id: int
+    name: str
+    quantity: int
+    revenue: float
@@ -0,0 +1,45 @@
+from pydantic import BaseModel
+from pydantic.fields import SHAPE_LIST, SHAPE_SINGLETON
+from typing import Dict, List, Optional, Tuple, Type
+
+# Поле схемы -> (имя, вложенная схема или None, список ли это)
+_Plan = List[Tuple[str, Optional[Type["LeanModel"]], bool]]
+_plans: Dict[type, _Plan] = {}
+
+
+class LeanModel(BaseModel):
+    """
+    Схема ответа для данных, прочитанных из ORM.
+
+    row() собирает словарь из атрибутов объекта по полям схемы без
+    валидации pydantic и jsonable_encoder: данные из БД уже имеют нужные
+    типы, а datetime сериализует ORJSONResponse. Схема по-прежнему
+    описывает ответ в OpenAPI через response_model.
+    """
+
+    @classmethod
+    def _plan(cls) -> _Plan:
+        plan = _plans.get(cls)
+        if plan is None:
+            plan = []
+            for name, field in cls.__fields__.items():
+                nested = field.type_ if isinstance(field.type_, type) and issubclass(field.type_, LeanModel) else None
+                if nested is not None and field.shape not in (SHAPE_SINGLETON, SHAPE_LIST):
+                    raise TypeError(f"{cls.__name__}.{name}: unsupported field shape")
+                plan.append((name, nested, field.shape == SHAPE_LIST))
+            _plans[cls] = plan
+        return plan
+
+    @classmethod
+    def row(cls, obj) -> dict:
+        result = {}
+        for name, nested, many in cls._plan():
+            value = getattr(obj, name)
+            if nested is not None and value is not None:
+                value = [nested.row(item) for item in value] if many else nested.row(value)
+            result[name] = value
+        return result
+
+    @classmethod
+    def rows(cls, objs) -> List[dict]:
+        return [cls.row(obj) for obj in objs]
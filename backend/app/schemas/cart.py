@@ -0,0 +1,31 @@
+from pydantic import BaseModel, Field, validator
+from typing import Dict, List
+
+class CartItemsUpdate(BaseModel):
+    items: Dict[int, int] = Field(..., example={1: 2, 3: 0})  # dish_id -> количество, 0 удаляет
+
+    @validator("items")
+    def validate_items(cls, value):
+        if not value:
+            raise ValueError("items must not be empty")
+        if len(value) > 100:
+            raise ValueError("too many items")
+        for dish_id, quantity in value.items():
+            if dish_id <= 0:
+                raise ValueError("dish id must be greater than 0")
+            if quantity < 0:
+                raise ValueError("quantity must not be negative")
+        return value
+
+class CartLine(BaseModel):
+    dish_id: int
+    restaurant_id: int
+    name: str
+    price: float
+    quantity: int
+    line_total: float
+
+class CartView(BaseModel):
+    items: List[CartLine]
+    unavailable: List[int] = []  # Блюда из корзины, которых больше нет в меню
+    total: float
@@ -0,0 +1,17 @@
+from datetime import datetime
+from pydantic import BaseModel, Field
+from typing import Optional
+from app.schemas.base import LeanModel
+
+class CourierLocation(BaseModel):
+    lat: float = Field(..., ge=-90, le=90, example=55.751244)
+    lon: float = Field(..., ge=-180, le=180, example=37.618423)
+
+class CourierOrder(LeanModel):
+    id: int
+    user_id: int
+    restaurant_id: Optional[int]
+    status: str
+    total: float
+    created_at: datetime
+    distance_km: Optional[float]  # None, если позиция курьера неизвестна
@@ -0,0 +1,21 @@
+from datetime import datetime
+from uuid import uuid4
+from pydantic import BaseModel, Field
+from typing import Literal, Optional
+
+class NotificationMessage(BaseModel):
+    id: str = Field(default_factory=lambda: uuid4().hex)
+    channel: Literal["push", "email"] = "push"
+    user_id: Optional[int] = None
+    email: Optional[str] = None
+    subject: Optional[str] = None
+    message: str
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+
+    @classmethod
+    def parse_body(cls, body: bytes) -> "NotificationMessage":
+        """Разбор тела сообщения; поддерживает старый формат 'user_id:message'"""
+        if body[:1] == b"{":
+            return cls.parse_raw(body)
+        user_id, message = body.decode().split(":", 1)
+        return cls(user_id=int(user_id), message=message)
@@ -0,0 +1,52 @@
+from datetime import datetime
+from pydantic import BaseModel, Field
+from typing import List, Literal, Optional
+from app.schemas.base import LeanModel
+from app.schemas.pagination import Page
+
+OrderStatus = Literal["created", "paid", "cooking", "delivering", "delivered", "canceled"]
+
+class OrderStatusUpdate(BaseModel):
+    status: OrderStatus = Field(..., example="cooking")
+
+class OrderStatusBulkUpdate(BaseModel):
+    order_ids: List[int] = Field(..., min_items=1, max_items=1000, example=[1, 2, 3])
+    status: OrderStatus = Field(..., example="cooking")
+
+class OrderStatusBulkResult(BaseModel):
+    updated: List[int]  # Заказы, сменившие статус
+    skipped: List[int]  # Не найдены, недоступны или переход недопустим
+
+class OrderStatusHistoryEntry(BaseModel):
+    from_status: Optional[str]
+    to_status: str
+    changed_by: Optional[int]
+    changed_at: datetime
+
+    class Config:
+        orm_mode = True
+
+class OrderItemInDB(LeanModel):
+    dish_id: int
+    dish_name: Optional[str]
+    quantity: int
+    price_at_order: float
+
+    class Config:
+        orm_mode = True
+
+class OrderInDB(LeanModel):
+    id: int
+    status: OrderStatus
+    total: float
+    restaurant_id: Optional[int]
+    courier_id: Optional[int]
+    created_at: datetime
+    delivered_at: Optional[datetime]
+    items: List[OrderItemInDB]
+
+    class Config:
+        orm_mode = True
+
+# Параметризованная модель создается один раз при импорте
+OrderPage = Page[OrderInDB]
@@ -0,0 +1,18 @@
+from pydantic import BaseModel, confloat
+from typing import List, Optional
+
+class ProfilingUpdate(BaseModel):
+    enabled: Optional[bool] = None
+    sample_rate: Optional[confloat(gt=0, le=1)] = None  # Доля профилируемых запросов
+    interval: Optional[confloat(ge=0.001, le=1)] = None  # Период снятия стеков, секунды
+
+class RouteProfile(BaseModel):
+    route: str
+    requests: int  # Профилированные запросы
+    samples: int  # Снятые стеки
+
+class ProfilingStatus(BaseModel):
+    enabled: bool
+    sample_rate: float
+    interval: float
+    routes: List[RouteProfile]
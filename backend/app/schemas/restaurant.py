@@ -0,0 +1,63 @@
+from pydantic import BaseModel, Field, constr, validator
+from typing import List, Optional
+from app.schemas.base import LeanModel
+
+class RestaurantCreate(BaseModel):
+    name: str
+    description: Optional[str] = None
+    location: str = Field(..., example="55.751244,37.618423")  # 'широта,долгота'
+
+    @validator("location")
+    def validate_location(cls, value):
+        try:
+            lat, lon = (float(part) for part in value.split(","))
+        except ValueError:
+            raise ValueError("location must be 'lat,lon'")
+        if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+            raise ValueError("location is out of range")
+        return value
+
+    @property
+    def coordinates(self):
+        lat, lon = (float(part) for part in self.location.split(","))
+        return lat, lon
+
+class RestaurantInDB(LeanModel):
+    id: int
+    name: str
+    description: Optional[str] = None
+    location_lat: Optional[float] = None
+    location_lon: Optional[float] = None
+    is_active: Optional[bool] = True
+
+    class Config:
+        orm_mode = True
+
+class RestaurantNearby(RestaurantInDB):
+    distance_km: float
+
+class DishCreate(BaseModel):
+    restaurant_id: int
+    name: str
+    description: Optional[str] = None
+    price: float = Field(..., gt=0)
+
+class DishInDB(DishCreate, LeanModel):
+    id: int
+
+    class Config:
+        orm_mode = True
+
+class DishImportRow(BaseModel):
+    name: constr(strip_whitespace=True, min_length=1, max_length=255)
+    description: Optional[str] = None
+    price: float = Field(..., gt=0)
+
+class DishImportError(BaseModel):
+    line: int  # Номер строки входных данных, начиная с 1
+    error: str
+
+class DishImportResult(BaseModel):
+    inserted: int
+    updated: int
+    errors: List[DishImportError]
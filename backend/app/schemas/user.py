@@ -1,5 +1,6 @@
 from pydantic import BaseModel, EmailStr
 from typing import Optional
+from app.schemas.base import LeanModel
 
 class UserBase(BaseModel):
     email: EmailStr
@@ -14,7 +15,7 @@ class UserChangePassword(BaseModel):
     old_password: str
     new_password: str
 
-class UserInDB(UserBase):
+class UserInDB(UserBase, LeanModel):
     id: int
     role: str
     address: Optional[str] = None
@@ -0,0 +1,81 @@
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Iterable
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.models.outbox import OutboxEvent
+from app.db.repositories import analytics as analytics_repo
+from app.db.repositories.analytics import RESTAURANT_COUNTERS
+
+ROLLUP_EVENTS = {"order.created", "order.canceled", "order.delivered"}
+
+
+def _utc(value: datetime) -> datetime:
+    return value.astimezone(timezone.utc) if value.tzinfo is not None else value.replace(tzinfo=timezone.utc)
+
+
+class AnalyticsRollup:
+    """
+    Инкрементальные агрегаты заказов для отчетов.
+
+    Применяется воркером аналитики (app.workers.analytics) к каждой пачке
+    событий outbox в той же транзакции, что и пометка событий учтенными,
+    поэтому каждое событие учитывается ровно один раз. Приращения сначала
+    суммируются в памяти, затем записываются одним upsert на таблицу.
+
+    - order.created: заказ и выручка ресторанов, продажи блюд
+    - order.canceled: счетчик отмен, выручка и продажи уменьшаются
+    - order.delivered: число доставок и суммарное время доставки
+    """
+
+    @staticmethod
+    async def apply(db: AsyncSession, events: Iterable[OutboxEvent]):
+        events = [event for event in events if event.event_type in ROLLUP_EVENTS]
+        if not events:
+            return
+        orders, items = await analytics_repo.get_order_facts(db, {event.aggregate_id for event in events})
+        items_by_order = defaultdict(list)
+        for order_id, dish_id, restaurant_id, quantity, price in items:
+            items_by_order[order_id].append((dish_id, restaurant_id, quantity, price))
+
+        restaurant_stats = defaultdict(lambda: dict.fromkeys(RESTAURANT_COUNTERS, 0))
+        dish_stats = {}
+        for event in events:
+            if event.aggregate_id not in orders:
+                continue
+            created_at, delivered_at = orders[event.aggregate_id]
+            created_at = _utc(created_at)
+            bucket = created_at.replace(minute=0, second=0, microsecond=0)
+            order_items = items_by_order[event.aggregate_id]
+            restaurant_ids = {restaurant_id for _, restaurant_id, _, _ in order_items}
+
+            if event.event_type == "order.delivered":
+                if delivered_at is None:
+                    continue
+                seconds = (_utc(delivered_at) - created_at).total_seconds()
+                for restaurant_id in restaurant_ids:
+                    stats = restaurant_stats[(restaurant_id, bucket)]
+                    stats["delivered_count"] += 1
+                    stats["delivery_seconds"] += seconds
+                continue
+
+            sign = 1 if event.event_type == "order.created" else -1
+            for restaurant_id in restaurant_ids:
+                stats = restaurant_stats[(restaurant_id, bucket)]
+                stats["orders_count" if sign > 0 else "canceled_count"] += 1
+            for dish_id, restaurant_id, quantity, price in order_items:
+                restaurant_stats[(restaurant_id, bucket)]["revenue"] += sign * quantity * price
+                stats = dish_stats.setdefault(
+                    (dish_id, created_at.date()),
+                    {"restaurant_id": restaurant_id, "quantity": 0, "revenue": 0}
+                )
+                stats["quantity"] += sign * quantity
+                stats["revenue"] += sign * quantity * price
+
+        await analytics_repo.add_restaurant_stats(db, [
+            {"restaurant_id": restaurant_id, "bucket": bucket, **stats}
+            for (restaurant_id, bucket), stats in restaurant_stats.items()
+        ])
+        await analytics_repo.add_dish_stats(db, [
+            {"dish_id": dish_id, "day": day, **stats}
+            for (dish_id, day), stats in dish_stats.items()
+        ])
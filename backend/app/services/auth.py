@@ -1,21 +1,18 @@
+import hashlib
+import time
+from collections import OrderedDict
 from datetime import datetime, timedelta
-from jose import jwt
-from passlib.context import CryptContext
+from typing import Optional
+from jose import JWTError, jwt
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.config import settings
-from fastapi import HTTPException, status
-from app.db.repositories.users import get_user_by_email
+from fastapi import Depends, HTTPException, status
+from fastapi.security import OAuth2PasswordBearer
+from app.db.session import get_db
+from app.db.repositories.users import get_user_by_email, authenticate
+from app.services.principals import get_principal, set_principal, principal_from_user
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
-
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    """Проверка соответствия пароля и его хеша"""
-    return pwd_context.verify(plain_password, hashed_password)
-
-
-def get_password_hash(password: str) -> str:
-    """Генерация хеша пароля"""
-    return pwd_context.hash(password)
+oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/auth/login")
 
 
 def create_access_token(data: dict, expires_delta: timedelta = None) -> str:
@@ -31,8 +28,8 @@ def create_access_token(data: dict, expires_delta: timedelta = None) -> str:
 
 async def authenticate_user(email: str, password: str, db):
     """Аутентификация пользователя"""
-    user = await get_user_by_email(db, email)
-    if not user or not verify_password(password, user.password):
+    user = await authenticate(db, email, password)
+    if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Неверные учетные данные",
@@ -41,22 +38,96 @@ async def authenticate_user(email: str, password: str, db):
     return user
 
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
-    """Получение текущего пользователя из токена"""
+class TokenCache:
+    """
+    LRU-кэш проверенных JWT в памяти процесса.
+
+    Ключ - sha256 токена, запись живет не дольше ttl и не дольше exp токена.
+    Кэшируются только успешно проверенные токены.
+    """
+
+    def __init__(self, maxsize: int, ttl: int):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+
+    @staticmethod
+    def _key(token: str) -> str:
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    def get(self, token: str) -> Optional[dict]:
+        key = self._key(token)
+        item = self._data.get(key)
+        if item is None:
+            return None
+        payload, expires_at = item
+        if expires_at <= time.time():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return payload
+
+    def set(self, token: str, payload: dict):
+        expires_at = time.time() + self.ttl
+        if payload.get("exp") is not None:
+            expires_at = min(expires_at, float(payload["exp"]))
+        key = self._key(token)
+        self._data[key] = (payload, expires_at)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def clear(self):
+        self._data.clear()
+
+
+token_cache = TokenCache(settings.AUTH_TOKEN_CACHE_SIZE, settings.AUTH_TOKEN_CACHE_TTL)
+
+
+def decode_access_token(token: str) -> dict:
+    """Проверка JWT с кэшированием результата; JWTError при невалидном токене"""
+    payload = token_cache.get(token)
+    if payload is None:
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+        token_cache.set(token, payload)
+    return payload
+
+
+async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)) -> dict:
+    """
+    Получение текущего пользователя из токена.
+
+    Возвращает словарь {id, role, email}. На горячем пути обходится без БД:
+    токен проверяется через LRU-кэш, пользователь читается из кэша в Redis.
+    """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Не удалось подтвердить учетные данные",
         headers={"WWW-Authenticate": "Bearer"},
     )
     try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+        payload = decode_access_token(token)
         email: str = payload.get("sub")
         if email is None:
             raise credentials_exception
     except JWTError:
         raise credentials_exception
 
-    user = get_user_by_email(db, email=email)
-    if user is None:
-        raise credentials_exception
-    return user
\ No newline at end of file
+    principal = await get_principal(email)
+    if principal is None:
+        user = await get_user_by_email(db, email=email)
+        if user is None:
+            raise credentials_exception
+        principal = principal_from_user(user)
+        await set_principal(principal)
+    return principal
+
+
+async def get_admin_user(user: dict = Depends(get_current_user)) -> dict:
+    """Текущий пользователь с ролью admin, иначе 403"""
+    if user["role"] != "admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Forbidden"
+        )
+    return user
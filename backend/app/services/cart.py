@@ -1,20 +1,100 @@
-import redis
-from app.core.config import REDIS_URL
+from typing import Dict
+from app.core import metrics
+from app.core.config import settings
+from app.db.redis import redis_client
+
+# KEYS[1] - корзина, ARGV[1] - TTL, далее пары dish_id, delta.
+# Позиции с количеством <= 0 удаляются.
+INCR_ITEMS_SCRIPT = redis_client.register_script("""
+local key = KEYS[1]
+for i = 2, #ARGV, 2 do
+    local quantity = redis.call('HINCRBY', key, ARGV[i], ARGV[i + 1])
+    if quantity <= 0 then
+        redis.call('HDEL', key, ARGV[i])
+    end
+end
+if redis.call('EXISTS', key) == 1 then
+    redis.call('EXPIRE', key, ARGV[1])
+end
+return redis.call('HLEN', key)
+""")
+
+# KEYS[1] - корзина, ARGV[1] - TTL, далее пары dish_id, quantity.
+# Количество 0 удаляет позицию.
+SET_ITEMS_SCRIPT = redis_client.register_script("""
+local key = KEYS[1]
+for i = 2, #ARGV, 2 do
+    if tonumber(ARGV[i + 1]) > 0 then
+        redis.call('HSET', key, ARGV[i], ARGV[i + 1])
+    else
+        redis.call('HDEL', key, ARGV[i])
+    end
+end
+if redis.call('EXISTS', key) == 1 then
+    redis.call('EXPIRE', key, ARGV[1])
+end
+return redis.call('HLEN', key)
+""")
+
+
+def _flatten(items: Dict[int, int]) -> list:
+    args = [settings.CART_TTL]
+    for dish_id, quantity in items.items():
+        args.extend((dish_id, quantity))
+    return args
 
-r = redis.Redis.from_url(REDIS_URL)
 
 class CartService:
+    """
+    Корзина пользователя - hash cart:{user_id} в Redis (dish_id -> quantity).
+
+    Изменения выполняются Lua-скриптами за один round-trip, каждое
+    изменение продлевает срок жизни корзины. Время каждой операции
+    попадает в метрику redis_command_duration_seconds.
+    """
+
+    @staticmethod
+    def _key(user_id: int) -> str:
+        return f"cart:{user_id}"
+
+    @staticmethod
+    @metrics.timed(metrics.REDIS_COMMAND_DURATION.labels("cart.add_items"))
+    async def add_items(user_id: int, items: Dict[int, int]):
+        """Изменение количества на delta; отрицательные значения уменьшают"""
+        if items:
+            await INCR_ITEMS_SCRIPT(keys=[CartService._key(user_id)], args=_flatten(items))
+
+    @staticmethod
+    async def add_to_cart(user_id: int, dish_id: int, quantity: int):
+        await CartService.add_items(user_id, {dish_id: quantity})
+
+    @staticmethod
+    @metrics.timed(metrics.REDIS_COMMAND_DURATION.labels("cart.set_items"))
+    async def set_items(user_id: int, items: Dict[int, int]):
+        """Установка абсолютного количества; 0 удаляет позицию"""
+        if items:
+            await SET_ITEMS_SCRIPT(keys=[CartService._key(user_id)], args=_flatten(items))
+
+    @staticmethod
+    @metrics.timed(metrics.REDIS_COMMAND_DURATION.labels("cart.remove_item"))
+    async def remove_item(user_id: int, dish_id: int):
+        await redis_client.hdel(CartService._key(user_id), dish_id)
+
     @staticmethod
-    def add_to_cart(user_id: int, dish_id: int, quantity: int):
-        cart_key = f"cart:{user_id}"
-        r.hincrby(cart_key, dish_id, quantity)
+    @metrics.timed(metrics.REDIS_COMMAND_DURATION.labels("cart.get_cart"))
+    async def get_cart(user_id: int) -> Dict[int, int]:
+        items = await redis_client.hgetall(CartService._key(user_id))
+        return {int(dish_id): int(quantity) for dish_id, quantity in items.items()}
 
     @staticmethod
-    def get_cart(user_id: int) -> dict:
-        cart_key = f"cart:{user_id}"
-        return {k.decode(): v.decode() for k, v in r.hgetall(cart_key).items()}
+    @metrics.timed(metrics.REDIS_COMMAND_DURATION.labels("cart.checkout_snapshot"))
+    async def checkout_snapshot(user_id: int) -> Dict[int, int]:
+        """Атомарное чтение и удаление корзины (MULTI: HGETALL + DEL)"""
+        async with redis_client.pipeline(transaction=True) as pipe:
+            items, _ = await pipe.hgetall(CartService._key(user_id)).delete(CartService._key(user_id)).execute()
+        return {int(dish_id): int(quantity) for dish_id, quantity in items.items()}
 
     @staticmethod
-    def clear_cart(user_id: int):
-        cart_key = f"cart:{user_id}"
-        r.delete(cart_key)
\ No newline at end of file
+    @metrics.timed(metrics.REDIS_COMMAND_DURATION.labels("cart.clear_cart"))
+    async def clear_cart(user_id: int):
+        await redis_client.delete(CartService._key(user_id))
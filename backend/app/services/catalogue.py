@@ -0,0 +1,112 @@
+import orjson
+from typing import Awaitable, Callable, Dict, Iterable, Optional
+from redis.exceptions import RedisError
+from app.core.config import settings
+from app.db.redis import redis_client
+
+CATALOGUE_VERSION_KEY = "catalogue:version"
+CATALOGUE_KEY = "catalogue:{version}:{name}"
+
+
+def dumps(data) -> bytes:
+    """Сериализация ответа каталога в JSON"""
+    return orjson.dumps(data)
+
+
+class CatalogueCache:
+    """
+    Read-through кэш каталога ресторанов в Redis.
+
+    Ответы хранятся уже сериализованными в JSON. Все ключи содержат номер
+    версии каталога; запись в каталог увеличивает версию, после чего
+    читатели обращаются к новым ключам, а старые истекают по TTL.
+    """
+
+    @staticmethod
+    async def get_version() -> Optional[int]:
+        try:
+            version = await redis_client.get(CATALOGUE_VERSION_KEY)
+        except RedisError:
+            return None
+        return int(version) if version else 0
+
+    @staticmethod
+    async def bump_version():
+        """Вызывается после commit любых изменений каталога"""
+        try:
+            await redis_client.incr(CATALOGUE_VERSION_KEY)
+        except RedisError:
+            pass
+
+    @staticmethod
+    async def get_or_load(name: str, loader: Callable[[], Awaitable[object]]) -> Optional[bytes]:
+        """
+        Чтение записи name текущей версии каталога; при промахе данные
+        строит loader. Если loader вернул None, ничего не кэшируется.
+        """
+        version = await CatalogueCache.get_version()
+        if version is not None:
+            cache_key = CATALOGUE_KEY.format(version=version, name=name)
+            try:
+                cached = await redis_client.get(cache_key)
+            except RedisError:
+                cached = None
+            if cached is not None:
+                return cached
+
+        data = await loader()
+        if data is None:
+            return None
+        payload = dumps(data)
+        if version is not None:
+            try:
+                await redis_client.set(cache_key, payload, ex=settings.CATALOGUE_CACHE_TTL)
+            except RedisError:
+                pass
+        return payload
+
+    @staticmethod
+    async def get_many(
+        prefix: str,
+        ids: Iterable[int],
+        loader: Callable[[list], Awaitable[Dict[int, dict]]]
+    ) -> Dict[int, dict]:
+        """
+        Пакетное чтение записей {prefix}:{id} одним MGET.
+
+        Промахи загружаются одним вызовом loader(missing_ids) и
+        записываются в кэш одним pipeline. Отсутствующие в БД id
+        в результат не попадают.
+        """
+        ids = list(dict.fromkeys(ids))
+        if not ids:
+            return {}
+        found: Dict[int, dict] = {}
+        missing = ids
+        version = await CatalogueCache.get_version()
+        if version is not None:
+            keys = [CATALOGUE_KEY.format(version=version, name=f"{prefix}:{item_id}") for item_id in ids]
+            try:
+                cached = await redis_client.mget(keys)
+            except RedisError:
+                cached = [None] * len(ids)
+            missing = []
+            for item_id, raw in zip(ids, cached):
+                if raw is None:
+                    missing.append(item_id)
+                else:
+                    found[item_id] = orjson.loads(raw)
+
+        if missing:
+            loaded = await loader(missing)
+            found.update(loaded)
+            if version is not None and loaded:
+                try:
+                    async with redis_client.pipeline(transaction=False) as pipe:
+                        for item_id, data in loaded.items():
+                            key = CATALOGUE_KEY.format(version=version, name=f"{prefix}:{item_id}")
+                            pipe.set(key, dumps(data), ex=settings.CATALOGUE_CACHE_TTL)
+                        await pipe.execute()
+                except RedisError:
+                    pass
+        return found
@@ -0,0 +1,124 @@
+import logging
+from typing import Optional, Tuple
+from redis.exceptions import RedisError
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.core.pagination import PageParams, encode_cursor
+from app.db.redis import redis_client
+from app.db.repositories.orders import get_open_orders, get_open_orders_ranked
+from app.services.geo import restaurant_locator
+
+logger = logging.getLogger(__name__)
+
+
+class CourierLocationService:
+    """Последнее известное местоположение курьеров в Redis"""
+
+    @staticmethod
+    def _key(courier_id: int) -> str:
+        return f"courier:location:{courier_id}"
+
+    @staticmethod
+    async def set_location(courier_id: int, lat: float, lon: float) -> bool:
+        """False, если Redis недоступен и позиция не сохранена"""
+        try:
+            await redis_client.set(
+                CourierLocationService._key(courier_id),
+                f"{lat},{lon}",
+                ex=settings.COURIER_LOCATION_TTL,
+            )
+        except RedisError as e:
+            logger.warning("Failed to store courier location: %s", e)
+            return False
+        return True
+
+    @staticmethod
+    async def get_location(courier_id: int) -> Optional[Tuple[float, float]]:
+        try:
+            raw = await redis_client.get(CourierLocationService._key(courier_id))
+        except RedisError:
+            return None
+        if not raw:
+            return None
+        lat, lon = raw.decode().split(",")
+        return float(lat), float(lon)
+
+
+def _order_to_dict(order, distance_km: Optional[float] = None) -> dict:
+    """Элемент ленты в форме CourierOrder, без валидации"""
+    return {
+        "id": order.id,
+        "user_id": order.user_id,
+        "restaurant_id": order.restaurant_id,
+        "status": order.status,
+        "total": order.total,
+        "created_at": order.created_at,
+        "distance_km": distance_km,
+    }
+
+
+async def get_courier_feed(
+    db: AsyncSession,
+    page: PageParams,
+    position: Optional[Tuple[float, float]] = None,
+    radius_km: float = settings.COURIER_FEED_RADIUS_KM
+) -> dict:
+    """
+    Лента заказов для курьера.
+
+    С известной позицией - заказы ресторанов в радиусе, ближайшие первыми;
+    рестораны ищутся в пространственном индексе, заказы - по частичному
+    индексу открытых заказов. За ними идут заказы без точки забора (блюда
+    из нескольких ресторанов) с distance_km = null. Без позиции - все
+    открытые заказы по id.
+    Курсоры: {"d": расстояние, "rid": ресторан, "id": заказ} для заказов
+    ресторанов рядом, {"np": заказ} для заказов без точки забора.
+    """
+    if position is None:
+        orders = await get_open_orders(db, after_id=page.after_id, limit=page.limit + 1)
+        items = [_order_to_dict(order) for order in orders[:page.limit]]
+        next_cursor = encode_cursor({"id": items[-1]["id"]}) if len(orders) > page.limit else None
+        return {"items": items, "next_cursor": next_cursor}
+
+    items = []
+    no_pickup_after = 0
+    if page.after and "np" in page.after:
+        try:
+            no_pickup_after = int(page.after["np"])
+        except (TypeError, ValueError):
+            raise ValueError("Invalid cursor")
+    else:
+        nearby = await restaurant_locator.nearby(
+            db, position[0], position[1], radius_km, settings.COURIER_FEED_MAX_RESTAURANTS
+        )
+        distances = {r["id"]: r["distance_km"] for r in nearby}
+        ranked = sorted((distance, restaurant_id) for restaurant_id, distance in distances.items())
+
+        after = None
+        if page.after:
+            try:
+                cursor = (float(page.after["d"]), int(page.after["rid"]))
+                after = (cursor[1], int(page.after["id"]))
+            except (KeyError, TypeError, ValueError):
+                raise ValueError("Invalid cursor")
+            distances.setdefault(cursor[1], cursor[0])
+            ranked = [item for item in ranked if item > cursor]
+
+        orders = await get_open_orders_ranked(
+            db, [restaurant_id for _, restaurant_id in ranked], after, page.limit + 1
+        )
+        items = [_order_to_dict(order, distances[order.restaurant_id]) for order in orders[:page.limit]]
+        if len(orders) > page.limit:
+            last = items[-1]
+            next_cursor = encode_cursor({"d": last["distance_km"], "rid": last["restaurant_id"], "id": last["id"]})
+            return {"items": items, "next_cursor": next_cursor}
+
+    # Заказы ресторанов рядом закончились - дальше заказы без точки забора
+    remaining = page.limit - len(items)
+    orders = await get_open_orders(db, after_id=no_pickup_after, limit=remaining + 1, without_pickup=True)
+    items.extend(_order_to_dict(order) for order in orders[:remaining])
+    next_cursor = None
+    if len(orders) > remaining:
+        last_id = orders[remaining - 1].id if remaining else no_pickup_after
+        next_cursor = encode_cursor({"np": last_id})
+    return {"items": items, "next_cursor": next_cursor}
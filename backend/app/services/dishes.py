@@ -0,0 +1,41 @@
+from typing import Dict, Iterable
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.repositories.restaurants import get_dishes_by_ids
+from app.schemas.restaurant import DishInDB
+from app.services.catalogue import CatalogueCache
+
+
+async def get_dishes(db: AsyncSession, dish_ids: Iterable[int]) -> Dict[int, dict]:
+    """
+    Данные блюд по id через кэш каталога.
+
+    Попадания читаются одним MGET, промахи - одним запросом WHERE id IN (...).
+    """
+    async def load(missing) -> Dict[int, dict]:
+        return {dish["id"]: dish for dish in DishInDB.rows(await get_dishes_by_ids(db, missing))}
+
+    return await CatalogueCache.get_many("dish", dish_ids, load)
+
+
+async def get_priced_cart(db: AsyncSession, cart: Dict[int, int]) -> dict:
+    """Корзина с названиями, ценами, суммами по позициям и итогом"""
+    dishes = await get_dishes(db, cart)
+    items = []
+    unavailable = []
+    total = 0.0
+    for dish_id, quantity in cart.items():
+        dish = dishes.get(dish_id)
+        if dish is None:
+            unavailable.append(dish_id)
+            continue
+        line_total = dish["price"] * quantity
+        total += line_total
+        items.append({
+            "dish_id": dish_id,
+            "restaurant_id": dish["restaurant_id"],
+            "name": dish["name"],
+            "price": dish["price"],
+            "quantity": quantity,
+            "line_total": round(line_total, 2),
+        })
+    return {"items": items, "unavailable": unavailable, "total": round(total, 2)}
@@ -0,0 +1,215 @@
+import asyncio
+import logging
+import math
+from typing import Dict, List, Optional, Tuple
+from redis.exceptions import RedisError
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.db.redis import redis_client
+from app.db.repositories import restaurants as restaurants_repo
+from app.schemas.restaurant import RestaurantInDB
+
+logger = logging.getLogger(__name__)
+
+EARTH_RADIUS_KM = 6371.0
+GEO_CHANGES_KEY = "restaurants:geo:changes"
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Расстояние по дуге большого круга в километрах"""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lon2 - lon1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+class GeoIndex:
+    """
+    Сеточный пространственный индекс в памяти процесса.
+
+    Точки раскладываются по ячейкам cell_deg x cell_deg градусов; запрос
+    просматривает только ячейки, покрывающие окружность радиуса, и
+    точно фильтрует кандидатов по Haversine.
+    """
+
+    def __init__(self, cell_deg: float):
+        self.cell_deg = cell_deg
+        self._cells: Dict[Tuple[int, int], Dict[int, Tuple[float, float, dict]]] = {}
+        self._cell_of: Dict[int, Tuple[int, int]] = {}
+
+    def __len__(self) -> int:
+        return len(self._cell_of)
+
+    def _cell(self, lat: float, lon: float) -> Tuple[int, int]:
+        return math.floor(lat / self.cell_deg), math.floor(lon / self.cell_deg)
+
+    def add(self, item_id: int, lat: float, lon: float, payload: dict):
+        self.remove(item_id)
+        cell = self._cell(lat, lon)
+        self._cells.setdefault(cell, {})[item_id] = (lat, lon, payload)
+        self._cell_of[item_id] = cell
+
+    def remove(self, item_id: int):
+        cell = self._cell_of.pop(item_id, None)
+        if cell is not None:
+            bucket = self._cells[cell]
+            bucket.pop(item_id, None)
+            if not bucket:
+                del self._cells[cell]
+
+    def clear(self):
+        self._cells.clear()
+        self._cell_of.clear()
+
+    def nearby(self, lat: float, lon: float, radius_km: float, limit: int) -> List[Tuple[float, dict]]:
+        """Точки в радиусе radius_km, отсортированные по расстоянию"""
+        # Ограничивающий прямоугольник окружности на сфере
+        angular = radius_km / EARTH_RADIUS_KM
+        lat_min = lat - math.degrees(angular)
+        lat_max = lat + math.degrees(angular)
+        if lat_min <= -90 or lat_max >= 90 or angular >= math.pi / 2:
+            # Окружность накрывает полюс - нужны все долготы
+            lat_min, lat_max = max(lat_min, -90.0), min(lat_max, 90.0)
+            lon_span = 180.0
+        else:
+            lon_span = math.degrees(math.asin(math.sin(angular) / math.cos(math.radians(lat))))
+
+        min_cell = self._cell(lat_min, lon - lon_span)
+        max_cell = self._cell(lat_max, lon + lon_span)
+        lon_cells = range(min_cell[1], max_cell[1] + 1)
+        # Приведение долготы через антимеридиан
+        wrap = round(360 / self.cell_deg)
+
+        found = []
+        seen = set()
+        for cell_lat in range(min_cell[0], max_cell[0] + 1):
+            for cell_lon in lon_cells:
+                key = (cell_lat, (cell_lon + wrap // 2) % wrap - wrap // 2)
+                if key in seen:
+                    continue
+                seen.add(key)
+                for point_lat, point_lon, payload in self._cells.get(key, {}).values():
+                    distance = haversine_km(lat, lon, point_lat, point_lon)
+                    if distance <= radius_km:
+                        found.append((distance, payload))
+        found.sort(key=lambda item: item[0])
+        return found[:limit]
+
+
+class RestaurantLocator:
+    """
+    Индекс активных ресторанов по координатам.
+
+    Индекс строится полной загрузкой при первом обращении, дальше
+    обновляется инкрементально по журналу изменений ресторанов в Redis
+    Stream: после commit в журнал пишется id ресторана, и каждый процесс
+    перечитывает из БД только рестораны из новых записей. Изменения
+    блюд индекс не затрагивают. Полная перезагрузка нужна, только если
+    процесс отстал от журнала дальше maxlen записей (или журнал
+    пропал); новый индекс собирается отдельно и подменяет старый.
+    """
+
+    def __init__(self, cell_deg: float, changes_maxlen: int):
+        self.cell_deg = cell_deg
+        self.changes_maxlen = changes_maxlen
+        self.index = GeoIndex(cell_deg)
+        self._loaded = False
+        self._last_change = b"0-0"  # id последней примененной записи журнала
+        self._lock = asyncio.Lock()
+
+    @staticmethod
+    def _put(index: GeoIndex, restaurant) -> None:
+        if not restaurant.is_active or restaurant.location_lat is None or restaurant.location_lon is None:
+            index.remove(restaurant.id)
+            return
+        index.add(restaurant.id, restaurant.location_lat, restaurant.location_lon, RestaurantInDB.row(restaurant))
+
+    async def changed(self, restaurant) -> None:
+        """
+        Учет созданного или измененного ресторана; вызывается после commit.
+
+        Индекс текущего процесса обновляется сразу (если уже загружен),
+        остальные процессы применят запись журнала при следующем sync.
+        """
+        if self._loaded:
+            self._put(self.index, restaurant)
+        try:
+            await redis_client.xadd(
+                GEO_CHANGES_KEY, {"id": restaurant.id}, maxlen=self.changes_maxlen, approximate=True
+            )
+        except RedisError as e:
+            logger.warning("Failed to record restaurant change: %s", e)
+
+    async def _read_changes(self) -> Tuple[Optional[bytes], list]:
+        """Id первой записи журнала и записи новее последней примененной"""
+        async with redis_client.pipeline(transaction=False) as pipe:
+            pipe.xrange(GEO_CHANGES_KEY, count=1)
+            pipe.xread({GEO_CHANGES_KEY: self._last_change})
+            first, new = await pipe.execute()
+        return (first[0][0] if first else None), (new[0][1] if new else [])
+
+    async def _reload(self, db: AsyncSession):
+        try:
+            last = await redis_client.xrevrange(GEO_CHANGES_KEY, count=1)
+        except RedisError:
+            last = []
+        # Позиция журнала берется до чтения БД: записи, появившиеся во
+        # время загрузки, будут применены повторно, а не потеряны
+        last_change = last[0][0] if last else b"0-0"
+        index = GeoIndex(self.cell_deg)
+        for restaurant in await restaurants_repo.get_restaurants(db, is_active=True):
+            self._put(index, restaurant)
+        self.index = index
+        self._last_change = last_change
+        self._loaded = True
+
+    def _missed_changes(self, first: Optional[bytes]) -> bool:
+        """Последняя примененная запись вытеснена из журнала - возможен пропуск"""
+        return first is not None and _stream_id(first) > _stream_id(self._last_change)
+
+    async def sync(self, db: AsyncSession):
+        if self._loaded:
+            try:
+                first, entries = await self._read_changes()
+            except RedisError:
+                # Без Redis изменения не видны - работаем с имеющимся индексом
+                return
+            if not entries and not self._missed_changes(first):
+                return
+        async with self._lock:
+            if not self._loaded:
+                await self._reload(db)
+                return
+            try:
+                first, entries = await self._read_changes()
+            except RedisError:
+                return
+            if self._missed_changes(first):
+                await self._reload(db)
+                return
+            if not entries:
+                return
+            ids = {int(fields[b"id"]) for _, fields in entries}
+            found = {r.id: r for r in await restaurants_repo.get_restaurants_by_ids(db, list(ids))}
+            for restaurant_id in ids:
+                if restaurant_id in found:
+                    self._put(self.index, found[restaurant_id])
+                else:
+                    self.index.remove(restaurant_id)
+            self._last_change = entries[-1][0]
+
+    async def nearby(self, db: AsyncSession, lat: float, lon: float, radius_km: float, limit: int) -> List[dict]:
+        await self.sync(db)
+        return [
+            {**payload, "distance_km": round(distance, 3)}
+            for distance, payload in self.index.nearby(lat, lon, radius_km, limit)
+        ]
+
+
+def _stream_id(value: bytes) -> Tuple[int, int]:
+    ms, seq = value.split(b"-")
+    return int(ms), int(seq)
+
+
+restaurant_locator = RestaurantLocator(settings.GEO_INDEX_CELL_DEG, settings.GEO_CHANGES_MAXLEN)
@@ -0,0 +1,172 @@
+import asyncio
+import hashlib
+import json
+import logging
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+from fastapi import Depends, Header, HTTPException, Request, Response, status
+from fastapi.encoders import jsonable_encoder
+from redis.exceptions import RedisError
+from app.core.config import settings
+from app.db.redis import redis_client
+from app.services.auth import get_current_user
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENCY_KEY = "idempotency:{user_id}:{key}"
+REPLAY_HEADER = "Idempotent-Replayed"
+
+# Запросы, выполняемые в этом процессе: ключ -> (отпечаток, future ответа)
+_inflight: Dict[str, Tuple[str, asyncio.Future]] = {}
+
+
+class IdempotentRequest:
+    """
+    Выполнение мутации не более одного раза на Idempotency-Key.
+
+    Первый запрос занимает ключ (SET NX) и сохраняет ответ в Redis на
+    IDEMPOTENCY_TTL секунд; повтор возвращает сохраненный ответ с
+    заголовком Idempotent-Replayed. Параллельный дубликат не выполняет
+    обработчик, а ждет первый запрос: в том же процессе - через общий
+    future, в другом - опрашивая Redis. Ключ привязан к пользователю и
+    отпечатку запроса (метод, путь, тело); повтор ключа с другим запросом
+    отклоняется с 422. Непредвиденная ошибка освобождает ключ, чтобы
+    клиент мог повторить запрос; ответы HTTPException сохраняются.
+    """
+
+    def __init__(self, key: Optional[str], user_id: int, fingerprint: str, response: Response):
+        self.key = key
+        self.user_id = user_id
+        self.fingerprint = fingerprint
+        self.response = response
+
+    @property
+    def redis_key(self) -> str:
+        return IDEMPOTENCY_KEY.format(user_id=self.user_id, key=self.key)
+
+    async def run(self, handler: Callable[[], Awaitable[Any]]) -> Any:
+        if self.key is None:
+            return await handler()
+
+        pending = json.dumps({"state": "pending", "fp": self.fingerprint})
+        try:
+            acquired = await redis_client.set(self.redis_key, pending, nx=True, ex=settings.IDEMPOTENCY_LOCK_TTL)
+        except RedisError as e:
+            logger.warning("Idempotency store is unavailable, executing without it: %s", e)
+            return await handler()
+
+        if not acquired:
+            return self._replay(await self._wait())
+
+        future = asyncio.get_running_loop().create_future()
+        _inflight[self.redis_key] = (self.fingerprint, future)
+        try:
+            try:
+                result = {"body": jsonable_encoder(await handler())}
+            except HTTPException as e:
+                result = {"error": {"status": e.status_code, "detail": e.detail, "headers": e.headers}}
+            await self._store({"state": "done", "fp": self.fingerprint, **result})
+            future.set_result(result)
+        except BaseException as e:
+            future.set_exception(e)
+            future.exception()  # Ожидающих может не быть
+            try:
+                await redis_client.delete(self.redis_key)
+            except RedisError:
+                pass
+            raise
+        finally:
+            _inflight.pop(self.redis_key, None)
+        return self._replay(result, replayed=False)
+
+    async def _store(self, record: dict):
+        try:
+            await redis_client.set(self.redis_key, json.dumps(record), ex=settings.IDEMPOTENCY_TTL)
+        except RedisError as e:
+            logger.warning("Failed to store idempotent response: %s", e)
+
+    async def _wait(self) -> dict:
+        """Ожидание ответа первого запроса с тем же ключом"""
+        inflight = _inflight.get(self.redis_key)
+        if inflight is not None:
+            fingerprint, future = inflight
+            self._check_fingerprint(fingerprint)
+            try:
+                result = await asyncio.wait_for(asyncio.shield(future), settings.IDEMPOTENCY_WAIT_TIMEOUT)
+            except asyncio.TimeoutError:
+                self._in_progress()
+            except Exception:
+                self._original_failed()
+            return result
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + settings.IDEMPOTENCY_WAIT_TIMEOUT
+        delay = 0.02
+        while True:
+            try:
+                raw = await redis_client.get(self.redis_key)
+            except RedisError:
+                self._in_progress()
+            if raw is None:
+                # Первый запрос завершился ошибкой и освободил ключ
+                self._original_failed()
+            record = json.loads(raw)
+            self._check_fingerprint(record["fp"])
+            if record["state"] == "done":
+                return record
+            if loop.time() + delay > deadline:
+                self._in_progress()
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 0.5)
+
+    def _check_fingerprint(self, fingerprint: str):
+        if fingerprint != self.fingerprint:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="Idempotency-Key was used with a different request"
+            )
+
+    @staticmethod
+    def _original_failed():
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Original request with this Idempotency-Key failed, retry"
+        )
+
+    @staticmethod
+    def _in_progress():
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Request with this Idempotency-Key is in progress"
+        )
+
+    def _replay(self, record: dict, replayed: bool = True) -> Any:
+        if replayed:
+            self.response.headers[REPLAY_HEADER] = "true"
+        error = record.get("error")
+        if error is not None:
+            raise HTTPException(
+                status_code=error["status"],
+                detail=error["detail"],
+                headers={**(error["headers"] or {}), **({REPLAY_HEADER: "true"} if replayed else {})}
+            )
+        return record["body"]
+
+
+async def idempotent_request(
+        request: Request,
+        response: Response,
+        idempotency_key: Optional[str] = Header(
+            None,
+            alias="Idempotency-Key",
+            min_length=1,
+            max_length=255,
+            description="Уникальный ключ запроса; повтор с тем же ключом вернет сохраненный ответ"
+        ),
+        user: dict = Depends(get_current_user)
+) -> IdempotentRequest:
+    """DI: контекст идемпотентного выполнения мутации"""
+    body = await request.body()
+    fingerprint = hashlib.sha256(
+        b"\n".join((request.method.encode(), request.url.path.encode(), body))
+    ).hexdigest()
+    return IdempotentRequest(idempotency_key, user["id"], fingerprint, response)
@@ -0,0 +1,157 @@
+import codecs
+import csv
+import json
+from typing import AsyncIterator, Dict, List, Tuple, Union
+from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.db.repositories import restaurants as restaurants_repo
+from app.schemas.restaurant import DishImportRow
+from app.services.catalogue import CatalogueCache
+
+CSV_FIELDS = ["name", "price", "description"]
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """Строки потока по мере поступления, без чтения тела целиком"""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    tail = ""
+    async for chunk in chunks:
+        tail += decoder.decode(chunk)
+        *lines, tail = tail.split("\n")
+        for line in lines:
+            yield line.rstrip("\r")
+    tail += decoder.decode(b"", final=True)
+    if tail:
+        yield tail.rstrip("\r")
+
+
+async def parse_ndjson(chunks: AsyncIterator[bytes]) -> AsyncIterator[Tuple[int, Union[dict, str]]]:
+    """(номер строки, запись) или (номер строки, текст ошибки)"""
+    line_no = 0
+    async for line in iter_lines(chunks):
+        line_no += 1
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            yield line_no, f"Invalid JSON: {e}"
+            continue
+        yield line_no, record if isinstance(record, dict) else "Expected a JSON object"
+
+
+async def parse_csv(chunks: AsyncIterator[bytes]) -> AsyncIterator[Tuple[int, Union[dict, str]]]:
+    """
+    CSV с заголовком (name, price, description в любом порядке).
+
+    Поле в кавычках может содержать перевод строки: запись собирается,
+    пока число кавычек в ней нечетное.
+    """
+    header = None
+    record, start = "", 0
+    line_no = 0
+    async for line in iter_lines(chunks):
+        line_no += 1
+        if not record:
+            start = line_no
+        record = f"{record}\n{line}" if record else line
+        if record.count('"') % 2:
+            continue
+        text, record = record, ""
+        if not text.strip():
+            continue
+        values = next(csv.reader([text]))
+        if header is None:
+            header = [value.strip().lower() for value in values]
+            if "name" not in header or "price" not in header:
+                yield start, "Header must contain name and price columns"
+                return
+            continue
+        if len(values) > len(header):
+            yield start, f"Expected {len(header)} columns, got {len(values)}"
+            continue
+        yield start, {key: value for key, value in zip(header, values) if key in CSV_FIELDS}
+    if record:
+        yield start, "Unterminated quoted field"
+
+
+async def import_dishes(
+    db: AsyncSession,
+    restaurant_id: int,
+    records: AsyncIterator[Tuple[int, Union[dict, str]]]
+) -> dict:
+    """
+    Потоковый импорт меню пачками по DISH_IMPORT_BATCH_SIZE строк.
+
+    Каждая пачка - один upsert и одна транзакция, после нее версия
+    каталога увеличивается один раз. Ошибочные строки пропускаются и
+    возвращаются с номерами; при повторе названия в пачке побеждает
+    последняя строка.
+    """
+    inserted = updated = 0
+    errors: List[dict] = []
+    batch: Dict[str, dict] = {}
+
+    async def flush():
+        nonlocal inserted, updated
+        if batch:
+            added, changed = await restaurants_repo.upsert_dishes(db, restaurant_id, list(batch.values()))
+            inserted += added
+            updated += changed
+            batch.clear()
+            await CatalogueCache.bump_version()
+
+    rows = 0
+    async for line_no, record in records:
+        rows += 1
+        if rows > settings.DISH_IMPORT_MAX_ROWS:
+            errors.append({"line": line_no, "error": f"Import is limited to {settings.DISH_IMPORT_MAX_ROWS} rows"})
+            break
+        if isinstance(record, str):
+            errors.append({"line": line_no, "error": record})
+            continue
+        if record.get("description") == "":
+            record["description"] = None
+        try:
+            row = DishImportRow(**record)
+        except ValidationError as e:
+            errors.append({
+                "line": line_no,
+                "error": "; ".join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors())
+            })
+            continue
+        batch[row.name] = row.dict()
+        if len(batch) >= settings.DISH_IMPORT_BATCH_SIZE:
+            await flush()
+    await flush()
+    return {"inserted": inserted, "updated": updated, "errors": errors[:settings.DISH_IMPORT_MAX_ERRORS]}
+
+
+async def export_dishes(db: AsyncSession, restaurant_id: int, fmt: str) -> AsyncIterator[str]:
+    """Потоковая выгрузка меню страницами keyset-выборки в формате импорта"""
+    if fmt == "csv":
+        yield ",".join(CSV_FIELDS) + "\r\n"
+    after_id = None
+    while True:
+        dishes = await restaurants_repo.get_dishes(db, restaurant_id, after_id, settings.DISH_EXPORT_PAGE_SIZE)
+        if not dishes:
+            return
+        lines = []
+        for dish in dishes:
+            row = {"name": dish.name, "price": dish.price, "description": dish.description}
+            if fmt == "csv":
+                lines.append(_csv_line([row["name"], row["price"], row["description"] or ""]))
+            else:
+                lines.append(json.dumps(row, ensure_ascii=False) + "\n")
+        yield "".join(lines)
+        after_id = dishes[-1].id
+
+
+class _LineBuffer:
+    def write(self, value):
+        return value
+
+
+def _csv_line(values) -> str:
+    return csv.writer(_LineBuffer()).writerow(values)
@@ -0,0 +1,167 @@
+import asyncio
+import json
+import logging
+from datetime import datetime, timezone
+from typing import AsyncIterator, Dict, Optional, Set
+from fastapi.encoders import jsonable_encoder
+from redis.exceptions import RedisError
+from app.core.config import settings
+from app.db.redis import redis_client
+
+logger = logging.getLogger(__name__)
+
+
+def _channel(order_id: int) -> str:
+    return f"order:{order_id}:events"
+
+
+def encode_event(event: dict) -> str:
+    """JSON события; даты в ISO 8601"""
+    return json.dumps(jsonable_encoder(event))
+
+
+async def publish_order_event(order_id: int, event: dict):
+    """Публикация события заказа подписчикам всех процессов (Redis pub/sub)"""
+    try:
+        await redis_client.publish(_channel(order_id), encode_event(event))
+    except RedisError as e:
+        logger.warning("Failed to publish order event: %s", e)
+
+
+class OrderEventBroker:
+    """
+    Раздача событий заказов подключенным клиентам, одна на процесс.
+
+    Все SSE/WebSocket-соединения процесса делят одно соединение pub/sub:
+    канал заказа подписывается при первом слушателе и отписывается после
+    последнего. У каждого слушателя своя ограниченная очередь; если
+    клиент не успевает читать, самые старые события вытесняются -
+    клиенту важен последний статус, а не вся история.
+    """
+
+    def __init__(self, queue_size: int):
+        self.queue_size = queue_size
+        self._listeners: Dict[int, Set[asyncio.Queue]] = {}
+        self._pubsub = None
+        self._reader: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()
+
+    async def subscribe(self, order_id: int) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        async with self._lock:
+            if self._pubsub is None:
+                self._pubsub = redis_client.pubsub(ignore_subscribe_messages=True)
+            listeners = self._listeners.setdefault(order_id, set())
+            if not listeners:
+                await self._pubsub.subscribe(_channel(order_id))
+            listeners.add(queue)
+            if self._reader is None or self._reader.done():
+                self._reader = asyncio.create_task(self._read_loop())
+        return queue
+
+    async def unsubscribe(self, order_id: int, queue: asyncio.Queue):
+        async with self._lock:
+            listeners = self._listeners.get(order_id)
+            if listeners is None:
+                return
+            listeners.discard(queue)
+            if not listeners:
+                del self._listeners[order_id]
+                try:
+                    await self._pubsub.unsubscribe(_channel(order_id))
+                except RedisError as e:
+                    logger.warning("Failed to unsubscribe from order events: %s", e)
+
+    def _deliver(self, order_id: int, event: dict):
+        for queue in self._listeners.get(order_id, ()):
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(event)
+
+    async def _resubscribe(self):
+        async with self._lock:
+            await self._pubsub.reset()
+            if self._listeners:
+                await self._pubsub.subscribe(*(_channel(order_id) for order_id in self._listeners))
+
+    async def _read_loop(self):
+        while True:
+            if not self._listeners:
+                await asyncio.sleep(1.0)
+                continue
+            try:
+                message = await self._pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+            except (RedisError, ConnectionError, OSError) as e:
+                logger.warning("Order events subscription failed: %s", e)
+                await asyncio.sleep(1.0)
+                try:
+                    await self._resubscribe()
+                except (RedisError, ConnectionError, OSError):
+                    pass
+                continue
+            if message is None or message["type"] != "message":
+                continue
+            channel = message["channel"]
+            if isinstance(channel, bytes):
+                channel = channel.decode()
+            order_id = int(channel.split(":")[1])
+            self._deliver(order_id, json.loads(message["data"]))
+
+    async def close(self):
+        if self._reader is not None:
+            self._reader.cancel()
+            try:
+                await self._reader
+            except asyncio.CancelledError:
+                pass
+            self._reader = None
+        if self._pubsub is not None:
+            await self._pubsub.reset()
+            self._pubsub = None
+        self._listeners.clear()
+
+
+order_event_broker = OrderEventBroker(settings.ORDER_EVENTS_QUEUE_SIZE)
+
+
+TERMINAL_STATUSES = {"delivered", "canceled"}
+
+
+def _event_time(value) -> Optional[datetime]:
+    """Время события ("at") как datetime с часовым поясом; без пояса - UTC"""
+    if value is None:
+        return None
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value)
+        except ValueError:
+            return None
+    return value if value.tzinfo is not None else value.replace(tzinfo=timezone.utc)
+
+
+async def order_event_stream(queue: asyncio.Queue, snapshot: dict, heartbeat: float) -> AsyncIterator[Optional[dict]]:
+    """
+    События заказа для одного клиента: сначала текущее состояние, затем
+    изменения; None - пинг после heartbeat секунд тишины. Поток
+    завершается на конечном статусе заказа.
+
+    События не новее состояния (подписка оформляется до его чтения, и
+    переход может прийти уже после него) отбрасываются, чтобы клиент не
+    получил устаревший статус последним.
+    """
+    snapshot_at = _event_time(snapshot.get("at"))
+    event = snapshot
+    while True:
+        if event is not None:
+            yield event
+            if event.get("status") in TERMINAL_STATUSES:
+                return
+        try:
+            event = await asyncio.wait_for(queue.get(), heartbeat)
+        except asyncio.TimeoutError:
+            event = None
+            yield None
+            continue
+        at = _event_time(event.get("at"))
+        if snapshot_at is not None and at is not None and at <= snapshot_at:
+            event = None
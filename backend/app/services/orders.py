@@ -0,0 +1,80 @@
+from typing import Dict, Iterable, List
+from fastapi import HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.models.order import Order
+from app.db.repositories.orders import AWAITING_COURIER, apply_transition, order_exists
+
+# Допустимые переходы: целевой статус -> исходные статусы.
+# Переход в delivering (из paid или cooking) выполняется только
+# принятием заказа курьером.
+TRANSITIONS = {
+    "paid": {"created"},
+    "cooking": {"paid"},
+    "delivering": set(AWAITING_COURIER),
+    "delivered": {"delivering"},
+    "canceled": {"created", "paid", "cooking"},
+}
+
+# Статусы, которые роль может выставить через API
+ROLE_TARGETS = {
+    "customer": {"canceled"},
+    "courier": {"delivered"},
+    "admin": {"paid", "cooking", "delivered", "canceled"},
+}
+
+
+class OrderLifecycle:
+    """
+    Жизненный цикл заказа.
+
+    Каждый переход - один условный UPDATE: допустимость исходного статуса
+    и права пользователя проверяются в WHERE, без предварительного чтения
+    и блокировок. Покупатель может отменить только свой еще не оплаченный
+    заказ, курьер - завершить только назначенную ему доставку.
+    """
+
+    @staticmethod
+    def _scope(user: Dict, to_status: str):
+        if to_status not in ROLE_TARGETS.get(user["role"], ()):
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail=f"Not allowed to set status '{to_status}'"
+            )
+        from_statuses = TRANSITIONS[to_status]
+        conditions = []
+        if user["role"] == "customer":
+            from_statuses = from_statuses & {"created"}
+            conditions.append(Order.user_id == user["id"])
+        elif user["role"] == "courier":
+            conditions.append(Order.courier_id == user["id"])
+        return from_statuses, conditions
+
+    @staticmethod
+    async def change_status(db: AsyncSession, order_id: int, to_status: str, user: Dict) -> str:
+        """
+        Смена статуса одного заказа; возвращает прежний статус.
+
+        Чужой заказ (как и в GET /orders/{id}) дает 404, а не 409, чтобы
+        по ответу нельзя было узнать, существует ли заказ.
+        """
+        from_statuses, conditions = OrderLifecycle._scope(user, to_status)
+        rows = await apply_transition(db, [order_id], to_status, from_statuses, user["id"], conditions)
+        if not rows:
+            visible_to = None if user["role"] == "admin" else user["id"]
+            if not await order_exists(db, order_id, visible_to):
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="Order not found"
+                )
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=f"Cannot change order status to '{to_status}'"
+            )
+        return rows[0][1]
+
+    @staticmethod
+    async def change_status_many(db: AsyncSession, order_ids: Iterable[int], to_status: str, user: Dict) -> List[int]:
+        """Смена статуса пачки заказов одним UPDATE; возвращает измененные id"""
+        from_statuses, conditions = OrderLifecycle._scope(user, to_status)
+        rows = await apply_transition(db, set(order_ids), to_status, from_statuses, user["id"], conditions)
+        return sorted(order_id for order_id, _ in rows)
@@ -0,0 +1,44 @@
+import json
+from typing import Optional
+from redis.exceptions import RedisError
+from app.core.config import settings
+from app.db.redis import redis_client
+
+PRINCIPAL_KEY = "principal:{email}"
+
+
+def principal_from_user(user) -> dict:
+    """Минимальные данные пользователя, нужные для авторизации"""
+    return {"id": user.id, "role": user.role, "email": user.email}
+
+
+async def get_principal(email: str) -> Optional[dict]:
+    """Чтение пользователя из кэша (None при промахе или недоступности Redis)"""
+    try:
+        raw = await redis_client.get(PRINCIPAL_KEY.format(email=email))
+    except RedisError:
+        return None
+    return json.loads(raw) if raw else None
+
+
+async def set_principal(principal: dict):
+    """Сохранение пользователя в кэш"""
+    try:
+        await redis_client.set(
+            PRINCIPAL_KEY.format(email=principal["email"]),
+            json.dumps(principal),
+            ex=settings.AUTH_PRINCIPAL_CACHE_TTL,
+        )
+    except RedisError:
+        pass
+
+
+async def invalidate_principal(*emails: str):
+    """Сброс кэша пользователя после изменения его данных"""
+    keys = [PRINCIPAL_KEY.format(email=email) for email in emails if email]
+    if not keys:
+        return
+    try:
+        await redis_client.delete(*keys)
+    except RedisError:
+        pass
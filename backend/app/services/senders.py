@@ -0,0 +1,53 @@
+import logging
+from abc import ABC, abstractmethod
+from typing import Dict, List
+from app.schemas.notification import NotificationMessage
+
+logger = logging.getLogger(__name__)
+
+
+class NotificationSender(ABC):
+    """
+    Доставка уведомлений конечным получателям.
+
+    send_batch получает пачку сообщений одного канала и возвращает те,
+    которые доставить не удалось; они уйдут на повтор.
+    """
+
+    @abstractmethod
+    async def send_batch(self, channel: str, messages: List[NotificationMessage]) -> List[NotificationMessage]:
+        ...
+
+    async def close(self):
+        pass
+
+
+class LoggingSender(NotificationSender):
+    """Отправитель-заглушка: пишет уведомления в лог"""
+
+    async def send_batch(self, channel, messages):
+        for message in messages:
+            if channel == "email":
+                logger.info("Sending email to %s: %s - %s", message.email, message.subject, message.message)
+            else:
+                logger.info("Sending push to user %s: %s", message.user_id, message.message)
+        return []
+
+
+class FakeSender(NotificationSender):
+    """
+    Отправитель для тестов (tests/test_notification_worker.py): накапливает
+    доставленные сообщения в памяти, сообщения с id из fail_ids возвращает
+    как недоставленные.
+    """
+
+    def __init__(self, fail_ids=()):
+        self.sent: Dict[str, List[NotificationMessage]] = {"push": [], "email": []}
+        self.batches: List[int] = []
+        self.fail_ids = set(fail_ids)
+
+    async def send_batch(self, channel, messages):
+        self.batches.append(len(messages))
+        failed = [message for message in messages if message.id in self.fail_ids]
+        self.sent.setdefault(channel, []).extend(m for m in messages if m.id not in self.fail_ids)
+        return failed
@@ -0,0 +1,92 @@
+"""
+Воркер агрегатов аналитики: отдельный потребитель outbox.
+
+Запуск: python -m app.workers.analytics
+"""
+import asyncio
+import logging
+import signal
+from typing import Optional
+from sqlalchemy.exc import SQLAlchemyError
+from app.core.config import settings
+from app.db.repositories import outbox as outbox_repo
+from app.db.session import SessionLocal
+from app.services.analytics import AnalyticsRollup
+
+logger = logging.getLogger(__name__)
+
+
+class AnalyticsWorker:
+    """
+    Пачечное применение событий outbox к агрегатам аналитики.
+
+    В одной транзакции пачка блокируется (SKIP LOCKED), применяется к
+    агрегатам и помечается учтенной (rolled_up_at). Пометка ретранслятора
+    (published_at) не используется, поэтому недоступность брокера
+    аналитику не останавливает. При ошибке БД транзакция откатывается и
+    пачка будет применена повторно.
+    """
+
+    def __init__(
+        self,
+        batch_size: int = settings.ANALYTICS_BATCH_SIZE,
+        poll_interval: float = settings.ANALYTICS_POLL_INTERVAL,
+        retry_delay: float = settings.ANALYTICS_RETRY_DELAY,
+        max_retry_delay: float = settings.ANALYTICS_MAX_RETRY_DELAY
+    ):
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+
+    async def rollup_batch(self) -> int:
+        """Применение одной пачки; возвращает число обработанных событий"""
+        async with SessionLocal() as db:
+            async with db.begin():
+                events = await outbox_repo.lock_rollup_pending_events(db, self.batch_size)
+                if not events:
+                    return 0
+                await AnalyticsRollup.apply(db, events)
+                await outbox_repo.mark_rolled_up(db, [event.id for event in events])
+        return len(events)
+
+    async def run(self, stop: Optional[asyncio.Event] = None):
+        stop = stop or asyncio.Event()
+        delay = self.retry_delay
+        while not stop.is_set():
+            try:
+                processed = await self.rollup_batch()
+                delay = self.retry_delay
+            except (SQLAlchemyError, ConnectionError, OSError) as e:
+                logger.warning("Failed to roll up outbox events: %s", e)
+                await self._wait(stop, delay)
+                delay = min(delay * 2, self.max_retry_delay)
+                continue
+            # Полная пачка - вероятно, есть еще события, продолжаем без паузы
+            if processed < self.batch_size:
+                await self._wait(stop, self.poll_interval)
+
+    @staticmethod
+    async def _wait(stop: asyncio.Event, timeout: float):
+        try:
+            await asyncio.wait_for(stop.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    worker = AnalyticsWorker()
+
+    async def run():
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, stop.set)
+        await worker.run(stop=stop)
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
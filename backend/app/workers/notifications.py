@@ -0,0 +1,206 @@
+"""
+Воркер доставки уведомлений из очереди RabbitMQ.
+
+Запуск: python -m app.workers.notifications
+"""
+import asyncio
+import importlib
+import logging
+import signal
+from collections import defaultdict
+from typing import List, Optional
+import aio_pika
+from aio_pika.abc import AbstractChannel, AbstractIncomingMessage
+from pydantic import ValidationError
+from app.core.config import settings
+from app.schemas.notification import NotificationMessage
+from app.services.senders import NotificationSender
+
+logger = logging.getLogger(__name__)
+
+RETRIES_HEADER = "x-retries"
+
+
+def load_sender(path: str) -> NotificationSender:
+    """Создание отправителя по пути 'package.module.ClassName'"""
+    module_name, class_name = path.rsplit(".", 1)
+    return getattr(importlib.import_module(module_name), class_name)()
+
+
+class NotificationWorker:
+    """
+    Потребитель очереди уведомлений.
+
+    Сообщения (до prefetch неподтвержденных) складываются во внутреннюю
+    очередь, concurrency обработчиков собирают из нее пачки и отдают их
+    отправителю, сгруппировав по каналу. Недоставленные сообщения
+    переходят в очередь повтора с задержкой, после max_retries попыток
+    или при невалидном теле - в dead-очередь.
+    """
+
+    def __init__(
+        self,
+        sender: NotificationSender,
+        queue: str = settings.NOTIFICATIONS_QUEUE,
+        prefetch: int = settings.NOTIFICATIONS_PREFETCH,
+        concurrency: int = settings.NOTIFICATIONS_CONCURRENCY,
+        batch_size: int = settings.NOTIFICATIONS_DISPATCH_BATCH_SIZE,
+        batch_timeout: float = settings.NOTIFICATIONS_DISPATCH_BATCH_TIMEOUT,
+        max_retries: int = settings.NOTIFICATIONS_MAX_RETRIES,
+        retry_delay: int = settings.NOTIFICATIONS_RETRY_DELAY
+    ):
+        self.sender = sender
+        self.queue = queue
+        self.retry_queue = f"{queue}.retry"
+        self.dead_queue = f"{queue}.dead"
+        self.prefetch = prefetch
+        self.concurrency = concurrency
+        self.batch_size = batch_size
+        self.batch_timeout = batch_timeout
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.channel: Optional[AbstractChannel] = None
+        self._inbox: "asyncio.Queue[AbstractIncomingMessage]" = asyncio.Queue()
+
+    async def setup(self, channel: AbstractChannel):
+        """Объявление очередей: основная, повтора (TTL -> основная) и dead"""
+        self.channel = channel
+        await channel.set_qos(prefetch_count=self.prefetch)
+        queue = await channel.declare_queue(self.queue, durable=True)
+        await channel.declare_queue(
+            self.retry_queue,
+            durable=True,
+            arguments={
+                "x-message-ttl": self.retry_delay * 1000,
+                "x-dead-letter-exchange": "",
+                "x-dead-letter-routing-key": self.queue,
+            },
+        )
+        await channel.declare_queue(self.dead_queue, durable=True)
+        return queue
+
+    async def on_message(self, message: AbstractIncomingMessage):
+        await self._inbox.put(message)
+
+    async def _next_batch(self) -> List[AbstractIncomingMessage]:
+        batch = [await self._inbox.get()]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.batch_timeout
+        while len(batch) < self.batch_size:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._inbox.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _republish(self, message: AbstractIncomingMessage, routing_key: str, retries: int):
+        await self.channel.default_exchange.publish(
+            aio_pika.Message(
+                message.body,
+                content_type=message.content_type,
+                headers={**(message.headers or {}), RETRIES_HEADER: retries},
+                delivery_mode=aio_pika.DeliveryMode.PERSISTENT,
+            ),
+            routing_key=routing_key,
+        )
+
+    async def _retry(self, message: AbstractIncomingMessage):
+        retries = int((message.headers or {}).get(RETRIES_HEADER, 0)) + 1
+        if retries > self.max_retries:
+            logger.error("Notification dead-lettered after %d attempts", retries - 1)
+            await self._republish(message, self.dead_queue, retries - 1)
+        else:
+            await self._republish(message, self.retry_queue, retries)
+        await message.ack()
+
+    async def dispatch(self, batch: List[AbstractIncomingMessage]):
+        """Доставка пачки: один вызов отправителя на канал"""
+        groups = defaultdict(list)
+        for message in batch:
+            try:
+                notification = NotificationMessage.parse_body(message.body)
+            except (ValidationError, ValueError) as e:
+                logger.error("Invalid notification message: %s", e)
+                await self._republish(message, self.dead_queue, 0)
+                await message.ack()
+                continue
+            groups[notification.channel].append((message, notification))
+
+        for channel, items in groups.items():
+            try:
+                failed = await self.sender.send_batch(channel, [notification for _, notification in items])
+                failed_ids = {notification.id for notification in failed}
+            except Exception:
+                logger.exception("Notification sender failed for %d %s messages", len(items), channel)
+                failed_ids = {notification.id for _, notification in items}
+            for message, notification in items:
+                if notification.id in failed_ids:
+                    await self._retry(message)
+                else:
+                    await message.ack()
+
+    async def _process(self):
+        while True:
+            batch = await self._next_batch()
+            try:
+                await self.dispatch(batch)
+            except Exception:
+                logger.exception("Failed to dispatch notifications, returning batch to the queue")
+                await self._requeue_unsettled(batch)
+
+    @staticmethod
+    async def _requeue_unsettled(batch: List[AbstractIncomingMessage]):
+        """
+        Возврат в очередь сообщений пачки, еще не подтвержденных dispatch.
+
+        Ошибки nack (например, канал закрыт) только пишутся в лог: такие
+        сообщения брокер вернет сам при разрыве канала, а обработчик
+        должен продолжить работу.
+        """
+        for message in batch:
+            if message.processed:
+                continue
+            try:
+                await message.nack(requeue=True)
+            except Exception as e:
+                logger.warning("Failed to return notification to the queue: %s", e)
+
+    async def run(self, url: str = settings.RABBITMQ_URL, stop: Optional[asyncio.Event] = None):
+        stop = stop or asyncio.Event()
+        connection = await aio_pika.connect_robust(url)
+        async with connection:
+            channel = await connection.channel()
+            queue = await self.setup(channel)
+            consumer_tag = await queue.consume(self.on_message)
+            workers = [asyncio.create_task(self._process()) for _ in range(self.concurrency)]
+            logger.info(
+                "Consuming %s: prefetch=%d concurrency=%d batch=%d",
+                self.queue, self.prefetch, self.concurrency, self.batch_size,
+            )
+            await stop.wait()
+            await queue.cancel(consumer_tag)
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+        await self.sender.close()
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    worker = NotificationWorker(load_sender(settings.NOTIFICATIONS_SENDER))
+
+    async def run():
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, stop.set)
+        await worker.run(stop=stop)
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""
+Ретранслятор outbox: публикация событий заказов в RabbitMQ.
+
+Запуск: python -m app.workers.outbox
+"""
+import asyncio
+import logging
+import signal
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+import aio_pika
+from aio_pika.abc import AbstractChannel
+from aio_pika.exceptions import AMQPError
+from app.core.config import settings
+from app.db.models.outbox import OutboxEvent
+from app.db.repositories import outbox as outbox_repo
+from app.db.session import SessionLocal
+from app.services.order_events import publish_order_event
+
+logger = logging.getLogger(__name__)
+
+PURGE_INTERVAL = 600  # Секунды между очистками опубликованных событий
+
+
+class OutboxRelay:
+    """
+    Пачечная публикация событий из outbox_events.
+
+    В одной транзакции пачка блокируется (SKIP LOCKED), публикуется с
+    подтверждениями брокера и помечается опубликованной. Если брокер
+    недоступен, транзакция откатывается и пачка будет отправлена повторно;
+    message_id сообщения - ключ идемпотентности события, по которому
+    получатель может отбросить дубликат. После фиксации события смены
+    статуса рассылаются подписчикам заказа через Redis pub/sub. Агрегаты
+    аналитики - отдельный потребитель outbox (app.workers.analytics) и от
+    доступности брокера не зависят.
+    """
+
+    def __init__(
+        self,
+        url: str = settings.RABBITMQ_URL,
+        batch_size: int = settings.OUTBOX_BATCH_SIZE,
+        poll_interval: float = settings.OUTBOX_POLL_INTERVAL,
+        retention_hours: int = settings.OUTBOX_RETENTION_HOURS,
+        reconnect_delay: float = settings.RABBITMQ_RECONNECT_DELAY,
+        max_reconnect_delay: float = settings.RABBITMQ_MAX_RECONNECT_DELAY
+    ):
+        self.url = url
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.retention_hours = retention_hours
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self.channel: Optional[AbstractChannel] = None
+        self._declared = set()
+
+    async def _publish(self, events: List[OutboxEvent]):
+        for routing_key in {event.routing_key for event in events} - self._declared:
+            await self.channel.declare_queue(routing_key, durable=True)
+            self._declared.add(routing_key)
+        exchange = self.channel.default_exchange
+        await asyncio.gather(*(
+            exchange.publish(
+                aio_pika.Message(
+                    event.payload.encode(),
+                    content_type="application/json",
+                    message_id=event.idempotency_key,
+                    type=event.event_type,
+                    delivery_mode=aio_pika.DeliveryMode.PERSISTENT,
+                ),
+                routing_key=event.routing_key,
+            )
+            for event in events
+        ))
+
+    async def relay_batch(self) -> int:
+        """Публикация одной пачки; возвращает число опубликованных событий"""
+        async with SessionLocal() as db:
+            async with db.begin():
+                events = await outbox_repo.lock_pending_events(db, self.batch_size)
+                if not events:
+                    return 0
+                await self._publish(events)
+                await outbox_repo.mark_published(db, [event.id for event in events])
+        for event in events:
+            if event.event_type.startswith("order."):
+                await publish_order_event(event.aggregate_id, {
+                    "order_id": event.aggregate_id,
+                    "status": event.event_type[len("order."):],
+                    "at": event.created_at,
+                })
+        return len(events)
+
+    async def purge(self) -> int:
+        before = datetime.now(timezone.utc) - timedelta(hours=self.retention_hours)
+        async with SessionLocal() as db:
+            async with db.begin():
+                return await outbox_repo.purge_published(db, before)
+
+    async def run(self, stop: Optional[asyncio.Event] = None):
+        stop = stop or asyncio.Event()
+        connection = await aio_pika.connect_robust(self.url)
+        async with connection:
+            self.channel = await connection.channel(publisher_confirms=True)
+            delay = self.reconnect_delay
+            last_purge = 0.0
+            loop = asyncio.get_running_loop()
+            while not stop.is_set():
+                try:
+                    published = await self.relay_batch()
+                    delay = self.reconnect_delay
+                except (AMQPError, ConnectionError, OSError, asyncio.TimeoutError) as e:
+                    logger.warning("Failed to relay outbox events: %s", e)
+                    self._declared.clear()
+                    await self._wait(stop, delay)
+                    delay = min(delay * 2, self.max_reconnect_delay)
+                    continue
+                if loop.time() - last_purge > PURGE_INTERVAL:
+                    purged = await self.purge()
+                    if purged:
+                        logger.info("Purged %d published outbox events", purged)
+                    last_purge = loop.time()
+                # Полная пачка - вероятно, есть еще события, продолжаем без паузы
+                if published < self.batch_size:
+                    await self._wait(stop, self.poll_interval)
+
+    @staticmethod
+    async def _wait(stop: asyncio.Event, timeout: float):
+        try:
+            await asyncio.wait_for(stop.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    relay = OutboxRelay()
+
+    async def run():
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, stop.set)
+        await relay.run(stop=stop)
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
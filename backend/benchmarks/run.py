@@ -0,0 +1,224 @@
+"""
+Нагрузочный бенчмарк API.
+
+Запуск из каталога backend:
+
+    python -m benchmarks.run --concurrency 20 --duration 30 --output results.json
+    python -m benchmarks.run --baseline results.json --fail-on-regression 20
+
+Приложение из app/main.py запускается в процессе бенчмарка и вызывается
+через ASGI без сети. Сначала несколько проходов сценария выполняются
+последовательно для прогрева, затем виртуальные пользователи выполняют
+сценарий параллельно заданное время. Число SQL-запросов на эндпоинт
+(максимум за замер) берется из заголовка Server-Timing; бюджеты запросов
+маршрутов проверяются строго, превышение видно как ошибка 500.
+"""
+import argparse
+import asyncio
+import json
+import random
+import re
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+from benchmarks import stand_ins
+
+
+SERVER_TIMING_QUERIES = re.compile(r'db;[^,]*desc="(\d+) queries"')
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Перцентиль по ближайшему рангу"""
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, round(q / 100 * len(ordered) + 0.5) - 1))
+    return ordered[index]
+
+
+class Recorder:
+    """Время ответа, ошибки и число SQL-запросов по эндпоинтам"""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.queries: Dict[str, List[int]] = defaultdict(list)
+
+    def make_request(self, client):
+        async def request(label: str, method: str, url: str, **kwargs):
+            started = time.perf_counter()
+            response = await client.request(method, url, **kwargs)
+            self.latencies[label].append(time.perf_counter() - started)
+            if response.status_code >= 400:
+                self.errors[label] += 1
+            queries = SERVER_TIMING_QUERIES.search(response.headers.get("server-timing", ""))
+            if queries:
+                self.queries[label].append(int(queries.group(1)))
+            return response
+        return request
+
+    def reset_latencies(self):
+        self.latencies.clear()
+        self.errors.clear()
+        self.queries.clear()
+
+    def report(self, elapsed: float) -> dict:
+        endpoints = {}
+        for label, values in sorted(self.latencies.items()):
+            endpoints[label] = {
+                "requests": len(values),
+                "errors": self.errors.get(label, 0),
+                "rps": round(len(values) / elapsed, 2),
+                "mean_ms": round(statistics.fmean(values) * 1000, 2),
+                "p50_ms": round(percentile(values, 50) * 1000, 2),
+                "p95_ms": round(percentile(values, 95) * 1000, 2),
+                "p99_ms": round(percentile(values, 99) * 1000, 2),
+                "queries": max(self.queries[label]) if self.queries.get(label) else None,
+            }
+        return endpoints
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def run(args) -> dict:
+    stand_ins.configure(args.backend)
+
+    import httpx
+    from app.main import app
+    from benchmarks.scenario import order_flow, seed
+
+    if args.backend == "fallback":
+        stand_ins.patch_fallback()
+    await stand_ins.create_schema(reset=args.reset)
+    fixture = await seed(args.restaurants, args.dishes, args.concurrency)
+
+    recorder = Recorder()
+
+    await app.router.startup()
+    try:
+        async with httpx.AsyncClient(app=app, base_url="http://bench", timeout=60) as client:
+            request = recorder.make_request(client)
+
+            # Прогрев: по одному проходу на пользователя, последовательно
+            for index in range(min(args.concurrency, 3)):
+                await order_flow(request, fixture, index, random.Random(index))
+            recorder.reset_latencies()
+
+            completed = 0
+            deadline = time.perf_counter() + args.duration
+
+            async def virtual_user(index: int):
+                nonlocal completed
+                rng = random.Random(1000 + index)
+                while time.perf_counter() < deadline:
+                    await order_flow(request, fixture, index, rng)
+                    completed += 1
+
+            started = time.perf_counter()
+            await asyncio.gather(*(virtual_user(i) for i in range(args.concurrency)))
+            elapsed = time.perf_counter() - started
+    finally:
+        await app.router.shutdown()
+
+    return {
+        "meta": {
+            "revision": git_revision(),
+            "backend": args.backend,
+            "concurrency": args.concurrency,
+            "duration_s": round(elapsed, 2),
+            "restaurants": args.restaurants,
+            "dishes_per_restaurant": args.dishes,
+        },
+        "scenarios": {"completed": completed, "per_second": round(completed / elapsed, 2)},
+        "endpoints": recorder.report(elapsed),
+    }
+
+
+METRICS = [("rps", "rps", 1), ("p50_ms", "p50", -1), ("p95_ms", "p95", -1), ("p99_ms", "p99", -1), ("queries", "sql", -1)]
+
+
+def change(current, previous) -> Optional[float]:
+    if current is None or previous in (None, 0):
+        return None
+    return (current - previous) / previous * 100
+
+
+def print_report(result: dict, baseline: Optional[dict]):
+    header = f"{'endpoint':34} {'req':>6} {'err':>4}" + "".join(f" {title:>16}" for _, title, _ in METRICS)
+    print(header)
+    print("-" * len(header))
+    base = (baseline or {}).get("endpoints", {})
+    for label, stats in result["endpoints"].items():
+        cells = []
+        for key, _, _ in METRICS:
+            value = stats[key]
+            text = "-" if value is None else f"{value:g}"
+            delta = change(value, base.get(label, {}).get(key))
+            if delta is not None:
+                text += f" ({delta:+.0f}%)"
+            cells.append(f" {text:>16}")
+        print(f"{label:34} {stats['requests']:>6} {stats['errors']:>4}" + "".join(cells))
+    scenarios = result["scenarios"]
+    print(f"\nscenarios: {scenarios['completed']} ({scenarios['per_second']}/s), "
+          f"concurrency {result['meta']['concurrency']}, backend {result['meta']['backend']}")
+
+
+def regressions(result: dict, baseline: dict, threshold: float) -> List[str]:
+    """Ухудшения относительно базовой линии сверх threshold процентов"""
+    found = []
+    for label, stats in result["endpoints"].items():
+        previous = baseline.get("endpoints", {}).get(label)
+        if previous is None:
+            continue
+        for key, title, direction in METRICS:
+            delta = change(stats[key], previous.get(key))
+            if delta is None:
+                continue
+            worse = -delta * direction
+            if key == "queries" and stats[key] > previous[key]:
+                found.append(f"{label}: {title} {previous[key]} -> {stats[key]}")
+            elif key != "queries" and worse > threshold:
+                found.append(f"{label}: {title} {previous[key]:g} -> {stats[key]:g} ({delta:+.0f}%)")
+    return found
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Бенчмарк API доставки еды")
+    parser.add_argument("--backend", choices=["fallback", "local"], default="fallback",
+                        help="fallback - SQLite и fakeredis; local - DATABASE_URL и REDIS_URL")
+    parser.add_argument("--reset", action="store_true", help="Пересоздать таблицы (только для отдельной базы!)")
+    parser.add_argument("--concurrency", type=int, default=10, help="Виртуальные пользователи")
+    parser.add_argument("--duration", type=float, default=10.0, help="Длительность замера, секунды")
+    parser.add_argument("--restaurants", type=int, default=50)
+    parser.add_argument("--dishes", type=int, default=40, help="Блюд на ресторан")
+    parser.add_argument("--output", help="Файл для результатов в JSON")
+    parser.add_argument("--baseline", help="Результаты предыдущего запуска для сравнения")
+    parser.add_argument("--fail-on-regression", type=float, metavar="PCT",
+                        help="Код возврата 1, если rps или перцентили хуже базовой линии на PCT%% или выросло число SQL-запросов")
+    args = parser.parse_args(argv)
+
+    result = asyncio.run(run(args))
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    print_report(result, baseline)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2, ensure_ascii=False)
+    if baseline is not None and args.fail_on_regression is not None:
+        found = regressions(result, baseline, args.fail_on_regression)
+        if found:
+            print("\nregressions:\n  " + "\n  ".join(found))
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
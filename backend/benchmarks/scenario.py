@@ -0,0 +1,129 @@
+"""
+Данные и сценарий бенчмарка.
+
+Сценарий одного виртуального пользователя повторяет путь заказа:
+просмотр ресторанов и меню -> корзина -> оформление -> оплата
+(администратор) -> курьер находит заказ в ленте и принимает его.
+"""
+import random
+import uuid
+from dataclasses import dataclass
+from typing import Awaitable, Callable, List
+
+BASE_LAT, BASE_LON = 55.751244, 37.618423  # Центр зоны ресторанов
+
+
+@dataclass
+class Actor:
+    id: int
+    email: str
+    headers: dict
+
+
+@dataclass
+class Fixture:
+    restaurant_ids: List[int]
+    dishes: dict  # restaurant_id -> [dish_id]
+    customers: List[Actor]
+    couriers: List[Actor]
+    admin: Actor
+
+
+async def seed(restaurants: int, dishes_per_restaurant: int, users: int) -> Fixture:
+    """Рестораны с меню, пары покупатель/курьер на каждого виртуального пользователя и администратор"""
+    from app.db.models.restaurant import Dish, Restaurant
+    from app.db.models.user import User
+    from app.db.session import SessionLocal
+    from app.services.auth import create_access_token
+    from datetime import timedelta
+
+    rng = random.Random(42)
+    run = uuid.uuid4().hex[:8]
+
+    def actor(user: User) -> Actor:
+        token = create_access_token({"sub": user.email}, expires_delta=timedelta(hours=12))
+        return Actor(user.id, user.email, {"Authorization": f"Bearer {token}"})
+
+    async with SessionLocal() as db:
+        restaurant_rows = [
+            Restaurant(
+                name=f"Bench {run} #{i}",
+                description="benchmark",
+                location_lat=BASE_LAT + rng.uniform(-0.05, 0.05),
+                location_lon=BASE_LON + rng.uniform(-0.05, 0.05),
+                is_active=True,
+            )
+            for i in range(restaurants)
+        ]
+        db.add_all(restaurant_rows)
+        await db.flush()
+        dish_rows = [
+            Dish(name=f"Dish {j}", price=round(rng.uniform(3, 30), 2), restaurant_id=r.id)
+            for r in restaurant_rows
+            for j in range(dishes_per_restaurant)
+        ]
+        db.add_all(dish_rows)
+        customers = [User(email=f"customer-{run}-{i}@bench", password="-", role="customer") for i in range(users)]
+        couriers = [User(email=f"courier-{run}-{i}@bench", password="-", role="courier") for i in range(users)]
+        admin = User(email=f"admin-{run}@bench", password="-", role="admin")
+        db.add_all(customers + couriers + [admin])
+        await db.commit()
+
+        dishes = {}
+        for dish in dish_rows:
+            dishes.setdefault(dish.restaurant_id, []).append(dish.id)
+        return Fixture(
+            restaurant_ids=[r.id for r in restaurant_rows],
+            dishes=dishes,
+            customers=[actor(u) for u in customers],
+            couriers=[actor(u) for u in couriers],
+            admin=actor(admin),
+        )
+
+
+Request = Callable[..., Awaitable]
+
+
+async def order_flow(request: Request, fixture: Fixture, index: int, rng: random.Random):
+    """
+    Один проход сценария. request(label, method, url, headers=..., **kwargs)
+    выполняет и измеряет запрос, label - имя эндпоинта в отчете.
+    """
+    customer = fixture.customers[index]
+    courier = fixture.couriers[index]
+    api = "/api/v1"
+
+    await request("GET /restaurants", "GET", f"{api}/restaurants/", headers=customer.headers, params={"limit": 20})
+    restaurant_id = rng.choice(fixture.restaurant_ids)
+    await request(
+        "GET /restaurants/{id}/dishes", "GET", f"{api}/restaurants/{restaurant_id}/dishes",
+        headers=customer.headers, params={"limit": 20}
+    )
+    for dish_id in rng.sample(fixture.dishes[restaurant_id], 2):
+        await request(
+            "POST /cart/add", "POST", f"{api}/cart/add/{dish_id}/{rng.randint(1, 3)}",
+            headers={**customer.headers, "Idempotency-Key": uuid.uuid4().hex}
+        )
+    await request("GET /cart/details", "GET", f"{api}/cart/details", headers=customer.headers)
+    response = await request(
+        "POST /orders/create", "POST", f"{api}/orders/create",
+        headers={**customer.headers, "Idempotency-Key": uuid.uuid4().hex}
+    )
+    if response.status_code != 201:
+        return
+    order_id = response.json()["order_id"]
+
+    await request(
+        "PATCH /orders/{id}/status", "PATCH", f"{api}/orders/{order_id}/status",
+        headers=fixture.admin.headers, json={"status": "paid"}
+    )
+    await request(
+        "POST /couriers/location", "POST", f"{api}/couriers/location",
+        headers=courier.headers, json={"lat": BASE_LAT, "lon": BASE_LON}
+    )
+    await request("GET /couriers/orders", "GET", f"{api}/couriers/orders", headers=courier.headers, params={"limit": 20})
+    await request(
+        "POST /couriers/orders/{id}/accept", "POST", f"{api}/couriers/orders/{order_id}/accept",
+        headers={**courier.headers, "Idempotency-Key": uuid.uuid4().hex}
+    )
+    await request("GET /orders", "GET", f"{api}/orders", headers=customer.headers, params={"limit": 10})
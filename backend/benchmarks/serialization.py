@@ -0,0 +1,119 @@
+"""
+Стоимость сериализации ответов на 1000 строк.
+
+Запуск из каталога backend:
+
+    python -m benchmarks.serialization --rows 1000 --repeat 20
+
+before - путь FastAPI по умолчанию: проверка response_model, затем
+jsonable_encoder и json.dumps (JSONResponse).
+after  - LeanModel.row() и ORJSONResponse.
+
+Объекты строятся из моделей SQLAlchemy без БД, поэтому замер не зависит
+от окружения.
+"""
+import argparse
+import json
+import time
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict
+
+
+def run_sync(coro):
+    """Выполнение корутины без ожиданий (serialize_response) без event loop"""
+    try:
+        coro.send(None)
+    except StopIteration as e:
+        return e.value
+    raise RuntimeError("coroutine suspended")
+
+
+def per_1k_rows(fn: Callable[[], bytes], rows: int, repeat: int) -> float:
+    """Лучшее время вызова fn из repeat, миллисекунды на 1000 строк"""
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000 * 1000 / rows
+
+
+def make_objects(rows: int):
+    from app.db.models.order import Order, OrderItem
+    from app.db.models.restaurant import Dish, Restaurant
+    from app.db.models.user import User
+
+    created = datetime(2023, 6, 1, 12, 0)
+    restaurants = [
+        Restaurant(id=i, name=f"Restaurant {i}", description="Описание", location_lat=55.75 + i / 1e4,
+                   location_lon=37.61 + i / 1e4, is_active=True)
+        for i in range(rows)
+    ]
+    dishes = [Dish(id=i, restaurant_id=i % 50, name=f"Dish {i}", description=None, price=9.99) for i in range(rows)]
+    users = [User(id=i, email=f"user{i}@example.com", role="customer", address=None) for i in range(rows)]
+    orders = []
+    for i in range(rows):
+        order = Order(id=i, user_id=i, restaurant_id=i % 50, courier_id=None, status="paid", total=29.97,
+                      created_at=created + timedelta(seconds=i), delivered_at=None)
+        order.items = [
+            OrderItem(dish_id=dish.id, quantity=1, price_at_order=dish.price, dish=dish)
+            for dish in dishes[i % (rows - 3):i % (rows - 3) + 3]
+        ]
+        orders.append(order)
+    return restaurants, dishes, users, orders
+
+
+def cases(rows: int):
+    from fastapi.responses import JSONResponse, ORJSONResponse
+    from fastapi.routing import serialize_response
+    from fastapi.utils import create_response_field
+    from app.schemas.order import OrderInDB, OrderPage
+    from app.schemas.pagination import Page
+    from app.schemas.restaurant import DishInDB, RestaurantInDB
+    from app.schemas.user import UserInDB
+    from app.services.couriers import _order_to_dict
+
+    restaurants, dishes, users, orders = make_objects(rows)
+
+    def fastapi_default(schema, content: Callable[[], dict]):
+        field = create_response_field(name="response", type_=schema)
+        return lambda: JSONResponse(run_sync(serialize_response(field=field, response_content=content()))).body
+
+    def lean(content: Callable[[], dict]):
+        return lambda: ORJSONResponse(content()).body
+
+    def page(items: list) -> dict:
+        return {"items": items, "next_cursor": None}
+
+    return [
+        ("restaurants", fastapi_default(Page[RestaurantInDB], lambda: page(restaurants)),
+         lean(lambda: page(RestaurantInDB.rows(restaurants)))),
+        ("dishes", fastapi_default(Page[DishInDB], lambda: page(dishes)),
+         lean(lambda: page(DishInDB.rows(dishes)))),
+        ("users", fastapi_default(Page[UserInDB], lambda: page(users)),
+         lean(lambda: page(UserInDB.rows(users)))),
+        # До изменения лента объявляла Page[Dict[str, Any]]
+        ("courier feed", fastapi_default(Page[Dict[str, Any]], lambda: page([_order_to_dict(o, 1.25) for o in orders])),
+         lean(lambda: page([_order_to_dict(o, 1.25) for o in orders]))),
+        ("orders with items", fastapi_default(OrderPage, lambda: page(orders)),
+         lean(lambda: page(OrderInDB.rows(orders)))),
+    ]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Сериализация ответов API: до и после")
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    print(f"{'response':20} {'before, ms/1k':>14} {'after, ms/1k':>14} {'speedup':>8}")
+    for name, before, after in cases(args.rows):
+        # Оба пути должны давать один и тот же JSON
+        assert json.loads(before()) == json.loads(after()), name
+        before_ms = per_1k_rows(before, args.rows, args.repeat)
+        after_ms = per_1k_rows(after, args.rows, args.repeat)
+        print(f"{name:20} {before_ms:>14.2f} {after_ms:>14.2f} {before_ms / after_ms:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Подготовка окружения бенчмарка.
+
+local    - Postgres и Redis из DATABASE_URL / REDIS_URL (отдельная база!)
+fallback - SQLite во временном файле и fakeredis в памяти процесса
+
+Модуль нужно вызвать до импорта app: настройки читаются при импорте.
+"""
+import os
+import sys
+import tempfile
+
+
+def configure(backend: str):
+    os.environ.setdefault("BCRYPT_ROUNDS", "4")
+    os.environ.setdefault("DB_QUERY_BUDGET_STRICT", "true")
+    if backend == "fallback":
+        path = os.path.join(tempfile.mkdtemp(prefix="bench-"), "bench.db")
+        os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{path}"
+
+
+def patch_fallback():
+    """Замена клиента Redis на fakeredis во всех загруженных модулях app"""
+    import fakeredis.aioredis
+    from sqlalchemy import event
+    import app.db.redis
+    from app.db.session import engine
+
+    original = app.db.redis.redis_client
+    fake = fakeredis.aioredis.FakeRedis()
+    for name, module in list(sys.modules.items()):
+        if not name.startswith("app") or module is None:
+            continue
+        for attr, value in list(vars(module).items()):
+            if value is original:
+                setattr(module, attr, fake)
+            elif getattr(value, "registered_client", None) is original:
+                value.registered_client = fake  # Lua-скрипты корзины
+
+    @event.listens_for(engine.sync_engine, "connect")
+    def sqlite_pragmas(connection, _):
+        cursor = connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA busy_timeout=5000")
+        cursor.close()
+
+    return fake
+
+
+async def create_schema(reset: bool = False):
+    """Создание таблиц всех моделей; reset - предварительное удаление"""
+    from app.db.models import analytics, order, outbox, restaurant, user  # noqa: F401
+    from app.db.session import Base, engine
+
+    async with engine.begin() as connection:
+        if reset:
+            await connection.run_sync(Base.metadata.drop_all)
+        await connection.run_sync(Base.metadata.create_all)
@@ -0,0 +1,6 @@
+from benchmarks import stand_ins
+
+# До импорта app: настройки читаются из окружения при импорте. SQLite и
+# fakeredis подключаются только в тестах, которым они нужны
+# (stand_ins.patch_fallback), остальные тесты БД не используют.
+stand_ins.configure("fallback")
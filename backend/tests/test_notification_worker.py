@@ -0,0 +1,97 @@
+import asyncio
+from typing import List
+from app.schemas.notification import NotificationMessage
+from app.services.senders import FakeSender
+from app.workers.notifications import RETRIES_HEADER, NotificationWorker
+
+
+class StubMessage:
+    """Входящее сообщение RabbitMQ: тело, заголовки и подтверждение"""
+
+    def __init__(self, body: bytes, headers=None, fail_nack: bool = False):
+        self.body = body
+        self.headers = headers or {}
+        self.content_type = "application/json"
+        self.acked = False
+        self.requeued = False
+        self.fail_nack = fail_nack
+
+    @property
+    def processed(self) -> bool:
+        return self.acked or self.requeued
+
+    async def ack(self):
+        self.acked = True
+
+    async def nack(self, requeue: bool = True):
+        if self.fail_nack:
+            raise ConnectionError("channel is closed")
+        self.requeued = requeue
+
+
+class StubChannel:
+    def __init__(self):
+        self.published: List[tuple] = []
+        self.default_exchange = self
+
+    async def publish(self, message, routing_key: str):
+        self.published.append((routing_key, message.headers.get(RETRIES_HEADER)))
+
+
+def make_worker(sender: FakeSender) -> NotificationWorker:
+    worker = NotificationWorker(sender, queue="notifications", max_retries=2)
+    worker.channel = StubChannel()
+    return worker
+
+
+def message(notification_id: str, channel: str = "push", headers=None) -> StubMessage:
+    notification = NotificationMessage(id=notification_id, channel=channel, user_id=1, email="a@b.c", message="hi")
+    return StubMessage(notification.json().encode(), headers)
+
+
+def test_dispatch_delivers_batch_per_channel():
+    sender = FakeSender()
+    worker = make_worker(sender)
+    batch = [message("1"), message("2"), message("3", channel="email")]
+
+    asyncio.run(worker.dispatch(batch))
+
+    assert [m.id for m in sender.sent["push"]] == ["1", "2"]
+    assert [m.id for m in sender.sent["email"]] == ["3"]
+    assert sorted(sender.batches) == [1, 2]
+    assert all(m.acked for m in batch)
+    assert worker.channel.published == []
+
+
+def test_dispatch_retries_failed_and_dead_letters_after_max_retries():
+    sender = FakeSender(fail_ids={"2", "3"})
+    worker = make_worker(sender)
+    batch = [message("1"), message("2"), message("3", headers={RETRIES_HEADER: 2})]
+
+    asyncio.run(worker.dispatch(batch))
+
+    assert [m.id for m in sender.sent["push"]] == ["1"]
+    assert worker.channel.published == [("notifications.retry", 1), ("notifications.dead", 2)]
+    assert all(m.acked for m in batch)
+
+
+def test_dispatch_dead_letters_invalid_body():
+    sender = FakeSender()
+    worker = make_worker(sender)
+    batch = [StubMessage(b"not a notification")]
+
+    asyncio.run(worker.dispatch(batch))
+
+    assert worker.channel.published == [("notifications.dead", 0)]
+    assert batch[0].acked
+
+
+def test_requeue_unsettled_skips_acked_and_survives_nack_errors():
+    acked, broken, pending = message("1"), message("2"), message("3")
+    acked.acked = True
+    broken.fail_nack = True
+
+    asyncio.run(NotificationWorker._requeue_unsettled([acked, broken, pending]))
+
+    assert not acked.requeued
+    assert pending.requeued
@@ -0,0 +1,97 @@
+import asyncio
+import random
+import re
+import uuid
+from typing import List, Tuple
+import pytest
+
+pytest.importorskip("aiosqlite")
+pytest.importorskip("fakeredis")
+
+from fastapi.routing import APIRoute  # noqa: E402
+from starlette.routing import Match  # noqa: E402
+from benchmarks import stand_ins  # noqa: E402
+from benchmarks.scenario import seed, order_flow  # noqa: E402
+
+SERVER_TIMING_QUERIES = re.compile(r'db;[^,]*desc="(\d+) queries"')
+
+
+def route_budgets(app) -> List[Tuple[APIRoute, int]]:
+    """Маршруты с зависимостью query_budget(limit) и их limit"""
+    budgets = []
+    for route in app.routes:
+        if not isinstance(route, APIRoute):
+            continue
+        for dependency in route.dependencies:
+            limit = getattr(dependency.dependency, "limit", None)
+            if limit is not None:
+                budgets.append((route, limit))
+    return budgets
+
+
+def find_budget(budgets, method: str, path: str):
+    for index, (route, limit) in enumerate(budgets):
+        match, _ = route.matches({"type": "http", "method": method, "path": path})
+        if match == Match.FULL:
+            return index
+    return None
+
+
+async def exercise(app) -> List[Tuple[str, str, int, int]]:
+    """Сценарий бенчмарка и остальные маршруты с бюджетом: (method, path, status, queries)"""
+    import httpx
+
+    stand_ins.patch_fallback()
+    await stand_ins.create_schema(reset=True)
+    fixture = await seed(3, 5, 2)
+    calls = []
+
+    await app.router.startup()
+    try:
+        async with httpx.AsyncClient(app=app, base_url="http://test") as client:
+            async def request(label: str, method: str, url: str, **kwargs):
+                response = await client.request(method, url, **kwargs)
+                queries = SERVER_TIMING_QUERIES.search(response.headers.get("server-timing", ""))
+                calls.append((method, url, response.status_code, int(queries.group(1)) if queries else -1))
+                return response
+
+            for index in range(2):
+                await order_flow(request, fixture, index, random.Random(index))
+
+            customer, admin, api = fixture.customers[0], fixture.admin, "/api/v1"
+            orders = (await request("", "GET", f"{api}/orders", headers=customer.headers)).json()["items"]
+            order_id = orders[0]["id"]
+            await request("", "GET", f"{api}/orders/{order_id}", headers=customer.headers)
+            await request("", "GET", f"{api}/orders/{order_id}/history", headers=customer.headers)
+            await request("", "GET", f"{api}/restaurants/{fixture.restaurant_ids[0]}/menu", headers=customer.headers)
+            await request(
+                "", "POST", f"{api}/orders/status/bulk",
+                headers={**admin.headers, "Idempotency-Key": uuid.uuid4().hex},
+                json={"order_ids": [order["id"] for order in orders], "status": "delivered"}
+            )
+    finally:
+        await app.router.shutdown()
+    return calls
+
+
+def test_budgeted_routes_stay_within_query_budget():
+    from app.main import app
+
+    budgets = route_budgets(app)
+    assert budgets, "no routes declare query_budget"
+    calls = asyncio.run(exercise(app))
+
+    exercised = set()
+    for method, path, status_code, queries in calls:
+        index = find_budget(budgets, method, path)
+        if index is None:
+            continue
+        exercised.add(index)
+        route, limit = budgets[index]
+        assert status_code < 500, f"{method} {path} -> {status_code}"
+        assert 0 <= queries <= limit, f"{method} {route.path}: {queries} queries, budget {limit}"
+    missing = sorted(
+        f"{sorted(route.methods)[0]} {route.path}"
+        for index, (route, _) in enumerate(budgets) if index not in exercised
+    )
+    assert not missing, f"budgeted routes not exercised: {missing}"
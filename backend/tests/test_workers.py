@@ -0,0 +1,14 @@
+import subprocess
+import sys
+from pathlib import Path
+import pytest
+
+BACKEND = Path(__file__).resolve().parents[1]
+
+
+@pytest.mark.parametrize("module", ["app.workers.analytics", "app.workers.notifications", "app.workers.outbox"])
+def test_worker_configures_mappers(module):
+    """Воркер запускается без app.main: все модели должны регистрироваться его импортами"""
+    code = f"import {module}\nfrom sqlalchemy.orm import configure_mappers\nconfigure_mappers()"
+    result = subprocess.run([sys.executable, "-c", code], cwd=BACKEND, capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr